@@ -8,6 +8,8 @@ from app.models.User import User
 from app.models.Video import Video
 from app.schemas.VideoSchemas import VideoListResponse, VideoResponse, BulkDeleteRequest
 from app.middleware.AuthMiddleware import get_current_user
+from app.core.AssetIndex import asset_index
+from app.service.WorkflowService import WorkflowService
 
 router = APIRouter(prefix="/api", tags=["history"])
 
@@ -47,13 +49,26 @@ def delete_videos(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    deleted = db.query(Video).filter(
+    videos = db.query(Video).filter(
         Video.id.in_(request.video_ids),
         Video.user_id == current_user.id
-    ).delete(synchronize_session=False)
+    )
+    rows = videos.all()
+    workflow_ids = [v.workflow_id for v in rows]
+    
+    # Stop workflows that are still running so their renders stop using quota
+    workflow_service = WorkflowService()
+    for video in rows:
+        if video.status == "processing" and video.workflow_id:
+            workflow_service.cancel_workflow(video.workflow_id)
+    
+    deleted = videos.delete(synchronize_session=False)
     
     db.commit()
     
+    for workflow_id in workflow_ids:
+        asset_index.release_workflow(workflow_id)
+    
     return {"deleted": deleted}
 
 @router.get("/videos/{video_id}", response_model=VideoResponse)
@@ -18,6 +18,6 @@ async def upload_file(
         raise HTTPException(status_code=400, detail="File size must be less than 3MB")
     
     file_service = FileService()
-    file_url = await file_service.upload_file(file, f"user_{current_user.id}")
+    file_url = await file_service.upload_file(file, f"user_{current_user.id}", user_id=current_user.id)
     
     return {"url": file_url}
@@ -1,15 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks, HTTPException, Depends
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, WebSocket
+from typing import List, Optional
 from sqlalchemy.orm import Session
 
 from app.controller.VideoController import VideoController
 from app.schemas.InputSchemas import ScriptReturn
+from app.schemas.ScriptSchemas import MIN_SCENE_COUNT, MAX_SCENE_COUNT, DEFAULT_SCENE_COUNT
 from app.schemas.WorkflowSchemas import ScriptEditRequest, WorkflowStatusResponse, WorkflowStartResponse
-from app.service.HeygenService import HeygenService
-from app.service.CreatomateGenerator import CreatomateGenerator
+from app.schemas.BatchSchemas import BatchRequest, BatchStartResponse, BatchStatusResponse
+from app.service.ServiceContainer import services
 from app.core.Database import get_db
 from app.models.User import User
-from app.middleware.AuthMiddleware import get_current_user
+from app.middleware.AuthMiddleware import get_current_user, get_stream_user, get_user_from_token
 
 router = APIRouter(prefix="/api/video", tags=["video"])
 
@@ -24,6 +25,7 @@ async def generate_script(
     product_image: UploadFile = File(...),
     avatar_image: Optional[UploadFile] = File(None),
     avatar_url: Optional[str] = Form(None),
+    scene_count: int = Form(DEFAULT_SCENE_COUNT, ge=MIN_SCENE_COUNT, le=MAX_SCENE_COUNT),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -31,7 +33,7 @@ async def generate_script(
     video_controller = VideoController(db, current_user)
     result = await video_controller.generate_script(
         nama_produk, target_audiens, usp, cta, product_image,
-        talking_photo_id, voice_id, avatar_image, avatar_url
+        talking_photo_id, voice_id, avatar_image, avatar_url, scene_count
     )
     
     # Flatten response to match frontend expectations
@@ -53,6 +55,7 @@ async def generate_script_non_product(
     voice_id: Optional[str] = Form(None),
     avatar_image: Optional[UploadFile] = File(None),
     avatar_url: Optional[str] = Form(None),
+    scene_count: int = Form(DEFAULT_SCENE_COUNT, ge=MIN_SCENE_COUNT, le=MAX_SCENE_COUNT),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -60,7 +63,7 @@ async def generate_script_non_product(
     video_controller = VideoController(db, current_user)
     result = await video_controller.generate_script_non_product(
         nama_produk, target_audiens, usp, cta,
-        talking_photo_id, voice_id, avatar_image, avatar_url
+        talking_photo_id, voice_id, avatar_image, avatar_url, scene_count
     )
     
     return {
@@ -71,6 +74,29 @@ async def generate_script_non_product(
         "avatar_url": result.avatar_url
     }
 
+@router.post("/generate-script-stream")
+async def generate_script_stream(
+    nama_produk: str = Form(...),
+    target_audiens: str = Form(...),
+    usp: str = Form(...),
+    cta: str = Form(...),
+    talking_photo_id: Optional[str] = Form(None),
+    voice_id: Optional[str] = Form(None),
+    product_image: Optional[UploadFile] = File(None),
+    avatar_image: Optional[UploadFile] = File(None),
+    avatar_url: Optional[str] = Form(None),
+    non_product: bool = Form(False),
+    scene_count: int = Form(DEFAULT_SCENE_COUNT, ge=MIN_SCENE_COUNT, le=MAX_SCENE_COUNT),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Generate video script secara streaming (Server-Sent Events)"""
+    video_controller = VideoController(db, current_user)
+    return await video_controller.generate_script_stream(
+        nama_produk, target_audiens, usp, cta, product_image,
+        talking_photo_id, voice_id, avatar_image, avatar_url, non_product, scene_count
+    )
+
 @router.put("/edit-script")
 async def edit_script(
     request: ScriptEditRequest,
@@ -83,30 +109,33 @@ async def edit_script(
 
 @router.post("/start-workflow", response_model=WorkflowStartResponse)
 async def start_workflow(
-    background_tasks: BackgroundTasks,
     nama_produk: str = Form(...),
     target_audiens: str = Form(...),
     usp: str = Form(...),
     cta: str = Form(...),
     talking_photo_id: Optional[str] = Form(None),
     voice_id: Optional[str] = Form(None),
-    product_image: UploadFile = File(...),
+    product_image: Optional[UploadFile] = File(None),
     avatar_image: Optional[UploadFile] = File(None),
     avatar_url: Optional[str] = Form(None),
     script: Optional[str] = Form(None),
+    product_url: Optional[str] = Form(None),
+    scene_count: int = Form(DEFAULT_SCENE_COUNT, ge=MIN_SCENE_COUNT, le=MAX_SCENE_COUNT),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Start workflow lengkap secara asynchronous"""
+    """Start workflow lengkap secara asynchronous.
+    
+    Kirim `product_url`/`avatar_url` dari hasil generate-script agar gambar tidak diupload ulang.
+    """
     video_controller = VideoController(db, current_user)
     return await video_controller.start_workflow(
-        background_tasks, nama_produk, target_audiens, usp, cta, product_image,
-        talking_photo_id, voice_id, avatar_image, avatar_url, script
+        nama_produk, target_audiens, usp, cta, product_image,
+        talking_photo_id, voice_id, avatar_image, avatar_url, script, product_url, scene_count
     )
 
 @router.post("/start-workflow-non-product", response_model=WorkflowStartResponse)
 async def start_workflow_non_product(
-    background_tasks: BackgroundTasks,
     nama_produk: str = Form(...),
     target_audiens: str = Form(...),
     usp: str = Form(...),
@@ -116,16 +145,69 @@ async def start_workflow_non_product(
     avatar_image: Optional[UploadFile] = File(None),
     avatar_url: Optional[str] = Form(None),
     script: Optional[str] = Form(None),
+    scene_count: int = Form(DEFAULT_SCENE_COUNT, ge=MIN_SCENE_COUNT, le=MAX_SCENE_COUNT),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Start workflow untuk non-product video (tanpa upload produk)"""
     video_controller = VideoController(db, current_user)
     return await video_controller.start_workflow_non_product(
-        background_tasks, nama_produk, target_audiens, usp, cta,
-        talking_photo_id, voice_id, avatar_image, avatar_url, script
+        nama_produk, target_audiens, usp, cta,
+        talking_photo_id, voice_id, avatar_image, avatar_url, script, scene_count
     )
 
+@router.post("/batch", response_model=BatchStartResponse)
+async def start_batch(
+    request: BatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Start banyak workflow sekaligus dari daftar spesifikasi (JSON)"""
+    video_controller = VideoController(db, current_user)
+    return await video_controller.start_batch(request.items)
+
+@router.post("/batch/upload", response_model=BatchStartResponse)
+async def start_batch_upload(
+    spec: UploadFile = File(...),
+    images: Optional[List[UploadFile]] = File(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Start batch dari file CSV/JSONL; `product_url`/`avatar_url` boleh berisi nama file di `images`"""
+    video_controller = VideoController(db, current_user)
+    items = await video_controller.parse_batch_spec(spec)
+    return await video_controller.start_batch(items, images)
+
+@router.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(
+    batch_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get progress gabungan sebuah batch"""
+    video_controller = VideoController(db, current_user)
+    return video_controller.get_batch_status(batch_id)
+
+@router.post("/resume-workflow/{workflow_id}", response_model=WorkflowStartResponse)
+async def resume_workflow(
+    workflow_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Lanjutkan workflow yang gagal/terputus dari checkpoint terakhir"""
+    video_controller = VideoController(db, current_user)
+    return await video_controller.resume_workflow(workflow_id)
+
+@router.post("/cancel-workflow/{workflow_id}", response_model=WorkflowStatusResponse)
+async def cancel_workflow(
+    workflow_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Batalkan workflow yang masih antre/berjalan"""
+    video_controller = VideoController(db, current_user)
+    return video_controller.cancel_workflow(workflow_id)
+
 @router.get("/workflow-status/{workflow_id}", response_model=WorkflowStatusResponse)
 async def get_workflow_status(
     workflow_id: str,
@@ -136,12 +218,38 @@ async def get_workflow_status(
     video_controller = VideoController(db, current_user)
     return video_controller.get_workflow_status(workflow_id)
 
+@router.get("/workflow-stream/{workflow_id}")
+async def stream_workflow_status(
+    workflow_id: str,
+    current_user: User = Depends(get_stream_user),
+    db: Session = Depends(get_db)
+):
+    """Stream status workflow via Server-Sent Events"""
+    video_controller = VideoController(db, current_user)
+    return video_controller.stream_workflow_status(workflow_id)
+
+@router.websocket("/ws/workflow-status/{workflow_id}")
+async def workflow_status_ws(
+    websocket: WebSocket,
+    workflow_id: str,
+    token: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Stream status workflow via WebSocket"""
+    try:
+        current_user = get_user_from_token(token, db)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    
+    video_controller = VideoController(db, current_user)
+    await video_controller.stream_workflow_status_ws(websocket, workflow_id)
+
 @router.get("/heygen-status/{video_id}")
 async def get_heygen_status(video_id: str):
     """Check status video Heygen"""
     try:
-        heygen_service = HeygenService()
-        status = await heygen_service.get_heygen_video_status(video_id)
+        status = await services.heygen_service().get_heygen_video_status(video_id)
         return status
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting Heygen status: {str(e)}")
@@ -150,8 +258,7 @@ async def get_heygen_status(video_id: str):
 async def get_creatomate_status(render_id: str):
     """Check status render Creatomate"""
     try:
-        creatomate_service = CreatomateGenerator()
-        status = await creatomate_service.get_creatomate_render_status(render_id)
+        status = await services.creatomate_generator.get_creatomate_render_status(render_id)
         return status
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting Creatomate status: {str(e)}")
\ No newline at end of file
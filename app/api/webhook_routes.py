@@ -0,0 +1,50 @@
+import hmac
+from fastapi import APIRouter, HTTPException, Request
+
+from app.core.RenderEvents import render_events
+from app.core.Setting import setting
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
+
+def _verify_token(token: str):
+    # No secret means webhooks are disabled, so every callback is rejected
+    if not setting.WEBHOOK_SECRET or not hmac.compare_digest(token or "", setting.WEBHOOK_SECRET):
+        raise HTTPException(status_code=401, detail="Invalid webhook token")
+
+@router.post("/heygen")
+async def heygen_webhook(request: Request, token: str = ""):
+    """Receive HeyGen avatar video callbacks"""
+    _verify_token(token)
+    body = await request.json()
+    
+    event_type = body.get("event_type", "")
+    event_data = body.get("event_data", {})
+    video_id = event_data.get("video_id")
+    if not video_id:
+        raise HTTPException(status_code=400, detail="Missing video_id")
+    
+    # Store in the same shape as /v1/video_status.get so waiters can use it directly
+    if event_type == "avatar_video.success":
+        status = {"data": {"id": video_id, "status": "completed", "video_url": event_data.get("url")}}
+    elif event_type == "avatar_video.fail":
+        status = {"data": {"id": video_id, "status": "failed", "error": event_data.get("msg")}}
+    else:
+        return {"received": True, "ignored": event_type}
+    
+    render_events.publish("heygen", video_id, status)
+    return {"received": True}
+
+@router.post("/creatomate")
+async def creatomate_webhook(request: Request, token: str = ""):
+    """Receive Creatomate render callbacks"""
+    _verify_token(token)
+    body = await request.json()
+    
+    render_id = body.get("id")
+    if not render_id:
+        raise HTTPException(status_code=400, detail="Missing render id")
+    
+    # Creatomate posts the same render object returned by GET /v2/renders/{id}
+    if body.get("status") in ("succeeded", "failed"):
+        render_events.publish("creatomate", render_id, body)
+    return {"received": True}
@@ -1,17 +1,32 @@
+import io
+import csv
 import uuid
 import json
+import asyncio
 import logging
-from fastapi import HTTPException, UploadFile, BackgroundTasks
-from typing import Optional
+from fastapi import HTTPException, UploadFile, WebSocket
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.controller.WorkflowProductController import WorkflowProductController
 from app.service.WorkflowService import WorkflowService
 from app.service.FileService import FileService
+from app.service.ServiceContainer import services
 from app.schemas.InputSchemas import InputPayload, InputImage, ScriptReturn
 from app.schemas.WorkflowSchemas import ScriptEditRequest, WorkflowStatusResponse, WorkflowStartResponse
-from app.schemas.ScriptSchemas import VideoStoryBoard
+from app.schemas.ScriptSchemas import VideoStoryBoard, MIN_SCENE_COUNT, MAX_SCENE_COUNT, DEFAULT_SCENE_COUNT
+from app.schemas.JobSchemas import WorkflowJob
+from app.schemas.BatchSchemas import BatchItem, BatchStartResponse, BatchStatusResponse, BatchItemStatus
+from app.core.JobQueue import job_queue
+from app.core.WorkflowStorage import workflow_storage
+from app.core.ScriptCache import script_cache
+from app.core.Setting import setting
+from app.core.AssetIndex import asset_index
+from app.core.RateLimiter import current_user_id
 from app.models.Video import Video
+from app.models.Template import Template
 from app.models.User import User
 
 logger = logging.getLogger(__name__)
@@ -21,6 +36,29 @@ class VideoController:
         self.workflow_service = WorkflowService(db, user.id if user else None)
         self.db = db
         self.user = user
+        # Provider calls made while handling this request queue under this user
+        current_user_id.set(user.id if user else None)
+    
+    def _load_script(self, script: str) -> VideoStoryBoard:
+        """Parse a storyboard edited by the client; the scene count may differ from the requested one"""
+        storyboard = VideoStoryBoard(**json.loads(script))
+        if not MIN_SCENE_COUNT <= len(storyboard.scripts) <= MAX_SCENE_COUNT:
+            raise HTTPException(status_code=400, detail=f"Script must have {MIN_SCENE_COUNT}-{MAX_SCENE_COUNT} scenes")
+        return storyboard
+    
+    def _resolve_image_url(self, ref: str) -> str:
+        """Map an image URL or asset handle sent instead of a file to its URL
+        
+        Plain http(s) URLs (presets, earlier uploads, images hosted by the
+        client) are used as given; an asset handle must belong to the caller.
+        """
+        if ref.startswith(("http://", "https://")):
+            return ref
+        
+        url = asset_index.resolve(ref, self.user.id) if self.user else None
+        if not url:
+            raise HTTPException(status_code=403, detail="Image not found or not owned by user")
+        return url
     
     async def generate_script(
         self,
@@ -32,13 +70,14 @@ class VideoController:
         talking_photo_id: Optional[str] = None,
         voice_id: Optional[str] = None,
         avatar_image: Optional[UploadFile] = None,
-        avatar_url: Optional[str] = None
+        avatar_url: Optional[str] = None,
+        scene_count: int = DEFAULT_SCENE_COUNT
     ) -> ScriptReturn:
         """Generate video script"""
         try:
-            # Process uploaded files
-            product_image_path, avatar_image_path = await FileService.process_uploaded_files(
-                product_image, avatar_image
+            # Stream uploaded files to storage
+            product_image_url, avatar_image_url = await FileService.process_uploaded_files(
+                product_image, avatar_image, user_id=self.user.id if self.user else None
             )
             
             # Create request objects
@@ -48,25 +87,23 @@ class VideoController:
                 usp=usp,
                 cta=cta,
                 talking_photo_id=talking_photo_id,
-                voice_id=voice_id
+                voice_id=voice_id,
+                scene_count=scene_count
             )
             
             image_request = InputImage(
-                product_image=product_image_path,
-                avatar_image=avatar_url if avatar_url else avatar_image_path
+                product_image=product_image_url,
+                avatar_image=self._resolve_image_url(avatar_url) if avatar_url else avatar_image_url
             )
             
             # Generate script
-            controller = WorkflowProductController(payload, image_request)
+            controller = await WorkflowProductController.create(payload, image_request)
             script_result = await controller.generate_video_script()
             
-            # Cleanup temp files
-            FileService.cleanup_temp_file(product_image_path)
-            if avatar_image_path:
-                FileService.cleanup_temp_file(avatar_image_path)
-            
             return script_result
-            
+        
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error generating script: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error generating script: {str(e)}")
@@ -80,14 +117,15 @@ class VideoController:
         talking_photo_id: Optional[str] = None,
         voice_id: Optional[str] = None,
         avatar_image: Optional[UploadFile] = None,
-        avatar_url: Optional[str] = None
+        avatar_url: Optional[str] = None,
+        scene_count: int = DEFAULT_SCENE_COUNT
     ) -> ScriptReturn:
         """Generate video script for non-product video"""
         try:
-            # Process avatar image only
-            avatar_image_path = None
+            # Stream avatar image only
+            avatar_image_url = None
             if avatar_image and avatar_image.filename:
-                avatar_image_path = await FileService.save_uploaded_file(avatar_image)
+                avatar_image_url = await FileService.upload_file(avatar_image, user_id=self.user.id if self.user else None)
             
             # Create request objects
             payload = InputPayload(
@@ -96,28 +134,104 @@ class VideoController:
                 usp=usp,
                 cta=cta,
                 talking_photo_id=talking_photo_id,
-                voice_id=voice_id
+                voice_id=voice_id,
+                scene_count=scene_count
             )
             
             image_request = InputImage(
                 product_image=None,
-                avatar_image=avatar_url if avatar_url else avatar_image_path
+                avatar_image=self._resolve_image_url(avatar_url) if avatar_url else avatar_image_url
             )
             
             # Generate script
-            controller = WorkflowProductController(payload, image_request, is_non_product=True)
+            controller = await WorkflowProductController.create(payload, image_request, is_non_product=True)
             script_result = await controller.generate_video_script()
             
-            # Cleanup temp files
-            if avatar_image_path:
-                FileService.cleanup_temp_file(avatar_image_path)
-            
             return script_result
-            
+        
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error generating non-product script: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error generating script: {str(e)}")
     
+    async def generate_script_stream(
+        self,
+        nama_produk: str,
+        target_audiens: str,
+        usp: str,
+        cta: str,
+        product_image: Optional[UploadFile] = None,
+        talking_photo_id: Optional[str] = None,
+        voice_id: Optional[str] = None,
+        avatar_image: Optional[UploadFile] = None,
+        avatar_url: Optional[str] = None,
+        non_product: bool = False,
+        scene_count: int = DEFAULT_SCENE_COUNT
+    ) -> StreamingResponse:
+        """Generate video script as Server-Sent Events: assets, title, scene..., storyboard"""
+        if not non_product and not (product_image and product_image.filename):
+            raise HTTPException(status_code=400, detail="product_image is required")
+        
+        # Start the model right away; uploads run meanwhile and must finish
+        # before the request's files are closed
+        events_queue: asyncio.Queue = asyncio.Queue()
+        
+        async def produce():
+            try:
+                async for event in services.script_service.stream_video_script(nama_produk, target_audiens, usp, cta, non_product=non_product, scene_count=scene_count):
+                    await events_queue.put(event)
+            except Exception as e:
+                logger.error(f"Error streaming script: {str(e)}")
+                await events_queue.put({"event": "error", "data": {"detail": f"Error generating script: {str(e)}"}})
+            finally:
+                await events_queue.put(None)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            user_id = self.user.id if self.user else None
+            product_image_url = None if non_product else await FileService.upload_file(product_image, user_id=user_id)
+            avatar_image_url = None
+            if avatar_image and avatar_image.filename:
+                avatar_image_url = await FileService.upload_file(avatar_image, user_id=user_id)
+            
+            payload = InputPayload(
+                nama_produk=nama_produk,
+                target_audiens=target_audiens,
+                usp=usp,
+                cta=cta,
+                talking_photo_id=talking_photo_id,
+                voice_id=voice_id,
+                scene_count=scene_count
+            )
+            image_request = InputImage(
+                product_image=product_image_url,
+                avatar_image=self._resolve_image_url(avatar_url) if avatar_url else avatar_image_url
+            )
+            controller = await WorkflowProductController.create(payload, image_request, is_non_product=non_product)
+        except HTTPException:
+            producer.cancel()
+            raise
+        except Exception as e:
+            producer.cancel()
+            logger.error(f"Error generating script: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error generating script: {str(e)}")
+        
+        async def events():
+            assets = {"product_url": controller.product_url, "avatar_url": controller.avatar_url}
+            yield f"event: assets\ndata: {json.dumps(assets)}\n\n"
+            try:
+                while (event := await events_queue.get()) is not None:
+                    yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            finally:
+                producer.cancel()
+        
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
     async def edit_script(self, request: ScriptEditRequest) -> dict:
         """Edit script"""
         try:
@@ -131,37 +245,35 @@ class VideoController:
     
     async def start_workflow(
         self,
-        background_tasks: BackgroundTasks,
         nama_produk: str,
         target_audiens: str,
         usp: str,
         cta: str,
-        product_image: UploadFile,
+        product_image: Optional[UploadFile] = None,
         talking_photo_id: Optional[str] = None,
         voice_id: Optional[str] = None,
         avatar_image: Optional[UploadFile] = None,
         avatar_url: Optional[str] = None,
-        script: Optional[str] = None
+        script: Optional[str] = None,
+        product_url: Optional[str] = None,
+        scene_count: int = DEFAULT_SCENE_COUNT
     ) -> WorkflowStartResponse:
-        """Start workflow"""
+        """Start workflow. `product_url` reuses the image uploaded by generate-script."""
         try:
             workflow_id = str(uuid.uuid4())
             
-            # Save to database
-            if self.db and self.user:
-                video = Video(
-                    user_id=self.user.id,
-                    workflow_id=workflow_id,
-                    nama_produk=nama_produk,
-                    status="processing"
+            # Reuse previously uploaded images, stream new ones to storage
+            if product_url:
+                product_image_url = self._resolve_image_url(product_url)
+                avatar_image_url = None
+                if avatar_image and avatar_image.filename:
+                    avatar_image_url = await FileService.upload_file(avatar_image, user_id=self.user.id if self.user else None)
+            elif product_image and product_image.filename:
+                product_image_url, avatar_image_url = await FileService.process_uploaded_files(
+                    product_image, avatar_image, user_id=self.user.id if self.user else None
                 )
-                self.db.add(video)
-                self.db.commit()
-            
-            # Process uploaded files
-            product_image_path, avatar_image_path = await FileService.process_uploaded_files(
-                product_image, avatar_image
-            )
+            else:
+                raise HTTPException(status_code=400, detail="product_image or product_url is required")
             
             # Create request objects
             payload = InputPayload(
@@ -170,21 +282,32 @@ class VideoController:
                 usp=usp,
                 cta=cta,
                 talking_photo_id=talking_photo_id,
-                voice_id=voice_id
+                voice_id=voice_id,
+                scene_count=scene_count
             )
             
             image_request = InputImage(
-                product_image=product_image_path,
-                avatar_image=avatar_url if avatar_url else avatar_image_path
+                product_image=product_image_url,
+                avatar_image=self._resolve_image_url(avatar_url) if avatar_url else avatar_image_url
             )
             
-            controller = WorkflowProductController(payload, image_request)
+            # Save to database
+            if self.db and self.user:
+                video = Video(
+                    user_id=self.user.id,
+                    workflow_id=workflow_id,
+                    nama_produk=nama_produk,
+                    status="processing"
+                )
+                self.db.add(video)
+                self.db.commit()
+            
+            controller = await WorkflowProductController.create(payload, image_request)
             
             # Generate or use provided script
             if script:
-                script_data = json.loads(script)
                 script_result = ScriptReturn(
-                    script=VideoStoryBoard(**script_data),
+                    script=self._load_script(script),
                     product_url=controller.product_url,
                     avatar_url=controller.avatar_url
                 )
@@ -192,27 +315,33 @@ class VideoController:
                 self.workflow_service.update_status(workflow_id, "processing", "Generating script...", 5)
                 script_result = await controller.generate_video_script()
             
-            # Start background workflow
-            background_tasks.add_task(
-                self.workflow_service.run_workflow, 
-                workflow_id, 
-                controller, 
-                script_result
-            )
+            # Hand the workflow over to the worker pool
+            self.workflow_service.update_status(workflow_id, "queued", "Waiting for an available worker...", 5)
+            job_queue.enqueue(WorkflowJob(
+                workflow_id=workflow_id,
+                user_id=self.user.id if self.user else None,
+                request=payload,
+                product_url=controller.product_url,
+                avatar_url=controller.avatar_url,
+                is_non_product=False,
+                script=script_result
+            ))
+            asset_index.add_workflow_refs(workflow_id, [controller.product_url, controller.avatar_url])
             
             return WorkflowStartResponse(
                 workflow_id=workflow_id,
                 message="Workflow started successfully",
                 script=script_result.script
             )
-            
+        
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error starting workflow: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error starting workflow: {str(e)}")
     
     async def start_workflow_non_product(
         self,
-        background_tasks: BackgroundTasks,
         nama_produk: str,
         target_audiens: str,
         usp: str,
@@ -221,27 +350,17 @@ class VideoController:
         voice_id: Optional[str] = None,
         avatar_image: Optional[UploadFile] = None,
         avatar_url: Optional[str] = None,
-        script: Optional[str] = None
+        script: Optional[str] = None,
+        scene_count: int = DEFAULT_SCENE_COUNT
     ) -> WorkflowStartResponse:
         """Start workflow for non-product video"""
         try:
             workflow_id = str(uuid.uuid4())
             
-            # Save to database
-            if self.db and self.user:
-                video = Video(
-                    user_id=self.user.id,
-                    workflow_id=workflow_id,
-                    nama_produk=nama_produk,
-                    status="processing"
-                )
-                self.db.add(video)
-                self.db.commit()
-            
-            # Process avatar image only
-            avatar_image_path = None
+            # Stream avatar image only
+            avatar_image_url = None
             if avatar_image:
-                avatar_image_path = await FileService.save_uploaded_file(avatar_image)
+                avatar_image_url = await FileService.upload_file(avatar_image, user_id=self.user.id if self.user else None)
             
             # Create request objects
             payload = InputPayload(
@@ -250,21 +369,32 @@ class VideoController:
                 usp=usp,
                 cta=cta,
                 talking_photo_id=talking_photo_id,
-                voice_id=voice_id
+                voice_id=voice_id,
+                scene_count=scene_count
             )
             
             image_request = InputImage(
                 product_image=None,
-                avatar_image=avatar_url if avatar_url else avatar_image_path
+                avatar_image=self._resolve_image_url(avatar_url) if avatar_url else avatar_image_url
             )
             
-            controller = WorkflowProductController(payload, image_request, is_non_product=True)
+            # Save to database
+            if self.db and self.user:
+                video = Video(
+                    user_id=self.user.id,
+                    workflow_id=workflow_id,
+                    nama_produk=nama_produk,
+                    status="processing"
+                )
+                self.db.add(video)
+                self.db.commit()
+            
+            controller = await WorkflowProductController.create(payload, image_request, is_non_product=True)
             
             # Generate or use provided script
             if script:
-                script_data = json.loads(script)
                 script_result = ScriptReturn(
-                    script=VideoStoryBoard(**script_data),
+                    script=self._load_script(script),
                     product_url="",
                     avatar_url=controller.avatar_url
                 )
@@ -272,24 +402,284 @@ class VideoController:
                 self.workflow_service.update_status(workflow_id, "processing", "Generating script...", 5)
                 script_result = await controller.generate_video_script()
             
-            # Start background workflow
-            background_tasks.add_task(
-                self.workflow_service.run_workflow, 
-                workflow_id, 
-                controller, 
-                script_result
-            )
+            # Hand the workflow over to the worker pool
+            self.workflow_service.update_status(workflow_id, "queued", "Waiting for an available worker...", 5)
+            job_queue.enqueue(WorkflowJob(
+                workflow_id=workflow_id,
+                user_id=self.user.id if self.user else None,
+                request=payload,
+                product_url=controller.product_url,
+                avatar_url=controller.avatar_url,
+                is_non_product=True,
+                script=script_result
+            ))
+            asset_index.add_workflow_refs(workflow_id, [controller.product_url, controller.avatar_url])
             
             return WorkflowStartResponse(
                 workflow_id=workflow_id,
                 message="Workflow started successfully",
                 script=script_result.script
             )
-            
+        
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error starting non-product workflow: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Error starting non-product workflow: {str(e)}")
     
+    async def resume_workflow(self, workflow_id: str) -> WorkflowStartResponse:
+        """Re-queue a failed or interrupted workflow from its last checkpoint"""
+        job = job_queue.get_job(workflow_id)
+        if not job or (self.user and job.user_id != self.user.id):
+            raise HTTPException(status_code=404, detail="Workflow not found")
+        
+        status_data = self.workflow_service.get_status(workflow_id)
+        if status_data and status_data['status'] in ("queued", "processing", "completed"):
+            raise HTTPException(status_code=409, detail=f"Workflow is {status_data['status']}, nothing to resume")
+        
+        try:
+            if self.db:
+                video = self.db.query(Video).filter(Video.workflow_id == workflow_id).first()
+                if video:
+                    video.status = "processing"
+                    self.db.commit()
+            
+            self.workflow_service.update_status(workflow_id, "queued", "Resuming from last checkpoint...", 5)
+            job_queue.enqueue(job.model_copy(update={"resume": True, "attempts": 0}))
+            
+            return WorkflowStartResponse(
+                workflow_id=workflow_id,
+                message="Workflow resumed successfully",
+                script=job.script.script if job.script else None
+            )
+        
+        except Exception as e:
+            logger.error(f"Error resuming workflow: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error resuming workflow: {str(e)}")
+    
+    def cancel_workflow(self, workflow_id: str) -> WorkflowStatusResponse:
+        """Stop a queued or running workflow and abort its pending renders"""
+        job = job_queue.get_job(workflow_id)
+        if not job or (self.user and job.user_id != self.user.id):
+            raise HTTPException(status_code=404, detail="Workflow not found")
+        
+        status_data = self.workflow_service.get_status(workflow_id)
+        if status_data and status_data['status'] not in ("queued", "processing"):
+            raise HTTPException(status_code=409, detail=f"Workflow is {status_data['status']}, nothing to cancel")
+        
+        try:
+            self.workflow_service.cancel_workflow(workflow_id)
+            return self.get_workflow_status(workflow_id)
+        
+        except Exception as e:
+            logger.error(f"Error cancelling workflow: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error cancelling workflow: {str(e)}")
+    
+    @staticmethod
+    async def parse_batch_spec(spec: UploadFile) -> List[BatchItem]:
+        """Read batch items from a CSV (header row) or JSONL upload"""
+        try:
+            text = (await spec.read()).decode("utf-8-sig")
+            if (spec.filename or "").lower().endswith(".csv"):
+                # Empty cells fall back to the item defaults
+                rows = [{key: value for key, value in row.items() if key and value not in (None, "")} for row in csv.DictReader(io.StringIO(text))]
+                for row in rows:
+                    if "script" in row:
+                        row["script"] = json.loads(row["script"])
+            else:
+                rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid batch file: {str(e)}")
+        
+        items = []
+        for line, row in enumerate(rows, start=1):
+            try:
+                items.append(BatchItem.model_validate(row))
+            except ValidationError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid batch item {line}: {e.errors()[0]['msg']}")
+        return items
+    
+    async def start_batch(self, items: List[BatchItem], files: Optional[List[UploadFile]] = None) -> BatchStartResponse:
+        """Queue one workflow per item.
+        
+        Templates, uploaded files and image URLs are resolved once per batch, identical
+        items share one workflow, and items with the same script inputs share one
+        generated script (the worker generates it under a batch-scoped key).
+        """
+        if not items:
+            raise HTTPException(status_code=400, detail="Batch has no items")
+        if len(items) > setting.BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"Batch is limited to {setting.BATCH_MAX_ITEMS} items")
+        
+        try:
+            batch_id = str(uuid.uuid4())
+            user_id = self.user.id if self.user else None
+            
+            templates: Dict[int, Template] = {}
+            template_ids = {item.template_id for item in items if item.template_id is not None}
+            if template_ids:
+                query = self.db.query(Template).filter(Template.id.in_(template_ids), Template.user_id == user_id) if self.db else []
+                templates = {template.id: template for template in query}
+                missing = template_ids - templates.keys()
+                if missing:
+                    raise HTTPException(status_code=404, detail=f"Template {min(missing)} not found")
+            
+            # Each distinct file and image reference is uploaded/resolved once
+            uploaded = {}
+            for file in files or []:
+                if file.filename and file.filename not in uploaded:
+                    uploaded[file.filename] = await FileService.upload_file(file, user_id=user_id)
+            resolved = {}
+            
+            def resolve(ref: Optional[str]) -> Optional[str]:
+                if not ref:
+                    return None
+                if ref in uploaded:
+                    return uploaded[ref]
+                if ref not in resolved:
+                    resolved[ref] = self._resolve_image_url(ref)
+                return resolved[ref]
+            
+            workflow_ids: List[str] = []
+            jobs: List[WorkflowJob] = []
+            seen: Dict[str, str] = {}
+            for index, item in enumerate(items, start=1):
+                template = templates.get(item.template_id)
+                fields = {
+                    name: getattr(item, name) or (getattr(template, name) if template else None)
+                    for name in ("nama_produk", "target_audiens", "usp", "cta")
+                }
+                empty = [name for name, value in fields.items() if not value]
+                if empty:
+                    raise HTTPException(status_code=400, detail=f"Batch item {index}: missing {', '.join(empty)}")
+                
+                product_url = None if item.is_non_product else resolve(item.product_url)
+                if not item.is_non_product and not product_url:
+                    raise HTTPException(status_code=400, detail=f"Batch item {index}: product_url is required")
+                
+                payload = InputPayload(
+                    **fields,
+                    talking_photo_id=item.talking_photo_id,
+                    voice_id=item.voice_id,
+                    scene_count=item.scene_count
+                )
+                controller = WorkflowProductController(
+                    payload,
+                    InputImage(product_image=product_url, avatar_image=resolve(item.avatar_url)),
+                    is_non_product=item.is_non_product
+                )
+                
+                spec_key = json.dumps([payload.model_dump(), controller.product_url, controller.avatar_url, item.is_non_product, item.script.model_dump() if item.script else None], sort_keys=True)
+                if spec_key in seen:
+                    workflow_ids.append(seen[spec_key])
+                    continue
+                
+                script_result = None
+                script_key = None
+                if item.script:
+                    if not MIN_SCENE_COUNT <= len(item.script.scripts) <= MAX_SCENE_COUNT:
+                        raise HTTPException(status_code=400, detail=f"Batch item {index}: script must have {MIN_SCENE_COUNT}-{MAX_SCENE_COUNT} scenes")
+                    script_result = ScriptReturn(script=item.script, product_url=controller.product_url, avatar_url=controller.avatar_url)
+                else:
+                    mode = "non_product" if item.is_non_product else "product"
+                    script_key = script_cache.cache_key(mode, {**fields, "scene_count": str(item.scene_count)}, scope=f"batch:{batch_id}")
+                
+                workflow_id = str(uuid.uuid4())
+                seen[spec_key] = workflow_id
+                workflow_ids.append(workflow_id)
+                jobs.append(WorkflowJob(
+                    workflow_id=workflow_id,
+                    user_id=user_id,
+                    request=payload,
+                    product_url=controller.product_url,
+                    avatar_url=controller.avatar_url,
+                    is_non_product=item.is_non_product,
+                    script=script_result,
+                    script_key=script_key,
+                    batch_id=batch_id,
+                    priority="bulk"
+                ))
+            
+            # Save to database
+            if self.db and self.user:
+                self.db.add_all([
+                    Video(user_id=self.user.id, workflow_id=job.workflow_id, nama_produk=job.request.nama_produk, status="processing")
+                    for job in jobs
+                ])
+                self.db.commit()
+            
+            # Hand the workflows over to the worker pool
+            workflow_storage.set_batch(batch_id, {"user_id": user_id, "workflow_ids": workflow_ids})
+            for job in jobs:
+                self.workflow_service.update_status(job.workflow_id, "queued", "Waiting for an available worker...", 5)
+            job_queue.enqueue_many(jobs)
+            for job in jobs:
+                asset_index.add_workflow_refs(job.workflow_id, [job.product_url, job.avatar_url])
+            
+            logger.info(f"Batch {batch_id}: Queued {len(jobs)} workflows for {len(items)} items")
+            return BatchStartResponse(
+                batch_id=batch_id,
+                total=len(items),
+                workflow_ids=workflow_ids,
+                deduplicated=len(items) - len(jobs)
+            )
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error starting batch: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error starting batch: {str(e)}")
+    
+    def get_batch_status(self, batch_id: str) -> BatchStatusResponse:
+        """Aggregate progress of every workflow in a batch"""
+        batch = workflow_storage.get_batch(batch_id)
+        if not batch or (self.user and batch["user_id"] != self.user.id):
+            raise HTTPException(status_code=404, detail="Batch not found")
+        
+        workflow_ids = batch["workflow_ids"]
+        statuses = dict(zip(workflow_ids, workflow_storage.get_many(workflow_ids)))
+        
+        # Live status expires after a day; fall back to the Video rows
+        expired = [workflow_id for workflow_id, status in statuses.items() if status is None]
+        if expired and self.db:
+            for video in self.db.query(Video).filter(Video.workflow_id.in_(expired)):
+                statuses[video.workflow_id] = {
+                    "status": video.status,
+                    "progress": 100 if video.status == "completed" else 0,
+                    "data": {"final_video_url": video.video_url} if video.video_url else None
+                }
+        
+        items = []
+        counts: Dict[str, int] = {}
+        for workflow_id in workflow_ids:
+            status = statuses.get(workflow_id) or {"status": "unknown", "progress": 0}
+            counts[status["status"]] = counts.get(status["status"], 0) + 1
+            items.append(BatchItemStatus(
+                workflow_id=workflow_id,
+                status=status["status"],
+                progress=status["progress"],
+                final_video_url=(status.get("data") or {}).get("final_video_url")
+            ))
+        
+        if counts.get("completed", 0) == len(items):
+            batch_status = "completed"
+        elif counts.get("completed", 0) + counts.get("error", 0) + counts.get("cancelled", 0) == len(items):
+            batch_status = "completed_with_errors"
+        elif set(counts) == {"queued"}:
+            batch_status = "queued"
+        else:
+            batch_status = "processing"
+        
+        return BatchStatusResponse(
+            batch_id=batch_id,
+            status=batch_status,
+            # Failed and cancelled items are finished too
+            progress=sum(100 if item.status in ("error", "cancelled") else item.progress for item in items) // len(items),
+            total=len(items),
+            counts=counts,
+            items=items
+        )
+    
     def get_workflow_status(self, workflow_id: str) -> WorkflowStatusResponse:
         """Get workflow status"""
         status_data = self.workflow_service.get_status(workflow_id)
@@ -304,5 +694,67 @@ class VideoController:
             status=status_data['status'],
             message=status_data['message'],
             progress=status_data['progress'],
-            data=status_data.get('data')
-        )
\ No newline at end of file
+            data=status_data.get('data'),
+            queue_position=job_queue.queue_position(workflow_id) if status_data['status'] == "queued" else None
+        )
+    
+    def _ensure_workflow_access(self, workflow_id: str):
+        """404 unless the workflow exists and belongs to the current user"""
+        video = self.db.query(Video).filter(Video.workflow_id == workflow_id).first() if self.db else None
+        if video and self.user and video.user_id != self.user.id:
+            raise HTTPException(status_code=404, detail="Workflow not found")
+        if not video and not self.workflow_service.get_status(workflow_id):
+            raise HTTPException(status_code=404, detail="Workflow not found")
+        if self.db:
+            # Streams stay open for the whole workflow; don't hold a DB connection meanwhile
+            self.db.close()
+    
+    def stream_workflow_status(self, workflow_id: str) -> StreamingResponse:
+        """Stream workflow status as Server-Sent Events"""
+        self._ensure_workflow_access(workflow_id)
+        
+        async def events():
+            async for status_data in self.workflow_service.stream_status(workflow_id):
+                if status_data is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(status_data)}\n\n"
+        
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    async def stream_workflow_status_ws(self, websocket: WebSocket, workflow_id: str):
+        """Push workflow status updates over a WebSocket"""
+        try:
+            self._ensure_workflow_access(workflow_id)
+        except HTTPException:
+            await websocket.close(code=1008)
+            return
+        
+        await websocket.accept()
+        
+        async def pump():
+            async for status_data in self.workflow_service.stream_status(workflow_id):
+                if status_data is not None:
+                    await websocket.send_json(status_data)
+        
+        async def wait_disconnect():
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+        
+        pump_task = asyncio.create_task(pump())
+        disconnect_task = asyncio.create_task(wait_disconnect())
+        done, pending = await asyncio.wait({pump_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        
+        if pump_task in done:
+            if pump_task.exception():
+                logger.error(f"Workflow {workflow_id}: Status stream failed - {pump_task.exception()}")
+            await websocket.close()
@@ -0,0 +1,158 @@
+import re
+import json
+import time
+import logging
+from typing import Iterable, List, Optional
+
+from app.core.WorkflowStorage import workflow_storage
+from app.core.Setting import setting
+
+logger = logging.getLogger(__name__)
+
+class AssetIndex:
+    """Content-addressed index of images stored on TOS.
+
+    Maps the SHA-256 of the image bytes to the TOS object that already holds
+    them, so an image uploaded again (generate-script, then start-workflow)
+    resolves to the existing URL without another upload. Workflows take a
+    reference on the assets they use. Upload URLs are handed to clients and
+    kept in history, so nothing is evicted by default; only objects under the
+    prefixes in ASSET_EVICT_PREFIXES are evicted from TOS and the index once
+    they have no references and have been idle for ASSET_IDLE_TTL_SECONDS.
+    """
+    _instance = None
+
+    HASH_PREFIX = "asset:sha256:"
+    URL_PREFIX = "asset:url:"
+    OWNERS_PREFIX = "asset:owners:"
+    REFS_PREFIX = "asset:refs:"
+    WORKFLOW_PREFIX = "asset:workflow:"
+    LAST_USED_KEY = "asset:last_used"
+    EVICT_LOCK_KEY = "asset:evict_lock"
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AssetIndex, cls).__new__(cls)
+            cls._instance.redis_client = workflow_storage.redis_client
+        return cls._instance
+
+    def lookup(self, sha256: str, user_id: Optional[int] = None) -> Optional[str]:
+        """Return the URL already stored for these bytes, recording `user_id` as an owner"""
+        data = self.redis_client.get(f"{self.HASH_PREFIX}{sha256}")
+        if not data:
+            return None
+
+        pipe = self.redis_client.pipeline()
+        pipe.zadd(self.LAST_USED_KEY, {sha256: time.time()})
+        if user_id is not None:
+            pipe.sadd(f"{self.OWNERS_PREFIX}{sha256}", user_id)
+        pipe.execute()
+        return json.loads(data)["url"]
+
+    def register(self, sha256: str, url: str, object_key: str, user_id: Optional[int] = None) -> str:
+        """Record a freshly uploaded object. Returns the canonical URL for the hash,
+        which is an earlier one if a concurrent upload of the same bytes won."""
+        payload = json.dumps({"url": url, "object_key": object_key})
+        created = self.redis_client.set(f"{self.HASH_PREFIX}{sha256}", payload, nx=True)
+        if not created:
+            return self.lookup(sha256, user_id)
+
+        pipe = self.redis_client.pipeline()
+        pipe.set(f"{self.URL_PREFIX}{url}", sha256)
+        pipe.zadd(self.LAST_USED_KEY, {sha256: time.time()})
+        if user_id is not None:
+            pipe.sadd(f"{self.OWNERS_PREFIX}{sha256}", user_id)
+        pipe.execute()
+        return url
+
+    def hash_for_url(self, url: str) -> Optional[str]:
+        return self.redis_client.get(f"{self.URL_PREFIX}{url}")
+
+    def is_owner(self, url: str, user_id: int) -> bool:
+        sha256 = self.hash_for_url(url)
+        if not sha256:
+            return False
+        return bool(self.redis_client.sismember(f"{self.OWNERS_PREFIX}{sha256}", user_id))
+
+    def resolve(self, ref: str, user_id: int) -> Optional[str]:
+        """Map a URL or asset handle (the SHA-256) to its URL if `user_id` uploaded it"""
+        if re.fullmatch(r"[0-9a-f]{64}", ref):
+            data = self.redis_client.get(f"{self.HASH_PREFIX}{ref}")
+            if not data or not self.redis_client.sismember(f"{self.OWNERS_PREFIX}{ref}", user_id):
+                return None
+            return json.loads(data)["url"]
+        return ref if self.is_owner(ref, user_id) else None
+
+    def add_workflow_refs(self, workflow_id: str, urls: Iterable[str]):
+        """Pin the indexed assets used by a workflow so eviction skips them"""
+        ref = f"workflow:{workflow_id}"
+        hashes = [h for h in (self.hash_for_url(url) for url in urls if url) if h]
+        if not hashes:
+            return
+
+        pipe = self.redis_client.pipeline()
+        for sha256 in hashes:
+            pipe.sadd(f"{self.REFS_PREFIX}{sha256}", ref)
+            pipe.sadd(f"{self.WORKFLOW_PREFIX}{workflow_id}", sha256)
+            pipe.zadd(self.LAST_USED_KEY, {sha256: time.time()})
+        pipe.execute()
+
+    def release_workflow(self, workflow_id: str):
+        """Drop the references a deleted workflow held"""
+        ref = f"workflow:{workflow_id}"
+        workflow_key = f"{self.WORKFLOW_PREFIX}{workflow_id}"
+        hashes = self.redis_client.smembers(workflow_key)
+
+        pipe = self.redis_client.pipeline()
+        for sha256 in hashes:
+            pipe.srem(f"{self.REFS_PREFIX}{sha256}", ref)
+            pipe.zadd(self.LAST_USED_KEY, {sha256: time.time()})
+        pipe.delete(workflow_key)
+        pipe.execute()
+
+    def evict_unused(self, delete_object, max_idle_seconds: Optional[int] = None, prefixes: Optional[Iterable[str]] = None) -> List[str]:
+        """Remove evictable assets with no references that have been idle too long.
+
+        Only objects whose key starts with one of `prefixes` (default
+        ASSET_EVICT_PREFIXES) are considered. `delete_object(object_key)`
+        removes the stored object; only one caller across all processes runs
+        at a time. Returns the evicted hashes.
+        """
+        if max_idle_seconds is None:
+            max_idle_seconds = setting.ASSET_IDLE_TTL_SECONDS
+        if prefixes is None:
+            prefixes = setting.ASSET_EVICT_PREFIXES.split(",")
+        prefixes = tuple(prefix.strip() for prefix in prefixes if prefix.strip())
+        if not prefixes:
+            return []
+
+        if not self.redis_client.set(self.EVICT_LOCK_KEY, "1", nx=True, ex=setting.ASSET_EVICT_INTERVAL):
+            return []
+
+        evicted = []
+        cutoff = time.time() - max_idle_seconds
+        for sha256 in self.redis_client.zrangebyscore(self.LAST_USED_KEY, 0, cutoff):
+            if self.redis_client.scard(f"{self.REFS_PREFIX}{sha256}"):
+                continue
+
+            data = self.redis_client.get(f"{self.HASH_PREFIX}{sha256}")
+            if data:
+                asset = json.loads(data)
+                if not asset["object_key"].startswith(prefixes):
+                    continue
+                try:
+                    delete_object(asset["object_key"])
+                except Exception as e:
+                    logger.warning(f"Failed to delete asset {asset['object_key']} - {e}")
+                    continue
+                self.redis_client.delete(f"{self.URL_PREFIX}{asset['url']}")
+
+            pipe = self.redis_client.pipeline()
+            pipe.delete(f"{self.HASH_PREFIX}{sha256}", f"{self.OWNERS_PREFIX}{sha256}", f"{self.REFS_PREFIX}{sha256}")
+            pipe.zrem(self.LAST_USED_KEY, sha256)
+            pipe.execute()
+            evicted.append(sha256)
+
+        return evicted
+
+asset_index = AssetIndex()
@@ -0,0 +1,57 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+
+from app.core.Setting import setting
+
+class Executor:
+    """Bounded pools for work that must not run on the event loop.
+
+    `run_io` is for blocking SDK/file calls (TOS uploads, Gemini SDK, disk writes),
+    `run_cpu` for heavy work such as merging videos, which runs in separate processes
+    so it cannot hold the GIL of the API or worker process.
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Executor, cls).__new__(cls)
+            cls._instance._io_pool = None
+            cls._instance._cpu_pool = None
+        return cls._instance
+    
+    @property
+    def io_pool(self) -> ThreadPoolExecutor:
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=setting.IO_THREAD_POOL_SIZE, thread_name_prefix="io")
+        return self._io_pool
+    
+    @property
+    def cpu_pool(self) -> ProcessPoolExecutor:
+        if self._cpu_pool is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._cpu_pool = ProcessPoolExecutor(
+                max_workers=setting.CPU_PROCESS_POOL_SIZE,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._cpu_pool
+    
+    async def run_io(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_pool, partial(func, *args, **kwargs))
+    
+    async def run_cpu(self, func, *args, **kwargs):
+        """Run a picklable module-level function in the process pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.cpu_pool, partial(func, *args, **kwargs))
+    
+    def shutdown(self):
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+            self._io_pool = None
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_pool = None
+
+executor = Executor()
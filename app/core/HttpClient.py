@@ -0,0 +1,68 @@
+import logging
+from typing import Dict
+
+import httpx
+
+from app.core.Setting import setting
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class HttpClientRegistry:
+    """Application-lifetime pooled httpx clients, one per outbound API.
+
+    Clients keep connections alive between calls so status polls and render
+    requests reuse TCP/TLS sessions. They are opened in the FastAPI lifespan
+    (or by the worker) and closed on shutdown; `get()` also creates a client
+    lazily for scripts that never call `startup()`.
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(HttpClientRegistry, cls).__new__(cls)
+            cls._instance.clients: Dict[str, httpx.AsyncClient] = {}
+        return cls._instance
+    
+    def _build(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(
+                setting.HTTP_READ_TIMEOUT,
+                connect=setting.HTTP_CONNECT_TIMEOUT,
+                pool=setting.HTTP_POOL_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=setting.HTTP_MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=setting.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=setting.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the shared client for an outbound API (e.g. "heygen", "creatomate")"""
+        client = self.clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build()
+            self.clients[name] = client
+        return client
+    
+    async def startup(self, *names: str):
+        for name in names:
+            self.get(name)
+        logger.info(f"HTTP clients ready: {list(self.clients.keys())} (http2={HTTP2_AVAILABLE})")
+    
+    async def aclose(self):
+        for name, client in list(self.clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client {name}: {e}")
+        self.clients.clear()
+
+http_clients = HttpClientRegistry()
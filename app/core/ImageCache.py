@@ -0,0 +1,168 @@
+import os
+import time
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, Optional
+
+from PIL import Image
+
+from app.core.Setting import setting
+from app.core.Executor import executor
+from app.core.HttpClient import http_clients
+
+class _CachedImage:
+    __slots__ = ("image", "etag", "size", "validated_at")
+    
+    def __init__(self, image: Image.Image, etag: Optional[str], size: int):
+        self.image = image
+        self.etag = etag
+        self.size = size
+        self.validated_at = time.monotonic()
+
+class ImageCache:
+    """Process-wide cache of decoded source images (avatars, products) by URL.
+    
+    Memory tier: LRU bounded by IMAGE_CACHE_MAX_BYTES of decoded pixels.
+    Disk tier (optional, IMAGE_CACHE_DIR): raw bytes plus ETag, bounded by
+    IMAGE_CACHE_DISK_MAX_BYTES. Entries older than IMAGE_CACHE_REVALIDATE_SECONDS
+    are revalidated with If-None-Match. Concurrent fetches of one URL share a
+    single download and are counted as `coalesced`, not as hits. Returned
+    images are shared, callers must not modify them.
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ImageCache, cls).__new__(cls)
+            cls._instance.entries: "OrderedDict[str, _CachedImage]" = OrderedDict()
+            cls._instance.total_bytes = 0
+            cls._instance.inflight: Dict[str, asyncio.Future] = {}
+            cls._instance.metrics = {"hits": 0, "misses": 0, "coalesced": 0, "disk_hits": 0, "revalidated": 0, "evictions": 0}
+        return cls._instance
+    
+    async def get(self, url: str) -> Image.Image:
+        entry = self.entries.get(url)
+        if entry and time.monotonic() - entry.validated_at < setting.IMAGE_CACHE_REVALIDATE_SECONDS:
+            self.entries.move_to_end(url)
+            self.metrics["hits"] += 1
+            return entry.image
+        
+        future = self.inflight.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(url, entry))
+            self.inflight[url] = future
+            future.add_done_callback(lambda _: self.inflight.pop(url, None))
+        else:
+            self.metrics["coalesced"] += 1
+        return await asyncio.shield(future)
+    
+    def stats(self) -> Dict[str, int]:
+        return {**self.metrics, "entries": len(self.entries), "bytes": self.total_bytes}
+    
+    async def _fetch(self, url: str, entry: Optional[_CachedImage]) -> Image.Image:
+        etag = entry.etag if entry else None
+        disk_data = None
+        if entry is None and setting.IMAGE_CACHE_DIR:
+            disk_data, etag = await executor.run_io(self._read_disk, url)
+        
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await http_clients.get("assets").get(url, headers=headers, timeout=30, follow_redirects=True)
+        
+        if response.status_code == 304 and (entry or disk_data):
+            if entry:
+                entry.validated_at = time.monotonic()
+                self.entries.move_to_end(url)
+                self.metrics["revalidated"] += 1
+                return entry.image
+            image = await executor.run_io(self._decode, disk_data)
+            self.metrics["disk_hits"] += 1
+            self._store(url, image, etag)
+            return image
+        
+        response.raise_for_status()
+        if not response.content:
+            raise Exception(f"Response kosong dari URL: {url}")
+        content_type = response.headers.get("content-type", "")
+        if not content_type.startswith("image/"):
+            raise Exception(f"URL returned non-image content: {content_type}")
+        
+        self.metrics["misses"] += 1
+        etag = response.headers.get("etag")
+        image = await executor.run_io(self._decode, response.content)
+        self._store(url, image, etag)
+        if setting.IMAGE_CACHE_DIR and etag:
+            await executor.run_io(self._write_disk, url, response.content, etag)
+        return image
+    
+    @staticmethod
+    def _decode(data: bytes) -> Image.Image:
+        image = Image.open(BytesIO(data))
+        image.load()
+        return image
+    
+    def _store(self, url: str, image: Image.Image, etag: Optional[str]):
+        old = self.entries.pop(url, None)
+        if old:
+            self.total_bytes -= old.size
+        
+        size = image.width * image.height * len(image.getbands())
+        self.entries[url] = _CachedImage(image, etag, size)
+        self.total_bytes += size
+        
+        while self.total_bytes > setting.IMAGE_CACHE_MAX_BYTES and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+            self.metrics["evictions"] += 1
+    
+    def _disk_path(self, url: str) -> str:
+        return os.path.join(setting.IMAGE_CACHE_DIR, hashlib.sha256(url.encode()).hexdigest())
+    
+    def _read_disk(self, url: str):
+        path = self._disk_path(url)
+        try:
+            with open(f"{path}.json") as f:
+                etag = json.load(f)["etag"]
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data, etag
+        except (OSError, ValueError, KeyError):
+            return None, None
+    
+    def _write_disk(self, url: str, data: bytes, etag: str):
+        os.makedirs(setting.IMAGE_CACHE_DIR, exist_ok=True)
+        path = self._disk_path(url)
+        try:
+            with open(path, "wb") as f:
+                f.write(data)
+            with open(f"{path}.json", "w") as f:
+                json.dump({"url": url, "etag": etag}, f)
+            self._trim_disk()
+        except OSError as e:
+            print(f"⚠️ Gagal menyimpan cache gambar: {e}")
+    
+    def _trim_disk(self):
+        files = []
+        for name in os.listdir(setting.IMAGE_CACHE_DIR):
+            if name.endswith(".json"):
+                continue
+            path = os.path.join(setting.IMAGE_CACHE_DIR, name)
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= setting.IMAGE_CACHE_DISK_MAX_BYTES:
+                break
+            for stale in (path, f"{path}.json"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+            total -= size
+            self.metrics["evictions"] += 1
+
+image_cache = ImageCache()
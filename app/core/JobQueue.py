@@ -0,0 +1,326 @@
+import math
+from typing import List, Optional
+
+from app.core.WorkflowStorage import workflow_storage
+from app.core.Setting import setting
+from app.schemas.JobSchemas import WorkflowJob
+
+# Push a job on its flow and make the flow schedulable. A flow that was idle
+# re-enters at the current virtual time, so it gets no credit for the idle period.
+ENQUEUE_LUA = """
+if ARGV[3] == '1' then
+    redis.call('RPUSH', KEYS[1], ARGV[2])
+else
+    redis.call('LPUSH', KEYS[1], ARGV[2])
+end
+if not redis.call('ZSCORE', KEYS[2], ARGV[1]) then
+    local vclock = tonumber(redis.call('GET', KEYS[4]) or '0')
+    local saved = tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+    redis.call('ZADD', KEYS[2], math.max(vclock, saved), ARGV[1])
+end
+redis.call('LPUSH', KEYS[5], '1')
+redis.call('LTRIM', KEYS[5], 0, 63)
+return 1
+"""
+
+# Weighted fair queuing: serve the flow with the smallest virtual tag whose user
+# is under the running cap, then advance its tag by 1 / weight.
+DEQUEUE_LUA = """
+local max_running = tonumber(ARGV[2])
+local flows = redis.call('ZRANGE', KEYS[1], 0, -1, 'WITHSCORES')
+for i = 1, #flows, 2 do
+    local flow = flows[i]
+    local tag = tonumber(flows[i + 1])
+    local class, user = string.match(flow, '^([^:]+):(.+)$')
+    local running = tonumber(redis.call('HGET', KEYS[4], user) or '0')
+    if max_running <= 0 or running < max_running then
+        local pending = ARGV[1] .. flow
+        local workflow_id = redis.call('LMOVE', pending, KEYS[5], 'RIGHT', 'LEFT')
+        if workflow_id then
+            local weight = tonumber(class == 'bulk' and ARGV[4] or ARGV[3])
+            local next_tag = tag + 1 / weight
+            redis.call('HINCRBY', KEYS[4], user, 1)
+            redis.call('HSET', KEYS[6], workflow_id, user)
+            redis.call('SET', KEYS[3], tag)
+            if redis.call('LLEN', pending) > 0 then
+                redis.call('ZADD', KEYS[1], next_tag, flow)
+            else
+                redis.call('ZREM', KEYS[1], flow)
+                redis.call('HSET', KEYS[2], flow, next_tag)
+            end
+            return workflow_id
+        end
+        redis.call('ZREM', KEYS[1], flow)
+    end
+end
+return false
+"""
+
+# Remove a claimed job from a worker and give its user's running slot back
+RELEASE_LUA = """
+local removed = redis.call('LREM', KEYS[1], 0, ARGV[1])
+local user = redis.call('HGET', KEYS[3], ARGV[1])
+if user then
+    redis.call('HDEL', KEYS[3], ARGV[1])
+    if redis.call('HINCRBY', KEYS[2], user, -1) <= 0 then
+        redis.call('HDEL', KEYS[2], user)
+    end
+end
+return removed
+"""
+
+# Release a claimed job and put it back at the head of its flow in one step. Only
+# the caller that actually removed it pushes it, so concurrent recoveries of the
+# same dead worker cannot queue a job twice.
+REQUEUE_LUA = """
+local removed = redis.call('LREM', KEYS[1], 0, ARGV[1])
+if removed == 0 then
+    return 0
+end
+local user = redis.call('HGET', KEYS[3], ARGV[1])
+if user then
+    redis.call('HDEL', KEYS[3], ARGV[1])
+    if redis.call('HINCRBY', KEYS[2], user, -1) <= 0 then
+        redis.call('HDEL', KEYS[2], user)
+    end
+end
+redis.call('RPUSH', KEYS[4], ARGV[1])
+if not redis.call('ZSCORE', KEYS[5], ARGV[2]) then
+    local vclock = tonumber(redis.call('GET', KEYS[7]) or '0')
+    local saved = tonumber(redis.call('HGET', KEYS[6], ARGV[2]) or '0')
+    redis.call('ZADD', KEYS[5], math.max(vclock, saved), ARGV[2])
+end
+redis.call('LPUSH', KEYS[8], '1')
+redis.call('LTRIM', KEYS[8], 0, 63)
+return removed
+"""
+
+class JobQueue:
+    """Redis-backed fair-share workflow job queue.
+
+    Every (priority class, user) pair is a flow with its own pending list.
+    Workers pick the next job by weighted fair queuing across flows, so one
+    user with a large batch cannot starve the others: interactive jobs weigh
+    SCHEDULER_INTERACTIVE_WEIGHT, bulk (batch) jobs SCHEDULER_BULK_WEIGHT, and
+    no user runs more than SCHEDULER_MAX_RUNNING_PER_USER jobs at once.
+    Selection runs as a single Lua script, so concurrent workers never pick
+    the same job. Claimed jobs sit on a per-worker processing list, so a job
+    owned by a worker that died can be pushed back by any other worker.
+    """
+    _instance = None
+
+    LEGACY_PENDING_KEY = "workflow_jobs:pending"  # single FIFO list used before fair-share scheduling
+    PENDING_PREFIX = "workflow_jobs:pending:"
+    FLOWS_KEY = "workflow_jobs:flows"
+    FLOW_TAGS_KEY = "workflow_jobs:flow_tags"
+    VCLOCK_KEY = "workflow_jobs:vclock"
+    RUNNING_USERS_KEY = "workflow_jobs:running_users"
+    RUNNING_JOBS_KEY = "workflow_jobs:running_jobs"
+    WAKEUP_KEY = "workflow_jobs:wakeup"
+    PROCESSING_PREFIX = "workflow_jobs:processing:"
+    HEARTBEAT_PREFIX = "workflow_workers:"
+    CANCEL_PREFIX = "workflow_cancel:"
+    CANCEL_CHANNEL = "workflow_jobs:cancel"
+    JOB_TTL = 7 * 86400  # 7 days
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(JobQueue, cls).__new__(cls)
+            cls._instance.redis_client = workflow_storage.redis_client
+            cls._instance._scripts = {}
+        return cls._instance
+
+    def _job_key(self, workflow_id: str) -> str:
+        return f"workflow_job:{workflow_id}"
+
+    def _script(self, name: str, source: str):
+        key = (name, id(self.redis_client))
+        if key not in self._scripts:
+            self._scripts[key] = self.redis_client.register_script(source)
+        return self._scripts[key]
+
+    @staticmethod
+    def _flow(job: WorkflowJob) -> str:
+        return f"{job.priority}:{job.user_id if job.user_id is not None else 'anonymous'}"
+
+    @staticmethod
+    def _weight(flow: str) -> float:
+        if flow.startswith("bulk:"):
+            return setting.SCHEDULER_BULK_WEIGHT
+        return setting.SCHEDULER_INTERACTIVE_WEIGHT
+
+    def _push(self, job: WorkflowJob, front: bool = False, client=None):
+        flow = self._flow(job)
+        self._script("enqueue", ENQUEUE_LUA)(
+            keys=[f"{self.PENDING_PREFIX}{flow}", self.FLOWS_KEY, self.FLOW_TAGS_KEY, self.VCLOCK_KEY, self.WAKEUP_KEY],
+            args=[flow, job.workflow_id, "1" if front else "0"],
+            client=client
+        )
+
+    def enqueue(self, job: WorkflowJob):
+        """Store the job spec and push it on its flow's pending list"""
+        pipe = self.redis_client.pipeline()
+        pipe.set(self._job_key(job.workflow_id), job.model_dump_json(), ex=self.JOB_TTL)
+        pipe.delete(f"{self.CANCEL_PREFIX}{job.workflow_id}")
+        pipe.execute()
+        self._push(job)
+
+    def enqueue_many(self, jobs: List[WorkflowJob]):
+        """Enqueue several jobs in one round trip, in list order"""
+        pipe = self.redis_client.pipeline()
+        for job in jobs:
+            pipe.set(self._job_key(job.workflow_id), job.model_dump_json(), ex=self.JOB_TTL)
+            self._push(job, client=pipe)
+        pipe.execute()
+
+    def get_job(self, workflow_id: str) -> Optional[WorkflowJob]:
+        data = self.redis_client.get(self._job_key(workflow_id))
+        return WorkflowJob.model_validate_json(data) if data else None
+
+    def _select(self, worker_id: str) -> Optional[str]:
+        return self._script("dequeue", DEQUEUE_LUA)(
+            keys=[
+                self.FLOWS_KEY, self.FLOW_TAGS_KEY, self.VCLOCK_KEY,
+                self.RUNNING_USERS_KEY, f"{self.PROCESSING_PREFIX}{worker_id}", self.RUNNING_JOBS_KEY
+            ],
+            args=[
+                self.PENDING_PREFIX, setting.SCHEDULER_MAX_RUNNING_PER_USER,
+                setting.SCHEDULER_INTERACTIVE_WEIGHT, setting.SCHEDULER_BULK_WEIGHT
+            ]
+        )
+
+    def dequeue(self, worker_id: str, timeout: int = 5) -> Optional[WorkflowJob]:
+        """Wait up to `timeout` seconds for the next fair-share job and claim it for `worker_id`"""
+        workflow_id = self._select(worker_id)
+        remaining = timeout
+        while not workflow_id and remaining > 0:
+            # Woken by new jobs; the poll interval also catches running slots freed by other workers
+            self.redis_client.blpop(self.WAKEUP_KEY, timeout=1)
+            remaining -= 1
+            workflow_id = self._select(worker_id)
+        if not workflow_id:
+            return None
+
+        job = self.get_job(workflow_id)
+        if job is None:
+            # Spec expired or was deleted, nothing left to run
+            self.ack(worker_id, workflow_id)
+            return None
+
+        job.attempts += 1
+        self.redis_client.set(self._job_key(workflow_id), job.model_dump_json(), ex=self.JOB_TTL)
+        return job
+
+    def _release(self, worker_id: str, workflow_id: str) -> int:
+        return self._script("release", RELEASE_LUA)(
+            keys=[f"{self.PROCESSING_PREFIX}{worker_id}", self.RUNNING_USERS_KEY, self.RUNNING_JOBS_KEY],
+            args=[workflow_id]
+        )
+
+    def ack(self, worker_id: str, workflow_id: str):
+        """Mark a claimed job as finished"""
+        self._release(worker_id, workflow_id)
+
+    def requeue(self, worker_id: str, workflow_id: str) -> bool:
+        """Give a claimed job back so it is the next one picked from its flow
+
+        Returns False when `worker_id` no longer held the job, e.g. because
+        another worker already recovered it.
+        """
+        job = self.get_job(workflow_id)
+        if job is None:
+            # Spec expired, nothing to run again
+            return self._release(worker_id, workflow_id) > 0
+        flow = self._flow(job)
+        removed = self._script("requeue", REQUEUE_LUA)(
+            keys=[
+                f"{self.PROCESSING_PREFIX}{worker_id}", self.RUNNING_USERS_KEY, self.RUNNING_JOBS_KEY,
+                f"{self.PENDING_PREFIX}{flow}", self.FLOWS_KEY, self.FLOW_TAGS_KEY, self.VCLOCK_KEY, self.WAKEUP_KEY
+            ],
+            args=[workflow_id, flow]
+        )
+        return removed > 0
+
+    def cancel(self, workflow_id: str) -> bool:
+        """Flag a job as cancelled and tell the worker running it
+
+        Returns True when the job was still pending and has been taken off its
+        flow; otherwise it is running (or finished) and its worker stops it.
+        """
+        pipe = self.redis_client.pipeline()
+        pipe.set(f"{self.CANCEL_PREFIX}{workflow_id}", "1", ex=self.JOB_TTL)
+        pipe.publish(self.CANCEL_CHANNEL, workflow_id)
+        pipe.execute()
+        job = self.get_job(workflow_id)
+        if job is None:
+            return False
+        return self.redis_client.lrem(f"{self.PENDING_PREFIX}{self._flow(job)}", 0, workflow_id) > 0
+
+    def is_cancelled(self, workflow_id: str) -> bool:
+        return bool(self.redis_client.exists(f"{self.CANCEL_PREFIX}{workflow_id}"))
+
+    def heartbeat(self, worker_id: str, ttl: int):
+        self.redis_client.set(f"{self.HEARTBEAT_PREFIX}{worker_id}", "alive", ex=ttl)
+
+    def remove_heartbeat(self, worker_id: str):
+        self.redis_client.delete(f"{self.HEARTBEAT_PREFIX}{worker_id}")
+
+    def recover_orphaned_jobs(self) -> int:
+        """Move jobs claimed by workers without a live heartbeat back to their flows"""
+        recovered = 0
+        for key in self.redis_client.scan_iter(match=f"{self.PROCESSING_PREFIX}*"):
+            worker_id = key[len(self.PROCESSING_PREFIX):]
+            if self.redis_client.exists(f"{self.HEARTBEAT_PREFIX}{worker_id}"):
+                continue
+            for workflow_id in self.redis_client.lrange(key, 0, -1):
+                if self.requeue(worker_id, workflow_id):
+                    recovered += 1
+
+        while True:
+            workflow_id = self.redis_client.rpop(self.LEGACY_PENDING_KEY)
+            if not workflow_id:
+                break
+            job = self.get_job(workflow_id)
+            if job:
+                self._push(job)
+                recovered += 1
+        return recovered
+
+    def pending_count(self) -> int:
+        flows = self.redis_client.zrange(self.FLOWS_KEY, 0, -1)
+        if not flows:
+            return 0
+        pipe = self.redis_client.pipeline()
+        for flow in flows:
+            pipe.llen(f"{self.PENDING_PREFIX}{flow}")
+        return sum(pipe.execute())
+
+    def queue_position(self, workflow_id: str) -> Optional[int]:
+        """Estimated 1-based position among all pending jobs, None if not pending.
+
+        Follows the fair-share order: jobs ahead in the same flow, plus the jobs
+        other flows get served before this one at their weights. Running caps
+        are not accounted for, so the estimate can be optimistic.
+        """
+        job = self.get_job(workflow_id)
+        if job is None:
+            return None
+        flow = self._flow(job)
+        pending = self.redis_client.lrange(f"{self.PENDING_PREFIX}{flow}", 0, -1)
+        if workflow_id not in pending:
+            return None
+        tag = self.redis_client.zscore(self.FLOWS_KEY, flow) or 0
+
+        # The list is pushed on the left and served from the right
+        ahead = len(pending) - 1 - pending.index(workflow_id)
+        served_at = tag + ahead / self._weight(flow)
+
+        position = ahead + 1
+        for other, other_tag in self.redis_client.zrange(self.FLOWS_KEY, 0, -1, withscores=True):
+            if other == flow or other_tag > served_at:
+                continue
+            before = math.floor((served_at - other_tag) * self._weight(other)) + 1
+            position += min(before, self.redis_client.llen(f"{self.PENDING_PREFIX}{other}"))
+        return position
+
+job_queue = JobQueue()
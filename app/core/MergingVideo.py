@@ -1,43 +1,125 @@
 import requests
 import tempfile
+import subprocess
+import shutil
+import json
 import os
 
 from datetime import datetime
 from moviepy import VideoFileClip, concatenate_videoclips
 
 from app.core.TosStorage import TosStorage
+from app.core.Setting import setting
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+# Stream parameters that must match for ffmpeg's concat demuxer to copy without re-encoding
+PROBE_FIELDS = "codec_type,codec_name,profile,width,height,pix_fmt,r_frame_rate,time_base,sample_rate,channels"
+
+def _ffmpeg_binary():
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
 
 class MergingVideo:
     def __init__(self):
         self.tos_storage = TosStorage()
+        self.ffmpeg = _ffmpeg_binary()
+        self.ffprobe = shutil.which("ffprobe")
     
     def download_temp(self, url):
-        """Unduh video dari URL ke file sementara."""
-        response = requests.get(url)
-        response.raise_for_status()
-        temp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-        temp.write(response.content)
-        temp.close()
-        return temp.name
+        """Unduh video dari URL ke file sementara secara streaming (tanpa menampung seluruh isi di memori)."""
+        with requests.get(url, stream=True, timeout=(10, 120)) as response:
+            response.raise_for_status()
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp:
+                try:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        temp.write(chunk)
+                except Exception:
+                    # Unduhan terputus: hapus file parsial agar tidak menumpuk di /tmp
+                    temp.close()
+                    os.remove(temp.name)
+                    raise
+                return temp.name
+    
+    def probe(self, path):
+        """Ambil parameter codec tiap stream, None jika ffprobe tidak tersedia/gagal."""
+        if not self.ffprobe:
+            return None
+        try:
+            result = subprocess.run(
+                [self.ffprobe, "-v", "error", "-show_entries", f"stream={PROBE_FIELDS}", "-of", "json", path],
+                capture_output=True, text=True, check=True
+            )
+            streams = json.loads(result.stdout).get("streams", [])
+            return [tuple(sorted(stream.items())) for stream in streams]
+        except Exception as e:
+            print(f"⚠️ ffprobe gagal untuk {path}: {e}")
+            return None
+    
+    def can_stream_copy(self, paths):
+        if setting.MERGE_MODE != "auto" or not self.ffmpeg:
+            return False
+        probes = [self.probe(path) for path in paths]
+        return probes[0] is not None and all(probe == probes[0] for probe in probes)
+    
+    def concat_copy(self, paths, output_path):
+        """Gabungkan dengan concat demuxer ffmpeg (stream copy, tanpa re-encode)."""
+        with tempfile.NamedTemporaryFile("w", delete=False, suffix=".txt") as list_file:
+            for path in paths:
+                list_file.write(f"file '{path}'\n")
+        try:
+            subprocess.run(
+                [self.ffmpeg, "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_file.name,
+                 "-c", "copy", "-movflags", "+faststart", output_path],
+                capture_output=True, text=True, check=True
+            )
+        finally:
+            os.remove(list_file.name)
+    
+    def concat_reencode(self, paths, output_path):
+        clips = []
+        try:
+            for path in paths:
+                clips.append(VideoFileClip(path))
+            final_clip = concatenate_videoclips(clips)
+            final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac")
+        finally:
+            for clip in clips:
+                clip.close()
     
     def video_merging(self, url_list):
         temp_files = []
-        clips = []
+        output_path = None
 
         try:
             for url in url_list:
                 print(f"⬇️ Mengunduh: {url}")
-                temp_path = self.download_temp(url)
-                temp_files.append(temp_path)
-                clips.append(VideoFileClip(temp_path))
-
-            print("🎬 Menggabungkan video...")
-            final_clip = concatenate_videoclips(clips)
+                temp_files.append(self.download_temp(url))
 
+            # Unique per merge; merges run in parallel across processes and workers
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = f"gabungan_{timestamp}.mp4"
+            output_fd, output_path = tempfile.mkstemp(prefix=f"gabungan_{timestamp}_", suffix=".mp4")
+            os.close(output_fd)
 
-            final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac")
+            merged = False
+            if self.can_stream_copy(temp_files):
+                print("🎬 Menggabungkan video (stream copy)...")
+                try:
+                    self.concat_copy(temp_files, output_path)
+                    merged = True
+                except subprocess.CalledProcessError as e:
+                    print(f"⚠️ Stream copy gagal, fallback ke re-encode: {e.stderr}")
+            
+            if not merged:
+                print("🎬 Menggabungkan video (re-encode)...")
+                self.concat_reencode(temp_files, output_path)
+            
             print(f"✅ Video gabungan tersimpan di: {output_path}")
             
             tos_url = self.tos_storage.upload_to_tos_storage(output_path, prefix="generated_videos")
@@ -46,10 +128,12 @@ class MergingVideo:
             return tos_url
 
         finally:
-            for clip in clips:
-                clip.close()
-            for path in temp_files:
+            for path in temp_files + ([output_path] if output_path else []):
                 try:
                     os.remove(path)
                 except Exception as e:
-                    print(f"⚠️ Gagal menghapus file sementara {path}: {e}")
\ No newline at end of file
+                    print(f"⚠️ Gagal menghapus file sementara {path}: {e}")
+
+def merge_videos(url_list):
+    """Process-pool entry point for MergingVideo.video_merging"""
+    return MergingVideo().video_merging(url_list)
@@ -0,0 +1,244 @@
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional, Tuple
+
+from app.core.WorkflowStorage import workflow_storage
+from app.core.Setting import setting
+from app.core.Tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# User on whose behalf outbound calls are made; set per request / per job
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+
+# Refill and take one token. Returns 0 when taken, otherwise ms until the next token.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local wait_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait_ms = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return wait_ms
+"""
+
+# Lease a concurrency slot; expired leases (crashed holders) are dropped first.
+SEMAPHORE_LUA = """
+local limit = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now + ttl, ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ttl + 60)
+    return 1
+end
+return 0
+"""
+
+class _ProviderQueue:
+    """Waiters for one provider, grouped per user and served round-robin"""
+    
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.waiters: "OrderedDict[Optional[int], Deque[asyncio.Future]]" = OrderedDict()
+        self.wakeup = asyncio.Event()
+        self.dispatcher: Optional[asyncio.Task] = None
+    
+    def push(self, user_id: Optional[int], future: asyncio.Future):
+        self.waiters.setdefault(user_id, deque()).append(future)
+        self.wakeup.set()
+    
+    def next_waiter(self) -> Optional[Tuple[Optional[int], asyncio.Future]]:
+        """Head of the next user's queue; that user moves to the back of the rotation"""
+        while self.waiters:
+            user_id, queue = next(iter(self.waiters.items()))
+            while queue and queue[0].done():
+                queue.popleft()
+            if not queue:
+                del self.waiters[user_id]
+                continue
+            self.waiters.move_to_end(user_id)
+            return user_id, queue.popleft()
+        return None
+
+class RateLimiter:
+    """Redis-backed request rate and concurrency budget per third-party API.
+    
+    Each provider has a token bucket ({PROVIDER}_RATE_PER_MINUTE) and a
+    leased concurrency limit ({PROVIDER}_MAX_CONCURRENCY), shared by every
+    API and worker process. Leases are renewed while the call runs and
+    expire within LEASE_TTL seconds of a crashed holder.
+    
+    Fairness between users is per process only: each process grants its own
+    queued calls one user at a time in rotation, so a user with many
+    workflows cannot starve the others in that process, but processes
+    compete for the shared budget first come, first served. A limit of 0
+    disables that check.
+    """
+    _instance = None
+    
+    PROVIDERS = ("heygen", "gemini_text", "gemini_image", "creatomate", "tos")
+    KEY_PREFIX = "ratelimit:"
+    LEASE_TTL = 60
+    MAX_POLL_DELAY = 1.0
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(RateLimiter, cls).__new__(cls)
+            cls._instance.redis_client = workflow_storage.async_redis_client
+            cls._instance.queues: Dict[str, _ProviderQueue] = {}
+            cls._instance._scripts = {}
+        return cls._instance
+    
+    def _limits(self, provider: str) -> Tuple[float, int]:
+        prefix = provider.upper()
+        return (
+            float(getattr(setting, f"{prefix}_RATE_PER_MINUTE", 0)),
+            int(getattr(setting, f"{prefix}_MAX_CONCURRENCY", 0))
+        )
+    
+    def _script(self, name: str, source: str):
+        # Registered per client so tests or reconnects swapping the client keep working
+        key = (name, id(self.redis_client))
+        if key not in self._scripts:
+            self._scripts[key] = self.redis_client.register_script(source)
+        return self._scripts[key]
+    
+    @asynccontextmanager
+    async def limit(self, provider: str):
+        """Hold one request token and one concurrency slot for `provider`
+        
+        The call is traced as an `external.{provider}` span; `queue_ms` is the
+        time spent waiting for the budget.
+        """
+        with tracer.span(f"external.{provider}", provider=provider) as span:
+            rate_per_minute, max_concurrency = self._limits(provider)
+            if rate_per_minute <= 0 and max_concurrency <= 0:
+                yield
+                return
+            
+            future = asyncio.get_running_loop().create_future()
+            queue = self.queues.get(provider)
+            # Waiters and their dispatcher belong to one event loop (e.g. a script calling asyncio.run twice)
+            if queue is None or queue.loop is not asyncio.get_running_loop():
+                queue = self.queues[provider] = _ProviderQueue()
+            if queue.dispatcher is None or queue.dispatcher.done():
+                with tracer.detached():
+                    queue.dispatcher = asyncio.create_task(self._dispatch(provider, queue))
+            
+            queued_at = time.perf_counter()
+            queue.push(current_user_id.get(), future)
+            try:
+                acquired_lease = await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    await self._release(provider, future.result())
+                raise
+            span.set_attribute("queue_ms", round((time.perf_counter() - queued_at) * 1000, 3))
+            
+            # Long calls (multipart uploads, streamed generations) outlive a single lease
+            renewal = asyncio.create_task(self._renew(provider, acquired_lease)) if acquired_lease and max_concurrency > 0 else None
+            try:
+                yield
+            finally:
+                if renewal:
+                    renewal.cancel()
+                await self._release(provider, acquired_lease)
+                queue.wakeup.set()
+    
+    async def _dispatch(self, provider: str, queue: _ProviderQueue):
+        """Grant waiters in user rotation whenever both a token and a slot are free"""
+        while True:
+            waiter = queue.next_waiter()
+            if waiter is None:
+                queue.wakeup.clear()
+                await queue.wakeup.wait()
+                continue
+            
+            user_id, future = waiter
+            try:
+                lease_id, delay = await self._try_acquire(provider)
+            except Exception as e:
+                # Redis unavailable: do not block provider calls on the limiter
+                logger.warning(f"Rate limiter {provider} unavailable, letting call through - {e}")
+                lease_id, delay = "", 0
+            
+            if lease_id is not None:
+                if future.done():
+                    await self._release(provider, lease_id)
+                else:
+                    future.set_result(lease_id)
+                continue
+            
+            # Not granted: put the waiter back at the head of its user's queue and
+            # that user back at the front of the rotation, so it is still next in turn
+            queue.waiters.setdefault(user_id, deque()).appendleft(future)
+            queue.waiters.move_to_end(user_id, last=False)
+            queue.wakeup.clear()
+            try:
+                await asyncio.wait_for(queue.wakeup.wait(), timeout=min(delay, self.MAX_POLL_DELAY))
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _try_acquire(self, provider: str) -> Tuple[Optional[str], float]:
+        """Returns (lease_id, 0) when granted, otherwise (None, seconds to wait)"""
+        rate_per_minute, max_concurrency = self._limits(provider)
+        now = time.time()
+        lease_id = uuid.uuid4().hex
+        
+        if max_concurrency > 0:
+            granted = await self._script("semaphore", SEMAPHORE_LUA)(
+                keys=[f"{self.KEY_PREFIX}{provider}:slots"],
+                args=[max_concurrency, now, self.LEASE_TTL, lease_id]
+            )
+            if not granted:
+                return None, self.MAX_POLL_DELAY
+        
+        if rate_per_minute > 0:
+            rate = rate_per_minute / 60.0
+            capacity = max(1.0, rate * setting.RATE_LIMIT_BURST_SECONDS)
+            wait_ms = await self._script("token_bucket", TOKEN_BUCKET_LUA)(
+                keys=[f"{self.KEY_PREFIX}{provider}:bucket"],
+                args=[rate, capacity, now]
+            )
+            if wait_ms:
+                await self._release(provider, lease_id)
+                return None, wait_ms / 1000
+        
+        return lease_id, 0
+    
+    async def _renew(self, provider: str, lease_id: str):
+        """Extend a held slot's lease until cancelled; a lease already dropped is not re-added"""
+        key = f"{self.KEY_PREFIX}{provider}:slots"
+        while True:
+            await asyncio.sleep(self.LEASE_TTL / 3)
+            try:
+                await self.redis_client.zadd(key, {lease_id: time.time() + self.LEASE_TTL}, xx=True)
+                await self.redis_client.expire(key, self.LEASE_TTL + 60)
+            except Exception as e:
+                logger.warning(f"Failed to renew {provider} slot - {e}")
+    
+    async def _release(self, provider: str, lease_id: str):
+        if not lease_id:
+            return
+        try:
+            await self.redis_client.zrem(f"{self.KEY_PREFIX}{provider}:slots", lease_id)
+        except Exception as e:
+            logger.warning(f"Failed to release {provider} slot - {e}")
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,60 @@
+import json
+import logging
+from typing import Dict, Any, Optional
+
+from app.core.Setting import setting
+from app.core.WorkflowStorage import workflow_storage
+
+logger = logging.getLogger(__name__)
+
+class RenderEvents:
+    """Render completion events delivered by provider webhooks.
+
+    Webhook handlers store the final render status and publish it on a Redis
+    channel, so the status poller of any worker process wakes the waiting
+    workflow right away instead of on its next status check.
+    """
+    _instance = None
+    
+    CHANNEL_PREFIX = "render_events:"
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(RenderEvents, cls).__new__(cls)
+            cls._instance.redis_client = workflow_storage.redis_client
+            cls._instance.async_redis_client = workflow_storage.async_redis_client
+            if setting.WEBHOOK_BASE_URL and not setting.WEBHOOK_SECRET:
+                logger.warning("WEBHOOK_BASE_URL is set without WEBHOOK_SECRET; render webhooks are disabled")
+        return cls._instance
+    
+    @property
+    def enabled(self) -> bool:
+        # Without a secret anyone could post a fake render status
+        return bool(setting.WEBHOOK_BASE_URL and setting.WEBHOOK_SECRET)
+    
+    def callback_url(self, provider: str) -> Optional[str]:
+        """Webhook URL to register with a provider render, None when webhooks are disabled"""
+        if not self.enabled:
+            return None
+        return f"{setting.WEBHOOK_BASE_URL.rstrip('/')}/api/webhooks/{provider}?token={setting.WEBHOOK_SECRET}"
+    
+    def _key(self, provider: str, render_id: str) -> str:
+        return f"render_status:{provider}:{render_id}"
+    
+    def _channel(self, provider: str, render_id: str) -> str:
+        return f"{self.CHANNEL_PREFIX}{provider}:{render_id}"
+    
+    def publish(self, provider: str, render_id: str, status: Dict[str, Any]):
+        """Store a render status received by webhook and wake up its waiters"""
+        payload = json.dumps(status)
+        pipe = self.redis_client.pipeline()
+        pipe.set(self._key(provider, render_id), payload, ex=86400)  # 24 hours TTL
+        pipe.publish(self._channel(provider, render_id), payload)
+        pipe.execute()
+    
+    def get(self, provider: str, render_id: str) -> Optional[Dict[str, Any]]:
+        """Return the status delivered by webhook, if any"""
+        data = self.redis_client.get(self._key(provider, render_id))
+        return json.loads(data) if data else None
+
+render_events = RenderEvents()
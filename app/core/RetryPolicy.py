@@ -0,0 +1,111 @@
+import asyncio
+import random
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+from app.core.Tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def _status_code(error: Exception) -> Optional[int]:
+    # httpx/requests errors carry the response, google.api_core errors the HTTP status as `code`
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None:
+        status = getattr(error, "code", None)
+    return status if isinstance(status, int) else None
+
+def is_transient(error: Exception) -> bool:
+    """Timeouts, dropped connections, HTTP 429 and 5xx; anything else fails the same way again"""
+    if isinstance(error, (TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    status = _status_code(error)
+    return status is not None and (status == 429 or status >= 500)
+
+class RetryPolicy:
+    """Retry an async call with a per-attempt timeout and exponential backoff with full jitter
+    
+    Only errors accepted by `retry_on` (default: is_transient) are retried; others
+    are raised from the attempt that hit them. An attempt that exceeds the timeout
+    is always retried.
+    """
+    
+    def __init__(self, max_attempts: int = 3, attempt_timeout: Optional[float] = None, base_delay: float = 1.0, max_delay: float = 10.0, retry_on: Callable[[Exception], bool] = is_transient):
+        self.max_attempts = max(1, max_attempts)
+        self.attempt_timeout = attempt_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+    
+    def backoff(self, attempt: int) -> float:
+        """Delay before retrying after `attempt` (1-based) failed"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+    
+    async def run(self, func: Callable[[], Awaitable[T]], name: str = "call") -> T:
+        last_error = None
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                with tracer.span("retry.attempt", operation=name, attempt=attempt):
+                    if self.attempt_timeout:
+                        return await asyncio.wait_for(func(), timeout=self.attempt_timeout)
+                    return await func()
+            except asyncio.TimeoutError:
+                last_error = TimeoutError(f"{name} timed out after {self.attempt_timeout}s")
+            except Exception as e:
+                if not self.retry_on(e):
+                    raise
+                last_error = e
+            
+            logger.warning(f"{name} attempt {attempt}/{self.max_attempts} failed: {last_error}")
+            if attempt < self.max_attempts:
+                await asyncio.sleep(self.backoff(attempt))
+        
+        raise last_error
+    
+    async def stream(self, func: Callable[[], AsyncIterator[T]], name: str = "call", restart: Optional[Callable[[int], T]] = None) -> AsyncIterator[T]:
+        """Like run() for a stream: a failed attempt is retried from the start
+        
+        The attempt timeout covers the whole stream. When the failed attempt already
+        yielded items, `restart(next_attempt)` is yielded before the retry so the
+        consumer can drop them; without `restart` such a failure is raised instead.
+        """
+        loop = asyncio.get_running_loop()
+        last_error = None
+        for attempt in range(1, self.max_attempts + 1):
+            yielded = False
+            deadline = loop.time() + self.attempt_timeout if self.attempt_timeout else None
+            iterator = func().__aiter__()
+            try:
+                with tracer.span("retry.attempt", operation=name, attempt=attempt):
+                    while True:
+                        try:
+                            if deadline is None:
+                                item = await iterator.__anext__()
+                            else:
+                                item = await asyncio.wait_for(iterator.__anext__(), timeout=max(0, deadline - loop.time()))
+                        except StopAsyncIteration:
+                            return
+                        yielded = True
+                        yield item
+            except asyncio.TimeoutError:
+                last_error = TimeoutError(f"{name} timed out after {self.attempt_timeout}s")
+            except Exception as e:
+                if not self.retry_on(e):
+                    raise
+                last_error = e
+            finally:
+                aclose = getattr(iterator, "aclose", None)
+                if aclose:
+                    await aclose()
+            
+            logger.warning(f"{name} attempt {attempt}/{self.max_attempts} failed: {last_error}")
+            if attempt == self.max_attempts or (yielded and restart is None):
+                break
+            await asyncio.sleep(self.backoff(attempt))
+            if yielded:
+                yield restart(attempt + 1)
+        
+        raise last_error
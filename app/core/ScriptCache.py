@@ -0,0 +1,124 @@
+import re
+import json
+import math
+import asyncio
+import hashlib
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.WorkflowStorage import workflow_storage
+from app.core.Setting import setting
+from app.schemas.ScriptSchemas import VideoStoryBoard
+
+logger = logging.getLogger(__name__)
+
+class ScriptCache:
+    """Opt-in Redis cache for generated storyboards (SCRIPT_CACHE_ENABLED).
+    
+    Keyed by mode (product/non_product), SCRIPT_PROMPT_VERSION and the
+    normalized inputs. Identical requests in flight share one LLM call inside
+    a process; across processes a Redis lock, held for as long as a generation
+    with all its retries can take, makes the others wait for the first result
+    instead of calling the model again.
+    """
+    _instance = None
+    
+    KEY_PREFIX = "script_cache:"
+    LOCK_TTL_MARGIN = 30
+    UNBOUNDED_ATTEMPT_SECONDS = 300  # assumed attempt length when SCRIPT_ATTEMPT_TIMEOUT is 0
+    POLL_INTERVAL = 0.5
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ScriptCache, cls).__new__(cls)
+            cls._instance.redis_client = workflow_storage.async_redis_client
+            cls._instance.inflight: Dict[str, asyncio.Future] = {}
+        return cls._instance
+    
+    @property
+    def lock_ttl(self) -> int:
+        """Seconds to hold the generation lock: ScriptService's slowest retry sequence plus a margin"""
+        attempts = max(1, setting.SCRIPT_MAX_ATTEMPTS)
+        attempt_seconds = setting.SCRIPT_ATTEMPT_TIMEOUT or self.UNBOUNDED_ATTEMPT_SECONDS
+        return math.ceil(attempts * attempt_seconds + (attempts - 1) * setting.SCRIPT_RETRY_MAX_DELAY) + self.LOCK_TTL_MARGIN
+    
+    @staticmethod
+    def _normalize(value: str) -> str:
+        return re.sub(r"\s+", " ", (value or "").strip()).casefold()
+    
+    def cache_key(self, mode: str, inputs: Dict[str, str], scope: Optional[str] = None) -> str:
+        normalized = {name: self._normalize(value) for name, value in sorted(inputs.items())}
+        digest = hashlib.sha256(json.dumps(normalized, ensure_ascii=False).encode()).hexdigest()
+        prefix = f"{self.KEY_PREFIX}{scope}:" if scope else self.KEY_PREFIX
+        return f"{prefix}{mode}:{setting.SCRIPT_PROMPT_VERSION}:{digest}"
+    
+    async def get(self, key: str):
+        data = await self.redis_client.get(key)
+        return VideoStoryBoard.model_validate_json(data) if data else None
+    
+    async def set(self, key: str, storyboard: VideoStoryBoard):
+        await self.redis_client.set(key, storyboard.model_dump_json(), ex=setting.SCRIPT_CACHE_TTL)
+    
+    async def get_or_generate(self, mode: str, inputs: Dict[str, str], generate: Callable[[], Awaitable[VideoStoryBoard]]) -> VideoStoryBoard:
+        if not setting.SCRIPT_CACHE_ENABLED:
+            return await generate()
+        return await self.share(self.cache_key(mode, inputs), generate)
+    
+    async def share(self, key: str, generate: Callable[[], Awaitable[VideoStoryBoard]]) -> VideoStoryBoard:
+        """Generate the storyboard for `key` once across all processes, even with SCRIPT_CACHE_ENABLED off.
+        
+        Used for batches, whose items share scripts through a batch-scoped key.
+        """
+        future = self.inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key, generate))
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        # Copy so callers editing their storyboard don't affect each other
+        return (await asyncio.shield(future)).model_copy(deep=True)
+    
+    async def _load(self, key: str, generate: Callable[[], Awaitable[VideoStoryBoard]]) -> VideoStoryBoard:
+        lock_key = f"{key}:lock"
+        locked = False
+        try:
+            cached = await self.get(key)
+            if cached:
+                logger.info(f"Script cache hit {key}")
+                return cached
+            
+            lock_ttl = self.lock_ttl
+            locked = await self.redis_client.set(lock_key, "1", nx=True, ex=lock_ttl)
+            if not locked:
+                # Another process is generating the same storyboard
+                for _ in range(int(lock_ttl / self.POLL_INTERVAL)):
+                    await asyncio.sleep(self.POLL_INTERVAL)
+                    cached = await self.get(key)
+                    if cached:
+                        return cached
+                    if not await self.redis_client.exists(lock_key):
+                        break
+        except Exception as e:
+            logger.warning(f"Script cache unavailable, generating directly - {e}")
+        
+        try:
+            storyboard = await generate()
+            await self.store(key, storyboard)
+            return storyboard
+        finally:
+            if locked:
+                await self._release(lock_key)
+    
+    async def store(self, key: str, storyboard: VideoStoryBoard):
+        """Cache a storyboard, logging instead of raising when Redis fails"""
+        try:
+            await self.set(key, storyboard)
+        except Exception as e:
+            logger.warning(f"Failed to cache script {key} - {e}")
+    
+    async def _release(self, lock_key: str):
+        try:
+            await self.redis_client.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"Failed to release script cache lock {lock_key} - {e}")
+
+script_cache = ScriptCache()
@@ -6,6 +6,42 @@ class Setting(BaseSettings):
     GEMINI_API_KEY: str = ""
     TOS_AK_API_KEY: str = ""
     TOS_SK_API_KEY: str = ""
+    TOS_MULTIPART_THRESHOLD: int = 20 * 1024 * 1024
+    TOS_PART_SIZE: int = 8 * 1024 * 1024  # TOS requires >= 5 MB for every part but the last
+    TOS_UPLOAD_PARALLELISM: int = 4
+    
+    ASSET_EVICT_PREFIXES: str = ""  # comma-separated TOS prefixes whose uploads may be evicted; empty evicts nothing
+    ASSET_IDLE_TTL_SECONDS: int = 7 * 86400  # evictable, unreferenced uploads are removed after a week idle
+    ASSET_EVICT_INTERVAL: int = 3600
+    
+    IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # decoded pixels kept in memory
+    IMAGE_CACHE_DIR: str = ""  # empty disables the disk tier
+    IMAGE_CACHE_DISK_MAX_BYTES: int = 1024 * 1024 * 1024
+    IMAGE_CACHE_REVALIDATE_SECONDS: int = 300
+    
+    SCRIPT_CACHE_ENABLED: bool = False
+    SCRIPT_CACHE_TTL: int = 7 * 86400
+    SCRIPT_PROMPT_VERSION: str = "2"  # bump when the storyboard prompts change
+    
+    SCRIPT_MAX_ATTEMPTS: int = 3
+    SCRIPT_ATTEMPT_TIMEOUT: float = 120.0
+    SCRIPT_RETRY_BASE_DELAY: float = 1.0
+    SCRIPT_RETRY_MAX_DELAY: float = 10.0
+    SCRIPT_HEDGE_AFTER_SECONDS: float = 0  # 0 disables hedging
+    SCRIPT_HEDGE_MODEL: str = "gemini-2.5-flash"
+    
+    # Shared budgets per third-party API across all processes; 0 disables a limit
+    RATE_LIMIT_BURST_SECONDS: float = 5.0  # bucket holds this many seconds of requests
+    HEYGEN_RATE_PER_MINUTE: float = 60
+    HEYGEN_MAX_CONCURRENCY: int = 10
+    GEMINI_TEXT_RATE_PER_MINUTE: float = 60
+    GEMINI_TEXT_MAX_CONCURRENCY: int = 10
+    GEMINI_IMAGE_RATE_PER_MINUTE: float = 30
+    GEMINI_IMAGE_MAX_CONCURRENCY: int = 5
+    CREATOMATE_RATE_PER_MINUTE: float = 120
+    CREATOMATE_MAX_CONCURRENCY: int = 20
+    TOS_RATE_PER_MINUTE: float = 0
+    TOS_MAX_CONCURRENCY: int = 32
     
     DATABASE_URL: str = ""
     REDIS_HOST: str = ""
@@ -13,10 +49,47 @@ class Setting(BaseSettings):
     
     SECRET_KEY: str = ""
     
+    WORKER_CONCURRENCY: int = 4
+    WORKER_HEARTBEAT_TTL: int = 30
+    SCENE_MAX_RETRIES: int = 2  # resubmissions of a scene render the provider reports as failed
+    WORKFLOW_CANCEL_CHECK_INTERVAL: float = 5.0  # how often render waits look for a cancel request
+    BATCH_MAX_ITEMS: int = 200
+    SCHEDULER_MAX_RUNNING_PER_USER: int = 2  # 0 = unlimited
+    SCHEDULER_INTERACTIVE_WEIGHT: float = 4.0
+    SCHEDULER_BULK_WEIGHT: float = 1.0
+    
+    HEYGEN_API_BASE_URL: str = "https://api.heygen.com"
+    CREATOMATE_API_BASE_URL: str = "https://api.creatomate.com"
+    
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_READ_TIMEOUT: float = 60.0
+    HTTP_POOL_TIMEOUT: float = 30.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    
+    IO_THREAD_POOL_SIZE: int = 16
+    CPU_PROCESS_POOL_SIZE: int = 2
+    
+    TRACING_EXPORTERS: str = ""  # comma-separated: "jsonl", "memory"; empty records nothing
+    TRACING_JSONL_PATH: str = "traces.jsonl"
+    TRACING_MEMORY_MAX_SPANS: int = 10000
+    
+    MERGE_MODE: str = "auto"  # "auto": ffmpeg stream copy when codecs match, "reencode": always moviepy
+    
+    WEBHOOK_BASE_URL: str = ""
+    WEBHOOK_SECRET: str = ""
+    STATUS_POLL_MIN_INTERVAL: int = 5
+    STATUS_POLL_MAX_INTERVAL: int = 120
+    STATUS_POLL_FALLBACK_INTERVAL: int = 60
+    STATUS_POLL_MAX_CONCURRENCY: int = 20
+    HEYGEN_EXPECTED_RENDER_SECONDS: int = 240
+    CREATOMATE_EXPECTED_RENDER_SECONDS: int = 60
+    
     model_config = SettingsConfigDict(
         env_file=".env",           
         env_file_encoding="utf-8",
         extra="ignore"
     )
-    
+
 setting = Setting()
\ No newline at end of file
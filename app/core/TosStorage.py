@@ -1,50 +1,182 @@
 import tos
 import os
+import threading
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
+
+from tos.models2 import UploadedPart
 
 from app.core.Setting import setting
+from app.core.Executor import executor
+from app.core.RateLimiter import rate_limiter
 
 class TosStorage:
-    def __init__(self):
-        self.ak = setting.TOS_AK_API_KEY
-        self.sk = setting.TOS_SK_API_KEY
-        self.endpoint = "tos-ap-southeast-3.bytepluses.com"
-    
-    def setup(self):
-        self.client = tos.TosClientV2(
-            ak=self.ak,
-            sk=self.sk,
-            endpoint=self.endpoint,
-            region="ap-southeast-3"
-        )
+    """Process-wide BytePlus TOS access.
+    
+    The SDK client is created on first use and shared by every caller in the
+    process. Files above TOS_MULTIPART_THRESHOLD are sent as multipart uploads
+    with TOS_UPLOAD_PARALLELISM parts in flight.
+    """
+    _instance = None
+    _lock = threading.Lock()
+    
+    BUCKET = "ai-automation"
+    REGION = "ap-southeast-3"
+    ENDPOINT = "tos-ap-southeast-3.bytepluses.com"
+    PUBLIC_BASE_URL = "https://ai-automation.tos-ap-southeast-3.bytepluses.com"
+    
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super(TosStorage, cls).__new__(cls)
+                    instance.ak = setting.TOS_AK_API_KEY
+                    instance.sk = setting.TOS_SK_API_KEY
+                    instance.endpoint = cls.ENDPOINT
+                    instance._client = None
+                    cls._instance = instance
+        return cls._instance
+    
+    @property
+    def client(self) -> tos.TosClientV2:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = tos.TosClientV2(
+                        ak=self.ak,
+                        sk=self.sk,
+                        endpoint=self.endpoint,
+                        region=self.REGION
+                    )
+        return self._client
+    
+    def setup(self) -> tos.TosClientV2:
+        return self.client
+    
+    def public_url(self, object_key: str) -> str:
+        return f"{self.PUBLIC_BASE_URL}/{object_key}"
+    
+    @staticmethod
+    def build_object_key(prefix: str, filename: str) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"{prefix}/{timestamp}_{filename}"
+    
+    @staticmethod
+    def _raise_tos_error(e: Exception, action: str = "Upload"):
+        if isinstance(e, tos.exceptions.TosClientError):
+            raise Exception(f'BytePlus client error: {e.message}, cause: {e.cause}')
+        if isinstance(e, tos.exceptions.TosServerError):
+            raise Exception(f'BytePlus server error: code {e.code}, message: {e.message}')
+        raise Exception(f'{action} failed: {str(e)}')
     
     def upload_to_tos_storage(self, local_file_path: str, prefix: str, object_key = None) -> str:
-        self.setup()
-        
         try:
             if not os.path.exists(local_file_path):
                 raise FileNotFoundError(f"Local file not found: {local_file_path}")
             
             if not object_key:
-                filename = Path(local_file_path).name
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                object_key = f"{prefix}/{timestamp}_{filename}"
+                object_key = self.build_object_key(prefix, Path(local_file_path).name)
+            
+            if os.path.getsize(local_file_path) >= setting.TOS_MULTIPART_THRESHOLD:
+                return self._upload_file_multipart(local_file_path, object_key)
             
             self.client.put_object_from_file(
-                bucket="ai-automation", 
-                key=object_key, 
+                bucket=self.BUCKET,
+                key=object_key,
                 file_path=local_file_path
             )
             
-            public_url = f"https://ai-automation.tos-ap-southeast-3.bytepluses.com/{object_key}"
-            
-            return public_url
+            return self.public_url(object_key)
+        
+        except Exception as e:
+            self._raise_tos_error(e)
+    
+    def upload_bytes(self, data: bytes, object_key: str, content_type: Optional[str] = None) -> str:
+        """Upload an in-memory payload without writing it to disk"""
+        try:
+            if len(data) >= setting.TOS_MULTIPART_THRESHOLD:
+                part_size = setting.TOS_PART_SIZE
+                chunks = [data[i:i + part_size] for i in range(0, len(data), part_size)]
+                return self._upload_parts(object_key, len(chunks), lambda index: chunks[index], content_type)
             
-        except tos.exceptions.TosClientError as e:
-            raise Exception(f'BytePlus client error: {e.message}, cause: {e.cause}')
-        except tos.exceptions.TosServerError as e:
-            raise Exception(f'BytePlus server error: code {e.code}, message: {e.message}')
+            self.client.put_object(
+                bucket=self.BUCKET,
+                key=object_key,
+                content=data,
+                content_type=content_type
+            )
+            return self.public_url(object_key)
+        
+        except Exception as e:
+            self._raise_tos_error(e)
+    
+    def _upload_file_multipart(self, local_file_path: str, object_key: str) -> str:
+        part_size = setting.TOS_PART_SIZE
+        file_size = os.path.getsize(local_file_path)
+        part_count = (file_size + part_size - 1) // part_size
+        
+        def read_part(index: int) -> bytes:
+            with open(local_file_path, "rb") as f:
+                f.seek(index * part_size)
+                return f.read(part_size)
+        
+        return self._upload_parts(object_key, part_count, read_part)
+    
+    def _upload_parts(self, object_key: str, part_count: int, read_part, content_type: Optional[str] = None) -> str:
+        upload_id = self.start_multipart_upload(object_key, content_type)
+        try:
+            # Dedicated pool: this may already run inside the shared I/O pool
+            with ThreadPoolExecutor(max_workers=setting.TOS_UPLOAD_PARALLELISM, thread_name_prefix="tos-part") as pool:
+                futures = [
+                    pool.submit(lambda i: self.upload_part(object_key, upload_id, i + 1, read_part(i)), index)
+                    for index in range(part_count)
+                ]
+                parts = [future.result() for future in futures]
+            return self.complete_multipart_upload(object_key, upload_id, parts)
+        except Exception:
+            self.abort_multipart_upload(object_key, upload_id)
+            raise
+    
+    def start_multipart_upload(self, object_key: str, content_type: Optional[str] = None) -> str:
+        output = self.client.create_multipart_upload(bucket=self.BUCKET, key=object_key, content_type=content_type)
+        return output.upload_id
+    
+    def upload_part(self, object_key: str, upload_id: str, part_number: int, data: bytes) -> UploadedPart:
+        output = self.client.upload_part(
+            bucket=self.BUCKET,
+            key=object_key,
+            upload_id=upload_id,
+            part_number=part_number,
+            content=data
+        )
+        return UploadedPart(part_number, output.etag)
+    
+    def complete_multipart_upload(self, object_key: str, upload_id: str, parts: List[UploadedPart]) -> str:
+        self.client.complete_multipart_upload(bucket=self.BUCKET, key=object_key, upload_id=upload_id, parts=parts)
+        return self.public_url(object_key)
+    
+    def abort_multipart_upload(self, object_key: str, upload_id: str):
+        try:
+            self.client.abort_multipart_upload(bucket=self.BUCKET, key=object_key, upload_id=upload_id)
+        except Exception as e:
+            print(f"⚠️ Gagal membatalkan multipart upload {object_key}: {e}")
+    
+    def delete_object(self, object_key: str):
+        try:
+            self.client.delete_object(bucket=self.BUCKET, key=object_key)
         except Exception as e:
-            raise Exception(f'Upload failed: {str(e)}')
\ No newline at end of file
+            self._raise_tos_error(e, "Delete")
+    
+    async def upload_to_tos_storage_async(self, local_file_path: str, prefix: str, object_key = None) -> str:
+        """Upload from async code without blocking the event loop"""
+        async with rate_limiter.limit("tos"):
+            return await executor.run_io(self.upload_to_tos_storage, local_file_path, prefix, object_key)
+    
+    async def upload_bytes_async(self, data: bytes, object_key: str, content_type: Optional[str] = None) -> str:
+        async with rate_limiter.limit("tos"):
+            return await executor.run_io(self.upload_bytes, data, object_key, content_type)
+
+tos_storage = TosStorage()
@@ -0,0 +1,251 @@
+import json
+import time
+import uuid
+import queue
+import logging
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.Setting import setting
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+class Span:
+    """One timed operation; nested spans share the trace id of their root"""
+    
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def end(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+class JsonLinesExporter:
+    """Append finished spans to a file, one JSON object per line
+    
+    export() only queues the span; a background thread serializes and writes
+    them in batches, so spans ending on the event loop never wait on disk.
+    When MAX_PENDING spans are queued, new ones are dropped and counted.
+    """
+    MAX_PENDING = 10000
+    BATCH_SIZE = 500
+    _STOP = object()
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.MAX_PENDING)
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+    
+    def export(self, span: Span):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._write_loop, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+    
+    def _write_loop(self):
+        file = None
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(item is self._STOP for item in batch)
+                lines = [json.dumps(item, default=str) + "\n" for item in batch if item is not self._STOP]
+                try:
+                    if lines:
+                        if file is None:
+                            file = open(self.path, "a", encoding="utf-8")
+                        file.writelines(lines)
+                        file.flush()
+                except Exception as e:
+                    logger.warning(f"Writing {len(lines)} spans to {self.path} failed - {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            if file:
+                file.close()
+    
+    def flush(self):
+        """Block until every span exported so far is written"""
+        if self._thread is not None:
+            self._queue.join()
+    
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(self._STOP)
+            thread.join()
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} spans while {self.path} writes were behind")
+
+class InMemoryExporter:
+    """Keep the most recent finished spans in memory"""
+    
+    def __init__(self, max_spans: int = 10000):
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+    
+    def export(self, span: Span):
+        self._spans.append(span)
+    
+    def spans(self, name: Optional[str] = None) -> List[Span]:
+        return [span for span in self._spans if name is None or span.name == name]
+    
+    def clear(self):
+        self._spans.clear()
+    
+    def latency_summary(self) -> Dict[str, Dict[str, float]]:
+        """Count and p50/p95/max duration in ms per span name"""
+        durations: Dict[str, List[float]] = {}
+        for span in self._spans:
+            durations.setdefault(span.name, []).append(span.duration_ms)
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            summary[name] = {
+                "count": len(values),
+                "p50_ms": values[int(0.50 * (len(values) - 1))],
+                "p95_ms": values[int(0.95 * (len(values) - 1))],
+                "max_ms": values[-1]
+            }
+        return summary
+
+class Tracer:
+    """Process-wide span tracer for the video pipeline.
+    
+    `span()` times a block and records it under the span active in the current
+    context, so asyncio tasks started inside a span (per-scene pipelines,
+    provider calls) become its children. Finished spans go to the exporters
+    listed in TRACING_EXPORTERS: "jsonl" (TRACING_JSONL_PATH) and/or "memory".
+    With no exporter configured spans are still timed but not recorded.
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Tracer, cls).__new__(cls)
+            cls._instance.exporters = []
+            cls._instance.memory: Optional[InMemoryExporter] = None
+            for name in filter(None, (part.strip().lower() for part in setting.TRACING_EXPORTERS.split(","))):
+                if name == "jsonl":
+                    cls._instance.exporters.append(JsonLinesExporter(setting.TRACING_JSONL_PATH))
+                elif name == "memory":
+                    cls._instance.memory = InMemoryExporter(setting.TRACING_MEMORY_MAX_SPANS)
+                    cls._instance.exporters.append(cls._instance.memory)
+                else:
+                    logger.warning(f"Unknown tracing exporter: {name}")
+        return cls._instance
+    
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+        if isinstance(exporter, InMemoryExporter) and self.memory is None:
+            self.memory = exporter
+    
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+    
+    def set_attribute(self, key: str, value: Any):
+        """Set an attribute on the active span, if any"""
+        span = _current_span.get()
+        if span:
+            span.set_attribute(key, value)
+    
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes):
+        """Time the enclosed block as a child of the active span
+        
+        A root span starts a new trace; pass `trace_id` to group spans under
+        a known id such as the workflow id.
+        """
+        parent = _current_span.get()
+        span = Span(
+            name,
+            trace_id or (parent.trace_id if parent else uuid.uuid4().hex),
+            parent.span_id if parent else None,
+            attributes
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except asyncio.CancelledError:
+            span.status = "cancelled"
+            raise
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Closed from another context (e.g. a generator finalized elsewhere)
+                _current_span.set(parent)
+            span.end()
+            self._export(span)
+    
+    @contextmanager
+    def detached(self):
+        """Run the block outside any span, e.g. to start long-lived background tasks"""
+        token = _current_span.set(None)
+        try:
+            yield
+        finally:
+            _current_span.reset(token)
+    
+    def _export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(f"Span export failed - {e}")
+    
+    def shutdown(self):
+        for exporter in self.exporters:
+            close = getattr(exporter, "close", None)
+            if close:
+                close()
+
+tracer = Tracer()
@@ -1,7 +1,8 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from app.core.Setting import setting
 
 import redis
+import redis.asyncio
 import json
 
 class WorkflowStorage:
@@ -16,16 +17,59 @@ class WorkflowStorage:
                 port=int(setting.REDIS_PORT),
                 decode_responses=True
             )
+            cls._instance.async_redis_client = redis.asyncio.Redis(
+                host=setting.REDIS_HOST,
+                port=int(setting.REDIS_PORT),
+                decode_responses=True
+            )
         return cls._instance
     
     def set(self, workflow_id: str, data: Dict[str, Any]):
-        self.redis_client.set(f"workflow:{workflow_id}", json.dumps(data), ex=86400)  # 24 hours TTL
+        payload = json.dumps(data)
+        pipe = self.redis_client.pipeline()
+        pipe.set(f"workflow:{workflow_id}", payload, ex=86400)  # 24 hours TTL
+        pipe.publish(f"workflow_status:{workflow_id}", payload)
+        pipe.execute()
     
     def get(self, workflow_id: str) -> Dict[str, Any]:
         data = self.redis_client.get(f"workflow:{workflow_id}")
         return json.loads(data) if data else None
     
+    async def aget(self, workflow_id: str) -> Dict[str, Any]:
+        data = await self.async_redis_client.get(f"workflow:{workflow_id}")
+        return json.loads(data) if data else None
+    
+    def get_many(self, workflow_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        if not workflow_ids:
+            return []
+        values = self.redis_client.mget([f"workflow:{workflow_id}" for workflow_id in workflow_ids])
+        return [json.loads(data) if data else None for data in values]
+    
+    def set_batch(self, batch_id: str, data: Dict[str, Any]):
+        self.redis_client.set(f"workflow_batch:{batch_id}", json.dumps(data), ex=7 * 86400)  # 7 days TTL
+    
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        data = self.redis_client.get(f"workflow_batch:{batch_id}")
+        return json.loads(data) if data else None
+    
     def delete(self, workflow_id: str):
         self.redis_client.delete(f"workflow:{workflow_id}")
+    
+    def set_checkpoint(self, workflow_id: str, stage: str, data: Dict[str, Any]):
+        key = f"workflow:{workflow_id}:checkpoints"
+        pipe = self.redis_client.pipeline()
+        pipe.hset(key, stage, json.dumps(data))
+        pipe.expire(key, 86400)  # 24 hours TTL
+        pipe.execute()
+    
+    def get_checkpoints(self, workflow_id: str) -> Dict[str, Any]:
+        data = self.redis_client.hgetall(f"workflow:{workflow_id}:checkpoints")
+        return {stage: json.loads(value) for stage, value in data.items()}
+    
+    def delete_checkpoint(self, workflow_id: str, stage: str):
+        self.redis_client.hdel(f"workflow:{workflow_id}:checkpoints", stage)
+    
+    def delete_checkpoints(self, workflow_id: str):
+        self.redis_client.delete(f"workflow:{workflow_id}:checkpoints")
 
 workflow_storage = WorkflowStorage()
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -8,12 +9,24 @@ from app.api.template_routes import router as template_router
 from app.api.page_routes import router as page_router
 from app.api.upload_routes import router as upload_router
 from app.api.avatar_routes import router as avatar_router
+from app.api.webhook_routes import router as webhook_router
 from app.core.Database import engine, Base
+from app.core.HttpClient import http_clients
+from app.core.Executor import executor
+from app.core.Tracing import tracer
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="AI Video Automation API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_clients.startup("heygen", "creatomate", "assets")
+    yield
+    await http_clients.aclose()
+    executor.shutdown()
+    tracer.shutdown()
+
+app = FastAPI(title="AI Video Automation API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +44,7 @@ app.include_router(history_router)
 app.include_router(template_router)
 app.include_router(upload_router)
 app.include_router(avatar_router)
+app.include_router(webhook_router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,5 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from typing import Optional
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.Database import get_db
@@ -11,8 +12,22 @@ def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
-    token = credentials.credentials
-    payload = decode_token(token)
+    return get_user_from_token(credentials.credentials, db)
+
+def get_stream_user(
+    request: Request,
+    token: Optional[str] = None,
+    db: Session = Depends(get_db)
+) -> User:
+    """Auth for EventSource/WebSocket clients, which cannot set headers: accepts ?token="""
+    if not token:
+        authorization = request.headers.get("Authorization", "")
+        if authorization.lower().startswith("bearer "):
+            token = authorization[7:]
+    return get_user_from_token(token, db)
+
+def get_user_from_token(token: str, db: Session) -> User:
+    payload = decode_token(token) if token else None
     
     if not payload:
         raise HTTPException(
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict
+from app.schemas.ScriptSchemas import VideoStoryBoard, MIN_SCENE_COUNT, MAX_SCENE_COUNT, DEFAULT_SCENE_COUNT
+
+class BatchItem(BaseModel):
+    template_id: Optional[int] = Field(default=None, description="Template whose product fields fill the ones left empty")
+    nama_produk: Optional[str] = Field(default=None, description="Nama produk")
+    target_audiens: Optional[str] = Field(default=None, description="Target audiens")
+    usp: Optional[str] = Field(default=None, description="Unique selling point")
+    cta: Optional[str] = Field(default=None, description="Call to action")
+    talking_photo_id: Optional[str] = Field(default=None, description="Talking photo id")
+    voice_id: Optional[str] = Field(default=None, description="Voice id")
+    scene_count: int = Field(default=DEFAULT_SCENE_COUNT, ge=MIN_SCENE_COUNT, le=MAX_SCENE_COUNT, description="Jumlah scene")
+    product_url: Optional[str] = Field(default=None, description="Uploaded image URL, asset handle or name of a file sent with the batch")
+    avatar_url: Optional[str] = Field(default=None, description="Preset avatar URL, uploaded image URL, asset handle or name of a file sent with the batch")
+    is_non_product: bool = Field(default=False, description="Non-product video mode")
+    script: Optional[VideoStoryBoard] = Field(default=None, description="Edited script; generated by the worker when empty")
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem] = Field(..., min_length=1, description="Workflow specs")
+
+class BatchStartResponse(BaseModel):
+    batch_id: str
+    total: int
+    workflow_ids: List[str]
+    deduplicated: int = Field(default=0, description="Items that were identical to an earlier item and share its workflow")
+
+class BatchItemStatus(BaseModel):
+    workflow_id: str
+    status: str
+    progress: int
+    final_video_url: Optional[str] = None
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    status: str
+    progress: int
+    total: int
+    counts: Dict[str, int]
+    items: List[BatchItemStatus]
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from app.schemas.ScriptSchemas import VideoStoryBoard
+from app.schemas.ScriptSchemas import VideoStoryBoard, MIN_SCENE_COUNT, MAX_SCENE_COUNT, DEFAULT_SCENE_COUNT
 
 class InputPayload(BaseModel):
     nama_produk: str = Field(..., description="Nama produk")
@@ -9,6 +9,7 @@ class InputPayload(BaseModel):
     cta: str = Field(..., description="Call to action")
     talking_photo_id: Optional[str] = Field(default=None, description="Talking photo id")
     voice_id: Optional[str] = Field(default=None, description="Voice id")
+    scene_count: int = Field(default=DEFAULT_SCENE_COUNT, ge=MIN_SCENE_COUNT, le=MAX_SCENE_COUNT, description="Jumlah scene")
     
 class ScriptReturn(BaseModel):
     script: VideoStoryBoard = Field(..., description="Video script")
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from app.schemas.InputSchemas import InputPayload, ScriptReturn
+
+class WorkflowJob(BaseModel):
+    workflow_id: str = Field(..., description="Workflow id")
+    user_id: Optional[int] = Field(default=None, description="Owner user id")
+    request: InputPayload = Field(..., description="Original workflow input")
+    product_url: str = Field(default="", description="Uploaded product image URL")
+    avatar_url: str = Field(..., description="Avatar image URL")
+    is_non_product: bool = Field(default=False, description="Non-product video mode")
+    script: Optional[ScriptReturn] = Field(default=None, description="Script used by the workflow; generated by the worker when empty")
+    script_key: Optional[str] = Field(default=None, description="Jobs with the same key share one generated script")
+    batch_id: Optional[str] = Field(default=None, description="Batch the job belongs to")
+    priority: Literal["interactive", "bulk"] = Field(default="interactive", description="Scheduling class; bulk jobs get a smaller fair share")
+    attempts: int = Field(default=0, description="How many times the job has been picked up")
+    resume: bool = Field(default=False, description="Continue from the last completed stage checkpoint")
@@ -1,6 +1,11 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
+# Storyboards can be produced with this many scenes; every scene renders in parallel
+MIN_SCENE_COUNT = 3
+MAX_SCENE_COUNT = 8
+DEFAULT_SCENE_COUNT = 4
+
 class Script(BaseModel):
     scene: int = Field(description="Saat ini adegan ke-berapa dalam video")
     title_overlay: str = Field(description="Generate title untuk video tiktok tersebut yang sangat menarik, boleh sedikit clickbait atau pakai hook ekstreme. langsung tulis teks yang siap dimasukkan ke videonya, tanpa tanda, Isi field ini khusus untuk adegan 1 saja")
@@ -14,4 +19,4 @@ class VideoStoryBoard(BaseModel):
         default="...",
         description="Skrip video lengkap dalam format narasi"
     )
-    scripts: List[Script] = Field(description="Script video yang terstruktur dalam *4* adegan")
\ No newline at end of file
+    scripts: List[Script] = Field(description="Script video yang terstruktur per adegan, sebanyak jumlah scene yang diminta")
\ No newline at end of file
@@ -10,8 +10,9 @@ class WorkflowStatusResponse(BaseModel):
     message: str
     progress: int
     data: Optional[Dict[str, Any]] = None
+    queue_position: Optional[int] = None
 
 class WorkflowStartResponse(BaseModel):
     workflow_id: str
     message: str
-    script: VideoStoryBoard
\ No newline at end of file
+    script: Optional[VideoStoryBoard] = None
\ No newline at end of file
@@ -1,12 +1,21 @@
 import httpx
 
 from app.core.Setting import setting
+from app.core.HttpClient import http_clients
+from app.core.RateLimiter import rate_limiter
+from app.core.RenderEvents import render_events
 
 class CreatomateGenerator:
     def __init__(self):
-        self.url = "https://api.creatomate.com/v2/renders"
+        self.url = f"{setting.CREATOMATE_API_BASE_URL.rstrip('/')}/v2/renders"
         self.api_key = setting.CREATOMATE_API_KEY
     
+    def _with_webhook(self, payload: dict) -> dict:
+        webhook_url = render_events.callback_url("creatomate")
+        if webhook_url:
+            payload["webhook_url"] = webhook_url
+        return payload
+    
     async def creatomate_render_video_title(self, title: str, video_url: str, image_url: str):
         print(f"\n=== Creatomate Render Title ===")
         print(f"Title: {title}")
@@ -28,12 +37,14 @@ class CreatomateGenerator:
         }
         
         try: 
-            async with httpx.AsyncClient(timeout=None) as client:
-                response = await client.post(self.url, json=payload, headers=headers)
-                
-                result = response.json()
-                print(f"✅ Creatomate render started: {result.get('id')}")
-                return result
+            client = http_clients.get("creatomate")
+            async with rate_limiter.limit("creatomate"):
+                response = await client.post(self.url, json=self._with_webhook(payload), headers=headers)
+            response.raise_for_status()
+            
+            result = response.json()
+            print(f"✅ Creatomate render started: {result.get('id')}")
+            return result
         except Exception as e:
             print(f"❌ Creatomate render title error: {e}")
             raise
@@ -57,12 +68,14 @@ class CreatomateGenerator:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=None) as client:
-                response = await client.post(self.url, json=payload, headers=headers)
-                
-                result = response.json()
-                print(f"✅ Creatomate render started: {result.get('id')}")
-                return result
+            client = http_clients.get("creatomate")
+            async with rate_limiter.limit("creatomate"):
+                response = await client.post(self.url, json=self._with_webhook(payload), headers=headers)
+            response.raise_for_status()
+            
+            result = response.json()
+            print(f"✅ Creatomate render started: {result.get('id')}")
+            return result
         except Exception as e:
             print(f"❌ Creatomate render avatar right error: {e}")
             raise
@@ -86,29 +99,32 @@ class CreatomateGenerator:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=None) as client:
-                response = await client.post(self.url, json=payload, headers=headers)
-                
-                result = response.json()
-                print(f"✅ Creatomate render started: {result.get('id')}")
-                return result
+            client = http_clients.get("creatomate")
+            async with rate_limiter.limit("creatomate"):
+                response = await client.post(self.url, json=self._with_webhook(payload), headers=headers)
+            response.raise_for_status()
+            
+            result = response.json()
+            print(f"✅ Creatomate render started: {result.get('id')}")
+            return result
         except Exception as e:
             print(f"❌ Creatomate render avatar left error: {e}")
             raise
 
     async def get_creatomate_render_status(self, response_id: str):
-        url = f"https://api.creatomate.com/v2/renders/{response_id}"
+        url = f"{self.url}/{response_id}"
 
         headers = {
             "Authorization": f"Bearer {self.api_key}"
         }
 
         try:
-            async with httpx.AsyncClient(timeout=None) as client:
+            client = http_clients.get("creatomate")
+            async with rate_limiter.limit("creatomate"):
                 response = await client.get(url, headers=headers)
-                result = response.json()
-                
-                return result
+            result = response.json()
+            
+            return result
         except httpx.HTTPError as e:
             print(f"❌ HTTP error checking Creatomate status: {e}")
             raise
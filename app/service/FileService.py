@@ -1,15 +1,77 @@
 import os
+import re
+import hashlib
+import uuid
+import tempfile
+import aiofiles
+from pathlib import Path
 from fastapi import UploadFile
 from typing import Optional
 
+from app.core.Setting import setting
+from app.core.Executor import executor
+from app.core.TosStorage import tos_storage
+from app.core.AssetIndex import asset_index
+from app.core.RateLimiter import rate_limiter
+
 class FileService:
+    @staticmethod
+    def unique_filename(filename: Optional[str]) -> str:
+        """Collision-free, path-safe name that keeps the original extension"""
+        name = Path(filename or "upload").name
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", name)
+        return f"{uuid.uuid4().hex}_{name}"
+    
+    @staticmethod
+    async def upload_file(file: UploadFile, prefix: str = "nanobanana", user_id: Optional[int] = None) -> str:
+        """Stream an uploaded file to TOS in TOS_PART_SIZE chunks without touching disk.
+        
+        Bytes already stored (same SHA-256) return the existing URL without uploading.
+        """
+        part_size = setting.TOS_PART_SIZE
+        sha256 = hashlib.sha256()
+        
+        chunk = await file.read(part_size)
+        if len(chunk) < part_size:
+            sha256.update(chunk)
+            digest = sha256.hexdigest()
+            existing_url = asset_index.lookup(digest, user_id)
+            if existing_url:
+                return existing_url
+            
+            extension = re.sub(r"[^A-Za-z0-9.]", "", Path(file.filename or "").suffix.lower())
+            object_key = f"{prefix}/{digest}{extension}"
+            url = await tos_storage.upload_bytes_async(chunk, object_key, file.content_type)
+            return asset_index.register(digest, url, object_key, user_id)
+        
+        # Too large to hash before uploading: hash while streaming, dedupe afterwards
+        object_key = tos_storage.build_object_key(prefix, FileService.unique_filename(file.filename))
+        upload_id = await executor.run_io(tos_storage.start_multipart_upload, object_key, file.content_type)
+        try:
+            parts = []
+            while chunk:
+                sha256.update(chunk)
+                async with rate_limiter.limit("tos"):
+                    part = await executor.run_io(tos_storage.upload_part, object_key, upload_id, len(parts) + 1, chunk)
+                parts.append(part)
+                chunk = await file.read(part_size)
+            url = await executor.run_io(tos_storage.complete_multipart_upload, object_key, upload_id, parts)
+        except Exception:
+            await executor.run_io(tos_storage.abort_multipart_upload, object_key, upload_id)
+            raise
+        
+        canonical_url = asset_index.register(sha256.hexdigest(), url, object_key, user_id)
+        if canonical_url != url:
+            await executor.run_io(tos_storage.delete_object, object_key)
+        return canonical_url
+    
     @staticmethod
     async def save_uploaded_file(file: UploadFile, prefix: str = "temp") -> str:
-        """Save uploaded file temporarily"""
-        file_path = f"{prefix}_{file.filename}"
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        """Save uploaded file temporarily, for callers that need a local path"""
+        file_path = os.path.join(tempfile.gettempdir(), f"{prefix}_{FileService.unique_filename(file.filename)}")
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await file.read(setting.TOS_PART_SIZE):
+                await f.write(chunk)
         return file_path
     
     @staticmethod
@@ -22,12 +84,12 @@ class FileService:
             print(f"Warning: Failed to cleanup temp file {file_path}: {e}")
     
     @staticmethod
-    async def process_uploaded_files(product_image: UploadFile, avatar_image: Optional[UploadFile] = None):
-        """Process and save uploaded files"""
-        product_image_path = await FileService.save_uploaded_file(product_image)
+    async def process_uploaded_files(product_image: UploadFile, avatar_image: Optional[UploadFile] = None, user_id: Optional[int] = None):
+        """Stream uploaded files to storage and return their public URLs"""
+        product_image_url = await FileService.upload_file(product_image, user_id=user_id)
         
-        avatar_image_path = None
+        avatar_image_url = None
         if avatar_image and avatar_image.filename:
-            avatar_image_path = await FileService.save_uploaded_file(avatar_image)
+            avatar_image_url = await FileService.upload_file(avatar_image, user_id=user_id)
         
-        return product_image_path, avatar_image_path
\ No newline at end of file
+        return product_image_url, avatar_image_url
@@ -1,6 +1,12 @@
 import httpx
+import logging
 
 from app.core.Setting import setting
+from app.core.HttpClient import http_clients
+from app.core.RateLimiter import rate_limiter
+from app.core.RenderEvents import render_events
+
+logger = logging.getLogger(__name__)
 
 class HeygenService:
     def __init__(self, talking_photo_id = None, voice_id = None):
@@ -8,6 +14,7 @@ class HeygenService:
         self.type = "talking_photo"
         self.talking_photo_id = "cae19979cd0e4203b2bcc702eaead13d" if talking_photo_id is None else talking_photo_id
         self.voice_id = "d7d6ae6ac0f64d1a9b1a8b26760096eb" if voice_id is None else voice_id
+        self.base_url = setting.HEYGEN_API_BASE_URL.rstrip("/")
         
     async def generate_heygen_video_title(self, title: str, script: str):
         print(f"\n=== HeyGen Generate Video ===")
@@ -15,7 +22,7 @@ class HeygenService:
         print(f"Script length: {len(script)} chars")
         print(f"Script preview: {script[:100]}...")
         
-        url = "https://api.heygen.com/v2/video/generate"
+        url = f"{self.base_url}/v2/video/generate"
 
         payload = {
             "caption": True,
@@ -40,6 +47,10 @@ class HeygenService:
             ],
             "title": title
         }
+        
+        callback_url = render_events.callback_url("heygen")
+        if callback_url:
+            payload["callback_url"] = callback_url
 
         headers = {
             "accept": "application/json",
@@ -48,19 +59,21 @@ class HeygenService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=None) as client:
+            client = http_clients.get("heygen")
+            async with rate_limiter.limit("heygen"):
                 response = await client.post(url, json=payload, headers=headers)
-                
-                result = response.json()
-                video_id = result.get('data', {}).get('video_id', 'unknown')
-                print(f"✅ HeyGen video created: {video_id}")
-                return result
+            response.raise_for_status()
+            
+            result = response.json()
+            video_id = (result.get('data') or {}).get('video_id', 'unknown')
+            print(f"✅ HeyGen video created: {video_id}")
+            return result
         except Exception as e:
             print(f"❌ HeyGen generate error: {e}")
             raise
 
     async def get_heygen_video_status(self, video_id: str):
-        url = f"https://api.heygen.com/v1/video_status.get?video_id={video_id}"
+        url = f"{self.base_url}/v1/video_status.get?video_id={video_id}"
 
         headers = {
             "accept": "application/json",
@@ -68,13 +81,35 @@ class HeygenService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=None) as client:
+            client = http_clients.get("heygen")
+            async with rate_limiter.limit("heygen"):
                 response = await client.get(url, headers=headers)
-                
-                result = response.json()
-                status = result.get('data', {}).get('status', 'unknown')
-                print(f"HeyGen {video_id[:8]}... status: {status}")
-                return result
+            
+            result = response.json()
+            status = (result.get('data') or {}).get('status', 'unknown')
+            print(f"HeyGen {video_id[:8]}... status: {status}")
+            return result
         except Exception as e:
             print(f"❌ HeyGen status check error: {e}")
+            raise
+
+    async def delete_heygen_video(self, video_id: str):
+        """Delete a video; a render still in progress is stopped"""
+        url = f"{self.base_url}/v1/video.delete?video_id={video_id}"
+
+        headers = {
+            "accept": "application/json",
+            "x-api-key": self.api_key
+        }
+
+        try:
+            client = http_clients.get("heygen")
+            async with rate_limiter.limit("heygen"):
+                response = await client.delete(url, headers=headers)
+            response.raise_for_status()
+
+            print(f"🗑️ HeyGen video deleted: {video_id}")
+            return response.json()
+        except Exception as e:
+            logger.warning(f"HeyGen delete of {video_id} failed - {e}")
             raise
\ No newline at end of file
@@ -1,7 +1,6 @@
 import os
 import uuid
-import asyncio
-import requests
+import httpx
 
 from io import BytesIO
 from PIL import Image
@@ -10,11 +9,26 @@ from google.genai import types
 
 from app.core.TosStorage import TosStorage
 from app.core.Setting import setting
+from app.core.Executor import executor
+from app.core.ImageCache import image_cache
+from app.core.RateLimiter import rate_limiter
 
 class NanobananaService:
     def __init__(self):
         self.tos_storage = TosStorage()
         self.client = genai.Client(api_key=setting.GEMINI_API_KEY)
+    
+    def _save_and_upload(self, data: bytes, local_path: str, prefix: str) -> str:
+        """Blocking: decode, write and upload a generated image. Run via the I/O pool."""
+        img = Image.open(BytesIO(data))
+        img.save(local_path)
+        public_url = self.tos_storage.upload_to_tos_storage(local_path, prefix=prefix)
+        
+        try:
+            os.remove(local_path)
+        except Exception as cleanup_error:
+            print(f"⚠️ Gagal menghapus file lokal: {cleanup_error}")
+        return public_url
 
     async def generate_google_image(self, prompt: str, prefix: str = "generated_images", output_dir: str = "generated_images") -> str:
         print(f"\n=== Nanobanana Generate Image ===")
@@ -37,20 +51,14 @@ class NanobananaService:
                     )
                 )
 
-            response = await asyncio.to_thread(_generate)
+            async with rate_limiter.limit("gemini_image"):
+                response = await executor.run_io(_generate)
             
             for part in response.candidates[0].content.parts:
                 if part.inline_data is not None:
                     print(f"Menerima data gambar dengan tipe: {part.inline_data.mime_type}")
-                    img = Image.open(BytesIO(part.inline_data.data))
-                    
-                    img.save(local_path)
-                    public_url = self.tos_storage.upload_to_tos_storage(local_path, prefix=prefix)
-                    
-                    try:
-                        os.remove(local_path)
-                    except Exception as cleanup_error:
-                        print(f"⚠️ Gagal menghapus file lokal: {cleanup_error}")
+                    async with rate_limiter.limit("tos"):
+                        public_url = await executor.run_io(self._save_and_upload, part.inline_data.data, local_path, prefix)
                     
                 if part.text:
                     print("\n*Teks Tambahan dari Model:*")
@@ -73,37 +81,18 @@ class NanobananaService:
         try:
             original_product_image = None
             if product_image_url:
-                print(f"Mengunduh gambar produk dari: {product_image_url}...")
-                response_product = requests.get(product_image_url, timeout=30)
-                response_product.raise_for_status()
-                
-                if not response_product.content:
-                    raise Exception("Response produk kosong")
-                
-                original_product_image = Image.open(BytesIO(response_product.content))
-                print(f"Gambar produk berhasil diunduh. Size: {len(response_product.content)} bytes")
+                print(f"Mengambil gambar produk dari: {product_image_url}...")
+                original_product_image = await image_cache.get(product_image_url)
+                print(f"Gambar produk siap. Size: {original_product_image.size}")
             
-            print(f"Mengunduh gambar avatar dari: {avatar_image_url}...")
-            print(f"Avatar URL length: {len(avatar_image_url) if avatar_image_url else 0}")
+            if not avatar_image_url:
+                raise Exception("Avatar URL kosong")
+            print(f"Mengambil gambar avatar dari: {avatar_image_url}...")
+            original_avatar_image = await image_cache.get(avatar_image_url)
+            print(f"Gambar avatar siap. Format: {original_avatar_image.format}")
+            print(f"Image cache: {image_cache.stats()}")
             
-            response_avatar = requests.get(avatar_image_url, timeout=30)
-            response_avatar.raise_for_status()
-            
-            if not response_avatar.content:
-                print(f"❌ Avatar URL returned empty response: {avatar_image_url}")
-                raise Exception(f"Response avatar kosong dari URL: {avatar_image_url}")
-            
-            content_type = response_avatar.headers.get('content-type', '')
-            if not content_type.startswith('image/'):
-                debug_file = f"debug_avatar_response_{uuid.uuid4().hex[:8]}.txt"
-                with open(debug_file, 'wb') as f:
-                    f.write(response_avatar.content)
-                raise Exception(f"Avatar URL returned non-image content: {content_type}")
-            
-            original_avatar_image = Image.open(BytesIO(response_avatar.content))
-            print(f"Gambar avatar berhasil diunduh. Format: {original_avatar_image.format}")
-            
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Error: {e}")
             raise RuntimeError(f"Gagal mengunduh gambar: {e}")
         except Exception as e:
@@ -127,20 +116,14 @@ class NanobananaService:
                     )
                 )
 
-            response = await asyncio.to_thread(_generate)
+            async with rate_limiter.limit("gemini_image"):
+                response = await executor.run_io(_generate)
             
             for part in response.candidates[0].content.parts:
                 if part.inline_data is not None:
                     print(f"Menerima data gambar dengan tipe: {part.inline_data.mime_type}")
-                    img = Image.open(BytesIO(part.inline_data.data))
-                    
-                    img.save(local_path)
-                    public_url = self.tos_storage.upload_to_tos_storage(local_path, prefix=prefix)
-                    
-                    try:
-                        os.remove(local_path)
-                    except Exception as cleanup_error:
-                        print(f"⚠️ Gagal menghapus file lokal: {cleanup_error}")
+                    async with rate_limiter.limit("tos"):
+                        public_url = await executor.run_io(self._save_and_upload, part.inline_data.data, local_path, prefix)
                     
                 if part.text:
                     print("\n*Teks Tambahan dari Model:*")
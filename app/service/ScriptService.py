@@ -1,73 +1,103 @@
+import asyncio
+import logging
+
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+from typing import AsyncIterator
 
-from app.schemas.ScriptSchemas import VideoStoryBoard
+from app.schemas.ScriptSchemas import VideoStoryBoard, Script, DEFAULT_SCENE_COUNT
 from app.core.Setting import setting
+from app.core.ScriptCache import script_cache
+from app.core.RetryPolicy import RetryPolicy, is_transient
+from app.core.RateLimiter import rate_limiter
+from app.core.Tracing import tracer
 
-class ScriptService:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-pro",
-            google_api_key=setting.GEMINI_API_KEY,
-            temperature=1
-        )
+logger = logging.getLogger(__name__)
 
-    async def generate_video_script(self, nama_produk: str, target_audiens: str, usp: str, cta: str) -> VideoStoryBoard:
-        prompt = ChatPromptTemplate.from_messages([
-            (
-                "system", 
-                """
-                ANDA adalah Produser AI untuk video viral UGC. Tugas Anda adalah membuat storyboard lengkap untuk video berdurasi 30-40 detik (Total sekitar 90-120 kata), menggunakan format "Greenscreen UGC" gaya "Insider Shock & Hack".
+class ScriptGenerationError(Exception):
+    """The model returned no usable storyboard"""
 
+def _should_retry(error: Exception) -> bool:
+    # The model samples at temperature 1, so an unusable storyboard is worth another attempt
+    return isinstance(error, ScriptGenerationError) or is_transient(error)
+
+HACK_SCENE_GUIDE = """SCENE {scene}: Hack DIY ke-{hack}
+                * Audio Script: Tips ke-{hack} + mekanisme singkat.
+                * Title Overlay: -.
+                * Background Image Prompt: Foto close-up POV (Point of View) dari bahan/tindakan. Setting bisa seperti dapur/kamar mandi yang sangat biasa (mundane). Fokus pada tekstur bahan di setting yang realistis."""
+
+PIVOT_SCENE_GUIDE = """SCENE {scene}: Hack DIY ke-{hack} & Pivot
+                * Audio Script: Tips ke-{hack} DAN transisi ke produk menggunakan [USP].
+                * Title Overlay: -.
+                * Background Image Prompt: Foto close-up POV dari tips atau bahan ke-{hack}. Fokus pada tekstur bahan di setting yang realistis. Gunakan pencahayaan spesifik (misal: "Harsh kitchen lighting")."""
+
+def scene_prompt_inputs(scene_count: int) -> dict:
+    """Prompt variables for a storyboard of `scene_count` scenes.
+    
+    Scene 1 is the hook and the last scene the reveal; every scene in between is
+    a DIY hack, the last of them pivoting to the product. Duration and word count
+    scale with the scenes (4 scenes: 30-40 seconds, 90-120 words).
+    """
+    middle = [
+        (PIVOT_SCENE_GUIDE if scene == scene_count - 1 else HACK_SCENE_GUIDE).format(scene=scene, hack=scene - 1)
+        for scene in range(2, scene_count)
+    ]
+    return {
+        "scene_count": str(scene_count),
+        "hack_count": str(scene_count - 2),
+        "duration": f"{round(scene_count * 7.5)}-{scene_count * 10}",
+        "word_count": f"{round(scene_count * 22.5)}-{scene_count * 30}",
+        "middle_scenes": "\n                \n                ".join(middle)
+    }
+
+PRODUCT_SCRIPT_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system", 
+        """
+                ANDA adalah Produser AI untuk video viral UGC. Tugas Anda adalah membuat storyboard lengkap untuk video berdurasi {duration} detik (Total sekitar {word_count} kata), menggunakan format "Greenscreen UGC" gaya "Insider Shock & Hack".
+                
                 Hasilkan script dalam Bahasa Indonesia yang agresif, percaya diri, blak-blakan, dan natural.
                 Hasilkan prompt untuk AI Image Generator (DALAM BAHASA INGGRIS). Kami akan beri prompt ke ai image generator scene per scene, jadi JANGAN refer ke scene lain karena ia tidak akan punya konteks. 
-
+                
                 INPUT DATA:
                 * [Nama Produk & Brand]: [USER INPUT]
                 * [Target Audiens]: [USER INPUT]
                 * [USP]: [USER INPUT]
                 * [CTA]: [USER INPUT]
-
+                
                 INSTRUKSI EKSEKUSI (WAJIB DIIKUTI AI):
                 1. Ciptakan "Persona Orang Dalam" yang fiktif dan mengejutkan, relevan dengan [Target Audiens].
-                2. Ciptakan 2 "Hack DIY" (tips) yang tidak biasa.
-                3. Bagi script menjadi 4 scene.
-
+                2. Ciptakan {hack_count} "Hack DIY" (tips) yang tidak biasa.
+                3. Bagi script menjadi TEPAT {scene_count} scene.
+                
                 PANDUAN GAYA GAMBAR (ESTETIKA UGC ASLI - SANGAT PENTING):
                 Prompt gambar HARUS menghasilkan visual yang otentik, meniru foto smartphone asli.
                 HINDARI penggunaan istilah: "Hyper-realistic", "8K", "Studio lighting", "Cinematic", "Professional photoshoot", "3D render", "Artistic".
-
+                
                 Tambahkan blok [AESTHETIC] berikut di akhir SETIAP prompt gambar yang Anda buat:
                 [AESTHETIC: Authentic UGC style, Vertical 9:16 aspect ratio. Mimic iPhone photo quality: natural color grading, realistic lighting (must be imperfect indoor light, slightly harsh, uneven exposure, or direct flash look). Candid composition, handheld feel, POV. Slightly soft focus or subtle digital grain. Avoid perfect symmetry. Setting must be mundane, realistic, and slightly cluttered.]
-
+                
                 STRUKTUR DAN GAYA SETIAP SCENE:
                 
-                * Full Script: Isi dari setiap Audio Script dari SCENE 1 sampai SCENE 4.
-
+                * Full Script: Isi dari setiap Audio Script dari SCENE 1 sampai SCENE {scene_count}.
+                
                 SCENE 1: Hook Kredibilitas (Dasar Image-to-Image)
                 * Audio Script: Klaim pengalaman dari "Persona Orang Dalam".
                 * Title Overlay: Judul singkat (3-6 kata) yang provokatif.
                 * Background Image Prompt: Kami akan memberikan foto Avatar kepada AI Image-to-image generation model. Rancang prompt untuk mengubah foto Avatar. Deskripsikan latar belakang DAN pose avatar di dalamnya. Avatar harus terlihat berinteraksi di lingkungan yang kredibel, seolah-olah foto diambil secara candid oleh orang lain.
-
-                SCENE 2: Hack DIY Pertama
-                * Audio Script: Tips pertama + mekanisme singkat.
-                * Title Overlay: -.
-                * Background Image Prompt: Foto close-up POV (Point of View) dari bahan/tindakan. Setting bisa seperti dapur/kamar mandi yang sangat biasa (mundane). Fokus pada tekstur bahan di setting yang realistis.
-
-                SCENE 3: Hack DIY Kedua & Pivot
-                * Audio Script: Tips kedua DAN transisi ke produk menggunakan [USP].
-                * Title Overlay: -.
-                * Background Image Prompt: Foto close-up POV dari tips atau bahan kedua. Fokus pada tekstur bahan di setting yang realistis. Gunakan pencahayaan spesifik (misal: "Harsh kitchen lighting").
-
-                SCENE 4: Reveal Produk & CTA
+                
+                {middle_scenes}
+                
+                SCENE {scene_count}: Reveal Produk & CTA
                 * Audio Script: Sebutkan [Nama Produk & Brand] dan [CTA] + Urgensi.
                 * Title Overlay: -.
                 * Background Image Prompt: Kami akan memberikan foto Avatar dan foto produk kepada AI Image-to-image generation model. Rancang prompt untuk mengubah foto Avatar. Deskripsikan latar belakang DAN pose avatar di dalamnya. Avatar harus terlihat berinteraksi di lingkungan yang kredibel, seolah-olah foto diambil secara candid oleh orang lain. Masukkan produk agar terlihat didalam gambarnya. Rancang prompt untuk Image-to-Image dimana kita menunjukkan efek setelah memakai produk tersebut di orang itu, avatar sambil berinteraksi/memegang/menunjukan produk. Pastikan prompt tidak refer ke scene lain. Cek ulang apakah prompt kamu sudah meminta AI untuk melihat lalu mengubah foto avatar pastikan kamu minta foto produk untuk masuk.
                 """
-            ),
-            (
-                "user", 
-                """
+    ),
+    (
+        "user", 
+        """
                 Buatlah skrip video dengan informasi berikut:
                 
                 [Nama Produk & Brand]: {nama_produk}
@@ -75,79 +105,56 @@ class ScriptService:
                 [USP]: {usp}
                 [CTA]: {cta}
                 """
-            )
-        ])
-        
-        structured_llm = self.llm.with_structured_output(VideoStoryBoard)
-        chain = prompt | structured_llm
-        
-        try:
-            result = await chain.ainvoke({
-                "nama_produk": nama_produk,
-                "target_audiens": target_audiens,
-                "usp": usp,
-                "cta": cta
-            })
-            return result
-        except Exception as e:
-            return VideoStoryBoard(title="Error", script=f"Error saat generate konten: {e}")
-        
-    async def generate_video_script_non_product(self, nama_produk: str, target_audiens: str, usp: str, cta: str) -> VideoStoryBoard:
-        prompt = ChatPromptTemplate.from_messages([
-            (
-                "system", 
-                """
-                ANDA adalah Produser AI untuk video viral UGC. Tugas Anda adalah membuat storyboard lengkap untuk video berdurasi 30-40 detik (Total sekitar 90-120 kata), menggunakan format "Greenscreen UGC" gaya "Insider Shock & Hack".
+    )
+])
 
+NON_PRODUCT_SCRIPT_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system", 
+        """
+                ANDA adalah Produser AI untuk video viral UGC. Tugas Anda adalah membuat storyboard lengkap untuk video berdurasi {duration} detik (Total sekitar {word_count} kata), menggunakan format "Greenscreen UGC" gaya "Insider Shock & Hack".
+                
                 Hasilkan script dalam Bahasa Indonesia yang agresif, percaya diri, blak-blakan, dan natural.
                 Hasilkan prompt untuk AI Image Generator (DALAM BAHASA INGGRIS). Kami akan beri prompt ke ai image generator scene per scene, jadi JANGAN refer ke scene lain karena ia tidak akan punya konteks. 
-
+                
                 INPUT DATA:
                 * [Nama Produk & Brand]: [USER INPUT]
                 * [Target Audiens]: [USER INPUT]
                 * [USP]: [USER INPUT]
                 * [CTA]: [USER INPUT]
-
+                
                 INSTRUKSI EKSEKUSI (WAJIB DIIKUTI AI):
                 1. Ciptakan "Persona Orang Dalam" yang fiktif dan mengejutkan, relevan dengan [Target Audiens].
-                2. Ciptakan 2 "Hack DIY" (tips) yang tidak biasa.
-                3. Bagi script menjadi 4 scene.
-
+                2. Ciptakan {hack_count} "Hack DIY" (tips) yang tidak biasa.
+                3. Bagi script menjadi TEPAT {scene_count} scene.
+                
                 PANDUAN GAYA GAMBAR (ESTETIKA UGC ASLI - SANGAT PENTING):
                 Prompt gambar HARUS menghasilkan visual yang otentik, meniru foto smartphone asli.
                 HINDARI penggunaan istilah: "Hyper-realistic", "8K", "Studio lighting", "Cinematic", "Professional photoshoot", "3D render", "Artistic".
-
+                
                 Tambahkan blok [AESTHETIC] berikut di akhir SETIAP prompt gambar yang Anda buat:
                 [AESTHETIC: Authentic UGC style, Vertical 9:16 aspect ratio. Mimic iPhone photo quality: natural color grading, realistic lighting (must be imperfect indoor light, slightly harsh, uneven exposure, or direct flash look). Candid composition, handheld feel, POV. Slightly soft focus or subtle digital grain. Avoid perfect symmetry. Setting must be mundane, realistic, and slightly cluttered.]
-
+                
                 STRUKTUR DAN GAYA SETIAP SCENE:
                 
-                * Full Script: Isi dari setiap Audio Script dari SCENE 1 sampai SCENE 4.
-
+                * Full Script: Isi dari setiap Audio Script dari SCENE 1 sampai SCENE {scene_count}.
+                
                 SCENE 1: Hook Kredibilitas (Dasar Image-to-Image)
                 * Audio Script: Klaim pengalaman dari "Persona Orang Dalam".
                 * Title Overlay: Judul singkat (3-6 kata) yang provokatif.
                 * Background Image Prompt: Kami akan memberikan foto Avatar kepada AI Image-to-image generation model. Rancang prompt untuk mengubah foto Avatar. Deskripsikan latar belakang DAN pose avatar di dalamnya. Avatar harus terlihat berinteraksi di lingkungan yang kredibel, seolah-olah foto diambil secara candid oleh orang lain.
-
-                SCENE 2: Hack DIY Pertama
-                * Audio Script: Tips pertama + mekanisme singkat.
-                * Title Overlay: -.
-                * Background Image Prompt: Foto close-up POV (Point of View) dari bahan/tindakan. Setting bisa seperti dapur/kamar mandi yang sangat biasa (mundane). Fokus pada tekstur bahan di setting yang realistis.
-
-                SCENE 3: Hack DIY Kedua & Pivot
-                * Audio Script: Tips kedua DAN transisi ke produk menggunakan [USP].
-                * Title Overlay: -.
-                * Background Image Prompt: Foto close-up POV dari tips atau bahan kedua. Fokus pada tekstur bahan di setting yang realistis. Gunakan pencahayaan spesifik (misal: "Harsh kitchen lighting").
-
-                SCENE 4: Reveal Produk & CTA
+                
+                {middle_scenes}
+                
+                SCENE {scene_count}: Reveal Produk & CTA
                 * Audio Script: Sebutkan [Nama Produk & Brand] dan [CTA] + Urgensi.
                 * Title Overlay: -.
                 * Background Image Prompt: Kami akan memberikan foto Avatar kepada AI Image-to-image generation model. Rancang prompt untuk mengubah foto Avatar. Deskripsikan latar belakang DAN pose avatar di dalamnya. Avatar harus terlihat berinteraksi di lingkungan yang kredibel, seolah-olah foto diambil secara candid oleh orang lain. Rancang prompt untuk Image-to-Image dimana kita menunjukkan efek setelah memakai produk tersebut di orang itu, AI image generator wajib TIDAK MENAMPILKAN produk yang disebut. Pastikan prompt tidak refer ke scene lain.
                 """
-            ),
-            (
-                "user", 
-                """
+    ),
+    (
+        "user", 
+        """
                 Buatlah skrip video dengan informasi berikut:
                 
                 [Nama Produk & Brand]: {nama_produk}
@@ -155,19 +162,205 @@ class ScriptService:
                 [USP]: {usp}
                 [CTA]: {cta}
                 """
+    )
+])
+
+class ScriptService:
+    def __init__(self):
+        self.llm = ChatGoogleGenerativeAI(
+            model="gemini-2.5-pro",
+            google_api_key=setting.GEMINI_API_KEY,
+            temperature=1
+        )
+        
+        # Chains are built once and reused by every call
+        self.chains = self._build_chains(self.llm)
+        
+        # Optional hedge: a faster model raced against the main one when it runs long
+        self.hedge_chains = None
+        if setting.SCRIPT_HEDGE_AFTER_SECONDS > 0:
+            hedge_llm = ChatGoogleGenerativeAI(
+                model=setting.SCRIPT_HEDGE_MODEL,
+                google_api_key=setting.GEMINI_API_KEY,
+                temperature=1
             )
-        ])
+            self.hedge_chains = self._build_chains(hedge_llm)
         
-        structured_llm = self.llm.with_structured_output(VideoStoryBoard)
-        chain = prompt | structured_llm
+        self.retry_policy = RetryPolicy(
+            max_attempts=setting.SCRIPT_MAX_ATTEMPTS,
+            attempt_timeout=setting.SCRIPT_ATTEMPT_TIMEOUT,
+            base_delay=setting.SCRIPT_RETRY_BASE_DELAY,
+            max_delay=setting.SCRIPT_RETRY_MAX_DELAY,
+            retry_on=_should_retry
+        )
+        
+        self.stream_parser = JsonOutputParser(pydantic_object=VideoStoryBoard)
+        self.stream_format_instructions = self.stream_parser.get_format_instructions()
+        self.stream_chains = {
+            mode: ChatPromptTemplate.from_messages([*prompt.messages, ("system", "{format_instructions}")]) | self.llm | self.stream_parser
+            for mode, prompt in (("product", PRODUCT_SCRIPT_PROMPT), ("non_product", NON_PRODUCT_SCRIPT_PROMPT))
+        }
+    
+    @staticmethod
+    def _build_chains(llm: ChatGoogleGenerativeAI) -> dict:
+        structured_llm = llm.with_structured_output(VideoStoryBoard)
+        return {
+            "product": PRODUCT_SCRIPT_PROMPT | structured_llm,
+            "non_product": NON_PRODUCT_SCRIPT_PROMPT | structured_llm
+        }
+    
+    @staticmethod
+    def validate_storyboard(storyboard, scene_count: int = DEFAULT_SCENE_COUNT) -> VideoStoryBoard:
+        """Reject storyboards the video pipeline cannot render"""
+        if not isinstance(storyboard, VideoStoryBoard):
+            raise ScriptGenerationError("Model tidak mengembalikan storyboard")
+        if len(storyboard.scripts) != scene_count:
+            raise ScriptGenerationError(f"Storyboard harus berisi {scene_count} scene, didapat {len(storyboard.scripts)}")
+        for scene in storyboard.scripts:
+            if not scene.audio_script.strip() or not scene.background_image_prompt.strip():
+                raise ScriptGenerationError(f"Scene {scene.scene} tidak lengkap")
+        return storyboard
+    
+    async def _invoke(self, chains: dict, mode: str, inputs: dict) -> VideoStoryBoard:
+        scene_count = int(inputs["scene_count"])
+        with tracer.span("script.invoke", mode=mode, hedge=chains is self.hedge_chains):
+            async with rate_limiter.limit("gemini_text"):
+                result = await chains[mode].ainvoke({**inputs, **scene_prompt_inputs(scene_count)})
+            return self.validate_storyboard(result, scene_count)
+    
+    async def _attempt(self, mode: str, inputs: dict) -> VideoStoryBoard:
+        """One attempt; with hedging, a second call starts after SCRIPT_HEDGE_AFTER_SECONDS and the first valid storyboard wins"""
+        tasks = [asyncio.ensure_future(self._invoke(self.chains, mode, inputs))]
+        try:
+            if not self.hedge_chains:
+                return await tasks[0]
+            
+            done, _ = await asyncio.wait(tasks, timeout=setting.SCRIPT_HEDGE_AFTER_SECONDS)
+            if done:
+                return tasks[0].result()
+            
+            logger.info(f"Script generation exceeded {setting.SCRIPT_HEDGE_AFTER_SECONDS}s, hedging with {setting.SCRIPT_HEDGE_MODEL}")
+            tasks.append(asyncio.ensure_future(self._invoke(self.hedge_chains, mode, inputs)))
+            pending = set(tasks)
+            last_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def _generate(self, mode: str, inputs: dict) -> VideoStoryBoard:
+        with tracer.span("script.generate", mode=mode, scene_count=int(inputs["scene_count"])):
+            return await self.retry_policy.run(lambda: self._attempt(mode, inputs), name=f"Script generation ({mode})")
+    
+    async def generate_video_script(self, nama_produk: str, target_audiens: str, usp: str, cta: str, scene_count: int = DEFAULT_SCENE_COUNT) -> VideoStoryBoard:
+        inputs = {
+            "nama_produk": nama_produk,
+            "target_audiens": target_audiens,
+            "usp": usp,
+            "cta": cta,
+            "scene_count": str(scene_count)
+        }
+        return await script_cache.get_or_generate("product", inputs, lambda: self._generate("product", inputs))
+    
+    async def generate_video_script_non_product(self, nama_produk: str, target_audiens: str, usp: str, cta: str, scene_count: int = DEFAULT_SCENE_COUNT) -> VideoStoryBoard:
+        inputs = {
+            "nama_produk": nama_produk,
+            "target_audiens": target_audiens,
+            "usp": usp,
+            "cta": cta,
+            "scene_count": str(scene_count)
+        }
+        return await script_cache.get_or_generate("non_product", inputs, lambda: self._generate("non_product", inputs))
+    
+    async def stream_video_script(self, nama_produk: str, target_audiens: str, usp: str, cta: str, non_product: bool = False, scene_count: int = DEFAULT_SCENE_COUNT) -> AsyncIterator[dict]:
+        """Yield storyboard parts as they are parsed from the model stream.
+        
+        Events are {"event": "title" | "scene" | "storyboard", "data": ...}. A field or
+        scene is emitted once the model has moved on to the next one, so its text is
+        final; "storyboard" carries the validated VideoStoryBoard at the end.
+        
+        Attempts go through the same retry policy and validation as
+        generate_video_script. A retry after parts were already emitted is announced
+        with {"event": "restart", "data": {"attempt": n}}; the parts before it must be
+        discarded. Streams are not hedged: a second model would emit a second,
+        interleaved storyboard, and the first parts already arrive early.
+        """
+        mode = "non_product" if non_product else "product"
+        inputs = {
+            "nama_produk": nama_produk,
+            "target_audiens": target_audiens,
+            "usp": usp,
+            "cta": cta,
+            "scene_count": str(scene_count)
+        }
+        cache_key = script_cache.cache_key(mode, inputs)
+        
+        if setting.SCRIPT_CACHE_ENABLED:
+            try:
+                cached = await script_cache.get(cache_key)
+            except Exception:
+                cached = None
+            if cached:
+                yield {"event": "title", "data": {"title": cached.title}}
+                for scene in cached.scripts:
+                    yield {"event": "scene", "data": scene.model_dump()}
+                yield {"event": "storyboard", "data": cached.model_dump()}
+                return
+        
+        storyboard = None
+        with tracer.span("script.stream", mode=mode, scene_count=scene_count):
+            async for event in self.retry_policy.stream(
+                lambda: self._stream_attempt(mode, inputs),
+                name=f"Script streaming ({mode})",
+                restart=lambda attempt: {"event": "restart", "data": {"attempt": attempt}}
+            ):
+                if event["event"] == "storyboard":
+                    storyboard = VideoStoryBoard.model_validate(event["data"])
+                yield event
+        
+        if setting.SCRIPT_CACHE_ENABLED and storyboard:
+            await script_cache.store(cache_key, storyboard)
+    
+    async def _stream_attempt(self, mode: str, inputs: dict) -> AsyncIterator[dict]:
+        """One streamed generation; raises ScriptGenerationError when the final storyboard is unusable"""
+        scene_count = int(inputs["scene_count"])
+        partial = {}
+        title_sent = False
+        scenes_sent = 0
+        async with rate_limiter.limit("gemini_text"):
+            async for chunk in self.stream_chains[mode].astream({**inputs, **scene_prompt_inputs(scene_count), "format_instructions": self.stream_format_instructions}):
+                if not isinstance(chunk, dict):
+                    continue
+                partial = chunk
+                
+                keys = list(partial.keys())
+                if not title_sent and "title" in keys and keys.index("title") < len(keys) - 1:
+                    title_sent = True
+                    yield {"event": "title", "data": {"title": partial["title"]}}
+                
+                scenes = partial.get("scripts") or []
+                while scenes_sent < len(scenes) - 1:
+                    try:
+                        scene = Script.model_validate(scenes[scenes_sent])
+                    except ValueError as e:
+                        raise ScriptGenerationError(f"Scene {scenes_sent + 1} tidak valid: {e}")
+                    yield {"event": "scene", "data": scene.model_dump()}
+                    scenes_sent += 1
         
         try:
-            result = await chain.ainvoke({
-                "nama_produk": nama_produk,
-                "target_audiens": target_audiens,
-                "usp": usp,
-                "cta": cta
-            })
-            return result
-        except Exception as e:
-            return VideoStoryBoard(title="Error", script=f"Error saat generate konten: {e}")
\ No newline at end of file
+            storyboard = VideoStoryBoard.model_validate(partial)
+        except ValueError as e:
+            raise ScriptGenerationError(f"Model tidak mengembalikan storyboard: {e}")
+        storyboard = self.validate_storyboard(storyboard, scene_count)
+        if not title_sent:
+            yield {"event": "title", "data": {"title": storyboard.title}}
+        for scene in storyboard.scripts[scenes_sent:]:
+            yield {"event": "scene", "data": scene.model_dump()}
+        yield {"event": "storyboard", "data": storyboard.model_dump()}
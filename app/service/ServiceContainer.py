@@ -0,0 +1,48 @@
+from typing import Optional
+
+from app.service.ScriptService import ScriptService
+from app.service.HeygenService import HeygenService
+from app.service.NanobananaService import NanobananaService
+from app.service.CreatomateGenerator import CreatomateGenerator
+
+class ServiceContainer:
+    """Process-wide service instances.
+
+    The services hold API clients and compiled LLM chains but no per-request
+    state, so they are built once on first use and shared by every request
+    and workflow in the process. HeyGen services only hold the avatar/voice
+    ids on top of the shared HTTP client, so they are built per call rather
+    than cached for every avatar/voice pair users ever pick.
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ServiceContainer, cls).__new__(cls)
+            cls._instance._script_service = None
+            cls._instance._nanobanana_service = None
+            cls._instance._creatomate_generator = None
+        return cls._instance
+    
+    @property
+    def script_service(self) -> ScriptService:
+        if self._script_service is None:
+            self._script_service = ScriptService()
+        return self._script_service
+    
+    @property
+    def nanobanana_service(self) -> NanobananaService:
+        if self._nanobanana_service is None:
+            self._nanobanana_service = NanobananaService()
+        return self._nanobanana_service
+    
+    @property
+    def creatomate_generator(self) -> CreatomateGenerator:
+        if self._creatomate_generator is None:
+            self._creatomate_generator = CreatomateGenerator()
+        return self._creatomate_generator
+    
+    def heygen_service(self, talking_photo_id: Optional[str] = None, voice_id: Optional[str] = None) -> HeygenService:
+        return HeygenService(talking_photo_id, voice_id)
+
+services = ServiceContainer()
@@ -0,0 +1,246 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from app.service.ServiceContainer import services
+from app.core.RenderEvents import render_events
+from app.core.Setting import setting
+from app.core.Tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+DONE_CHECKS = {
+    "heygen": lambda status: (status.get('data') or {}).get('status') == 'completed',
+    "creatomate": lambda status: status.get('status') == 'succeeded',
+}
+
+FAILED_CHECKS = {
+    "heygen": lambda status: (status.get('data') or {}).get('status') == 'failed',
+    "creatomate": lambda status: status.get('status') == 'failed',
+}
+
+def _heygen_failure_reason(status: Dict[str, Any]):
+    # The status API returns an error object, the webhook only a message
+    error = (status.get('data') or {}).get('error')
+    return error.get('message') or error.get('detail') if isinstance(error, dict) else error
+
+FAILURE_REASONS = {
+    "heygen": _heygen_failure_reason,
+    "creatomate": lambda status: status.get('error_message'),
+}
+
+class RenderFailedError(Exception):
+    """A render reached a terminal failed status at the provider"""
+    
+    def __init__(self, provider: str, render_id: str, status: Dict[str, Any]):
+        self.provider = provider
+        self.render_id = render_id
+        self.status = status
+        super().__init__(f"{provider} render {render_id} failed: {FAILURE_REASONS[provider](status) or 'unknown error'}")
+
+def _is_final(provider: str, status: Dict[str, Any]) -> bool:
+    return isinstance(status, dict) and (DONE_CHECKS[provider](status) or FAILED_CHECKS[provider](status))
+
+class _Watch:
+    def __init__(self, provider: str, render_id: str, submitted_at: float, future: asyncio.Future):
+        self.provider = provider
+        self.render_id = render_id
+        self.submitted_at = submitted_at
+        self.future = future
+        self.waiters = 0
+        self.next_check = 0.0
+        self.backoff = 0.0
+
+class StatusPoller:
+    """Process-wide scheduler for HeyGen and Creatomate status checks.
+    
+    Every outstanding render is registered once, however many workflows wait
+    on it. The first check is scheduled at the render's expected completion
+    time (a moving average of observed render durations per provider), then
+    backs off exponentially. Webhook events resolve waiters straight away.
+    A render the provider reports as failed raises RenderFailedError in its
+    waiters instead of being polled until the timeout.
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(StatusPoller, cls).__new__(cls)
+            cls._instance._watches: Dict[Tuple[str, str], _Watch] = {}
+            cls._instance._heap = []
+            cls._instance._seq = itertools.count()
+            cls._instance._loop = None
+            cls._instance._tasks = []
+            cls._instance._inflight = set()
+            cls._instance._wakeup = None
+            cls._instance.expected_seconds = {
+                "heygen": float(setting.HEYGEN_EXPECTED_RENDER_SECONDS),
+                "creatomate": float(setting.CREATOMATE_EXPECTED_RENDER_SECONDS),
+            }
+            cls._instance.checks_made = 0
+        return cls._instance
+    
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._watches.clear()
+        self._heap.clear()
+        # Shared by every workflow, so the loops must not inherit the caller's span
+        with tracer.detached():
+            self._tasks = [
+                loop.create_task(self._schedule_loop()),
+                loop.create_task(self._listen_webhooks()),
+            ]
+    
+    async def aclose(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+    
+    def _min_interval(self) -> float:
+        # With webhooks configured a check is only a fallback for a lost callback
+        if render_events.enabled:
+            return float(setting.STATUS_POLL_FALLBACK_INTERVAL)
+        return float(setting.STATUS_POLL_MIN_INTERVAL)
+    
+    def _schedule(self, watch: _Watch, at: float):
+        watch.next_check = at
+        heapq.heappush(self._heap, (at, next(self._seq), (watch.provider, watch.render_id)))
+        self._wakeup.set()
+    
+    async def wait(self, provider: str, render_id: str, timeout: float, submitted_at: Optional[float] = None) -> Dict[str, Any]:
+        """Wait until a render is done and return its final status
+        
+        Raises RenderFailedError when the render failed and asyncio.TimeoutError
+        after `timeout` seconds.
+        """
+        self._ensure_started()
+        key = (provider, render_id)
+        watch = self._watches.get(key)
+        
+        if watch is None:
+            cached = render_events.get(provider, render_id)
+            if cached and DONE_CHECKS[provider](cached):
+                return cached
+            if cached and FAILED_CHECKS[provider](cached):
+                raise RenderFailedError(provider, render_id, cached)
+            
+            now = time.time()
+            submitted_at = submitted_at or now
+            watch = _Watch(provider, render_id, submitted_at, self._loop.create_future())
+            watch.backoff = self._min_interval()
+            self._watches[key] = watch
+            self._schedule(watch, max(now, submitted_at + self.expected_seconds[provider]))
+        
+        watch.waiters += 1
+        try:
+            status = await asyncio.wait_for(asyncio.shield(watch.future), timeout)
+            if FAILED_CHECKS[provider](status):
+                raise RenderFailedError(provider, render_id, status)
+            return status
+        finally:
+            watch.waiters -= 1
+            if watch.waiters == 0 and self._watches.get(key) is watch:
+                del self._watches[key]
+    
+    def _resolve(self, watch: _Watch, status: Dict[str, Any]):
+        if watch.future.done():
+            return
+        watch.future.set_result(status)
+        self._watches.pop((watch.provider, watch.render_id), None)
+        if not DONE_CHECKS[watch.provider](status):
+            logger.warning(f"{watch.provider} {watch.render_id} failed after {time.time() - watch.submitted_at:.0f}s")
+            return
+        
+        # Moving average of render durations drives when future renders are first checked
+        duration = time.time() - watch.submitted_at
+        expected = self.expected_seconds[watch.provider]
+        self.expected_seconds[watch.provider] = 0.8 * expected + 0.2 * duration
+        logger.info(f"{watch.provider} {watch.render_id} done after {duration:.0f}s (expected {expected:.0f}s)")
+    
+    async def _schedule_loop(self):
+        while True:
+            now = time.time()
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                at, _, key = heapq.heappop(self._heap)
+                watch = self._watches.get(key)
+                if watch and watch.next_check == at and not watch.future.done():
+                    due.append(watch)
+            
+            if due:
+                task = asyncio.create_task(self._check_batch(due))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+            
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _check_batch(self, watches):
+        """Run all checks that came due together, bounded by STATUS_POLL_MAX_CONCURRENCY"""
+        semaphore = asyncio.Semaphore(setting.STATUS_POLL_MAX_CONCURRENCY)
+        
+        async def check(watch: _Watch):
+            async with semaphore:
+                try:
+                    with tracer.span("render.status_check", provider=watch.provider, render_id=watch.render_id, waiters=watch.waiters):
+                        status = await self._fetch(watch.provider, watch.render_id)
+                    final = bool(status) and _is_final(watch.provider, status)
+                except Exception as e:
+                    # An unexpected payload must not drop the watch; check again later
+                    logger.warning(f"Status check for {watch.provider} {watch.render_id} failed: {e}")
+                    final = False
+            
+            if final:
+                self._resolve(watch, status)
+            elif not watch.future.done() and (watch.provider, watch.render_id) in self._watches:
+                self._schedule(watch, time.time() + watch.backoff)
+                watch.backoff = min(watch.backoff * 2, max(float(setting.STATUS_POLL_MAX_INTERVAL), self._min_interval()))
+        
+        await asyncio.gather(*[check(watch) for watch in watches])
+    
+    async def _fetch(self, provider: str, render_id: str) -> Dict[str, Any]:
+        self.checks_made += 1
+        status = render_events.get(provider, render_id)
+        if status:
+            return status
+        if provider == "heygen":
+            return await services.heygen_service().get_heygen_video_status(render_id)
+        return await services.creatomate_generator.get_creatomate_render_status(render_id)
+    
+    async def _listen_webhooks(self):
+        """Resolve waiters as soon as a webhook for their render is published"""
+        while True:
+            pubsub = render_events.async_redis_client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{render_events.CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    provider, render_id = message["channel"][len(render_events.CHANNEL_PREFIX):].split(":", 1)
+                    watch = self._watches.get((provider, render_id))
+                    status = json.loads(message["data"])
+                    if watch and _is_final(provider, status):
+                        self._resolve(watch, status)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Webhook listener disconnected: {e}")
+                await asyncio.sleep(5)
+            finally:
+                await pubsub.aclose()
+
+status_poller = StatusPoller()
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from typing import Dict, Optional, Set
+
+from app.controller.WorkflowProductController import WorkflowProductController
+from app.service.WorkflowService import WorkflowService
+from app.service.StatusPoller import status_poller
+from app.schemas.InputSchemas import InputImage
+from app.schemas.JobSchemas import WorkflowJob
+from app.core.JobQueue import job_queue
+from app.core.WorkflowStorage import workflow_storage
+from app.core.HttpClient import http_clients
+from app.core.Executor import executor
+from app.core.AssetIndex import asset_index
+from app.core.TosStorage import tos_storage
+from app.core.ImageCache import image_cache
+from app.core.RateLimiter import current_user_id
+from app.core.Tracing import tracer
+from app.core.Database import SessionLocal
+from app.core.Setting import setting
+
+logger = logging.getLogger(__name__)
+
+class WorkerService:
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = concurrency or setting.WORKER_CONCURRENCY
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.running: Dict[str, asyncio.Task] = {}
+        self._cancelled: Set[str] = set()
+        self._stopping = asyncio.Event()
+    
+    def stop(self):
+        """Stop taking new jobs; running jobs are handed back to the queue"""
+        self._stopping.set()
+    
+    async def run(self):
+        """Consume jobs until stopped"""
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:
+                pass
+        
+        job_queue.heartbeat(self.worker_id, setting.WORKER_HEARTBEAT_TTL)
+        recovered = job_queue.recover_orphaned_jobs()
+        if recovered:
+            logger.info(f"Worker {self.worker_id}: Recovered {recovered} orphaned jobs")
+        
+        await http_clients.startup("heygen", "creatomate", "assets")
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        eviction_task = asyncio.create_task(self._asset_eviction_loop())
+        cancel_task = asyncio.create_task(self._cancel_listener())
+        print(f"👷 Worker {self.worker_id} started (concurrency={self.concurrency})")
+        
+        try:
+            while not self._stopping.is_set():
+                await self.semaphore.acquire()
+                if self._stopping.is_set():
+                    self.semaphore.release()
+                    break
+                
+                job = await asyncio.to_thread(job_queue.dequeue, self.worker_id, 5)
+                if job is None:
+                    self.semaphore.release()
+                    continue
+                
+                task = asyncio.create_task(self._process(job))
+                self.running[job.workflow_id] = task
+        finally:
+            await self._shutdown()
+            heartbeat_task.cancel()
+            eviction_task.cancel()
+            cancel_task.cancel()
+            job_queue.remove_heartbeat(self.worker_id)
+            await status_poller.aclose()
+            await http_clients.aclose()
+            executor.shutdown()
+            tracer.shutdown()
+            logger.info(f"Worker {self.worker_id}: Image cache stats {image_cache.stats()}")
+            print(f"👷 Worker {self.worker_id} stopped")
+    
+    async def _shutdown(self):
+        """Hand in-flight jobs back to the queue so another worker resumes them"""
+        for workflow_id, task in list(self.running.items()):
+            task.cancel()
+            job_queue.requeue(self.worker_id, workflow_id)
+            logger.info(f"Worker {self.worker_id}: Requeued workflow {workflow_id}")
+        if self.running:
+            await asyncio.gather(*self.running.values(), return_exceptions=True)
+    
+    async def _heartbeat_loop(self):
+        interval = max(1, setting.WORKER_HEARTBEAT_TTL // 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(job_queue.heartbeat, self.worker_id, setting.WORKER_HEARTBEAT_TTL)
+                recovered = await asyncio.to_thread(job_queue.recover_orphaned_jobs)
+                if recovered:
+                    logger.info(f"Worker {self.worker_id}: Recovered {recovered} orphaned jobs")
+            except Exception as e:
+                logger.warning(f"Worker {self.worker_id}: Heartbeat failed - {e}")
+    
+    async def _cancel_listener(self):
+        """Stop a running job as soon as it is cancelled through the API"""
+        while True:
+            pubsub = workflow_storage.async_redis_client.pubsub()
+            try:
+                await pubsub.subscribe(job_queue.CANCEL_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    task = self.running.get(message["data"])
+                    if task:
+                        logger.info(f"Worker {self.worker_id}: Cancelling workflow {message['data']}")
+                        self._cancelled.add(message["data"])
+                        # Scheduled after the task's first step, so its cleanup always runs
+                        asyncio.get_running_loop().call_soon(task.cancel)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Worker {self.worker_id}: Cancel listener disconnected - {e}")
+                await asyncio.sleep(5)
+            finally:
+                await pubsub.aclose()
+    
+    async def _asset_eviction_loop(self):
+        """Drop unreferenced, idle uploads; the Redis lock keeps this to one worker per interval"""
+        while True:
+            try:
+                evicted = await asyncio.to_thread(asset_index.evict_unused, tos_storage.delete_object)
+                if evicted:
+                    logger.info(f"Worker {self.worker_id}: Evicted {len(evicted)} unused assets")
+            except Exception as e:
+                logger.warning(f"Worker {self.worker_id}: Asset eviction failed - {e}")
+            await asyncio.sleep(setting.ASSET_EVICT_INTERVAL)
+    
+    async def _process(self, job: WorkflowJob):
+        db = SessionLocal()
+        workflow_service = WorkflowService(db, job.user_id)
+        cancelled = False
+        try:
+            logger.info(f"Worker {self.worker_id}: Picked up workflow {job.workflow_id} (attempt {job.attempts})")
+            # Each job runs in its own task, so provider calls below queue under this user
+            current_user_id.set(job.user_id)
+            controller = WorkflowProductController(
+                job.request,
+                InputImage(product_image=job.product_url or None, avatar_image=job.avatar_url),
+                is_non_product=job.is_non_product
+            )
+            # A job picked up again after a crash or redeploy continues from its checkpoints
+            resume = job.resume or job.attempts > 1
+            await workflow_service.run_workflow(job.workflow_id, controller, job.script, resume=resume, script_key=job.script_key)
+        except asyncio.CancelledError:
+            if job.workflow_id not in self._cancelled:
+                # Worker shutdown: the job was handed back to the queue
+                cancelled = True
+                raise
+            await workflow_service.finish_cancelled(job.workflow_id)
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id}: Workflow {job.workflow_id} crashed - {e}")
+        finally:
+            if not cancelled:
+                job_queue.ack(self.worker_id, job.workflow_id)
+            self.running.pop(job.workflow_id, None)
+            self._cancelled.discard(job.workflow_id)
+            db.close()
+            self.semaphore.release()
@@ -1,19 +1,48 @@
 import asyncio
+import json
+import httpx
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, AsyncIterator
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app.controller.WorkflowProductController import WorkflowProductController
 from app.schemas.InputSchemas import ScriptReturn
+from app.schemas.ScriptSchemas import VideoStoryBoard
+from app.schemas.HeygenSchemas import HeygenReturn
+from app.schemas.NanobananaSchemas import NanobananaReturn
+from app.schemas.CreatomateSchemas import CreatoamateReturn, CreatomateStatus
 from app.models.Video import Video
 from app.core.WorkflowStorage import workflow_storage
+from app.core.ScriptCache import script_cache
+from app.core.JobQueue import job_queue
+from app.core.Setting import setting
+from app.core.Tracing import tracer
+from app.service.StatusPoller import status_poller, RenderFailedError
+from app.service.ServiceContainer import services
 
 logger = logging.getLogger(__name__)
 
+MAX_WAIT_SECONDS = 300 * 15  # Give each render up to 75 minutes
+TERMINAL_STATUSES = ("completed", "error", "cancelled")
+
+class WorkflowCancelled(Exception):
+    """Raised inside a workflow once it has been cancelled through the API"""
+
+class RenderSubmitError(Exception):
+    """A provider rejected a render submit or answered without a render id"""
+
+RENDER_IDS = {
+    "heygen": lambda render: (render.get("data") or {}).get("video_id"),
+    "creatomate": lambda render: render.get("id")
+}
+
 class WorkflowService:
     def __init__(self, db: Optional[Session] = None, user_id: Optional[int] = None):
         self.db = db
         self.user_id = user_id
+        self._progress: Dict[str, int] = {}
+        self._progress_total: Dict[str, int] = {}
     
     def update_status(self, workflow_id: str, status: str, message: str, progress: int, data: Dict = None):
         """Update workflow status"""
@@ -28,189 +57,386 @@ class WorkflowService:
         """Get workflow status"""
         return workflow_storage.get(workflow_id)
     
-    async def run_workflow(self, workflow_id: str, controller: WorkflowProductController, script_result: ScriptReturn):
-        """Execute complete workflow"""
+    async def stream_status(self, workflow_id: str, keepalive: float = 15) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield the current status and every update published after it
+        
+        Backed by Redis pub/sub so any API replica can serve the stream. Yields None
+        every `keepalive` seconds without updates and stops after a terminal status.
+        """
+        pubsub = workflow_storage.async_redis_client.pubsub()
         try:
-            print(f"\n{'='*60}")
-            print(f"WORKFLOW START: {workflow_id}")
-            print(f"{'='*60}")
-            logger.info(f"Starting workflow {workflow_id}")
-            self.update_status(workflow_id, "processing", "Generating Heygen videos...", 10)
-            
-            # STEP 2: Generate and wait for Heygen videos
-            print(f"\n[STEP 2] Generating HeyGen videos...")
-            heygen_videos = await controller.generate_heygen_video_title(script_result)
-            print(f"[STEP 2] HeyGen videos initiated, waiting for completion...")
-            heygen_status = await self._wait_for_heygen_completion(workflow_id, controller, heygen_videos)
-            if not heygen_status:
-                print(f"[STEP 2] ❌ HeyGen videos failed or timeout")
-                return
-            print(f"[STEP 2] ✅ All HeyGen videos completed")
-            
-            # STEP 3: Generate background images
-            print(f"\n[STEP 3] Generating background images...")
-            self.update_status(workflow_id, "processing", "Generating background images...", 50)
-            logger.info(f"Workflow {workflow_id}: Generating background images")
-            generated_images = await controller.generate_image(script_result, controller.product_url, controller.avatar_url)
-            print(f"[STEP 3] ✅ All background images generated")
-            
-            # STEP 4: Generate and wait for Creatomate videos
-            print(f"\n[STEP 4] Rendering with Creatomate...")
-            self.update_status(workflow_id, "processing", "Rendering videos with Creatomate...", 60)
-            creatomate_videos = await controller.creatomate_render_video_title(script_result, heygen_status, generated_images)
-            print(f"[STEP 4] Creatomate renders initiated, waiting for completion...")
-            creatomate_status = await self._wait_for_creatomate_completion(workflow_id, controller, creatomate_videos)
-            if not creatomate_status:
-                print(f"[STEP 4] ❌ Creatomate renders failed or timeout")
-                return
-            print(f"[STEP 4] ✅ All Creatomate renders completed")
+            # Subscribe before reading the current status so no update slips in between
+            await pubsub.subscribe(f"workflow_status:{workflow_id}")
+            status_data = await workflow_storage.aget(workflow_id)
+            if status_data:
+                yield status_data
+                if status_data['status'] in TERMINAL_STATUSES:
+                    return
             
-            # STEP 5: Merge videos
-            print(f"\n[STEP 5] Merging final video...")
-            self.update_status(workflow_id, "processing", "Merging final video...", 95)
-            logger.info(f"Workflow {workflow_id}: Merging final video")
-            final_video_url = await controller.video_merging(creatomate_status)
-            print(f"[STEP 5] ✅ Video merged successfully")
-            
-            # Complete
-            print(f"\n{'='*60}")
-            print(f"✅ WORKFLOW COMPLETED: {workflow_id}")
-            print(f"Final video URL: {final_video_url}")
-            print(f"{'='*60}\n")
-            logger.info(f"Workflow {workflow_id}: Completed successfully - {final_video_url}")
-            self.update_status(workflow_id, "completed", "Video berhasil dibuat", 100, {
-                "final_video_url": final_video_url,
-                "script": script_result.script.model_dump(),
-                "heygen_videos": heygen_videos.model_dump(),
-                "generated_images": generated_images.model_dump(),
-                "creatomate_videos": creatomate_videos.model_dump()
-            })
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=keepalive)
+                if message is None:
+                    yield None
+                    continue
+                status_data = json.loads(message["data"])
+                yield status_data
+                if status_data['status'] in TERMINAL_STATUSES:
+                    return
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+    
+    def _load_checkpoint(self, checkpoints: Dict[str, Any], stage: str):
+        """Return a stored stage output, or None if the stage has not completed yet"""
+        if stage not in checkpoints:
+            return None
+        print(f"♻️ Resuming from checkpoint: {stage}")
+        return checkpoints[stage]
+    
+    def _save_checkpoint(self, workflow_id: str, stage: str, data: Dict[str, Any]):
+        workflow_storage.set_checkpoint(workflow_id, stage, data)
+    
+    async def run_workflow(self, workflow_id: str, controller: WorkflowProductController, script_result: Optional[ScriptReturn], resume: bool = False, script_key: Optional[str] = None):
+        """Execute complete workflow
+        
+        Scenes are pipelined independently: a scene's Creatomate render starts as soon
+        as its own HeyGen video and background image are ready. Every stage output is
+        checkpointed per scene under the workflow id. With `resume=True` stages that
+        already have a checkpoint are skipped, so a restarted workflow does not pay for
+        HeyGen or Creatomate renders twice. Without `script_result` the script is
+        generated first; workflows with the same `script_key` share one script.
+        """
+        with tracer.span("workflow", trace_id=workflow_id, workflow_id=workflow_id, resume=resume):
+            try:
+                print(f"\n{'='*60}")
+                print(f"WORKFLOW {'RESUME' if resume else 'START'}: {workflow_id}")
+                print(f"{'='*60}")
+                logger.info(f"{'Resuming' if resume else 'Starting'} workflow {workflow_id}")
+                
+                if resume:
+                    checkpoints = workflow_storage.get_checkpoints(workflow_id)
+                    logger.info(f"Workflow {workflow_id}: Found checkpoints {list(checkpoints.keys())}")
+                else:
+                    workflow_storage.delete_checkpoints(workflow_id)
+                    checkpoints = {}
+                self._raise_if_cancelled(workflow_id)
+                
+                # STEP 1: Generate the script when the job was queued without one (batches)
+                if script_result is None:
+                    script_result = await self._generate_script(workflow_id, controller, checkpoints, script_key)
+                    self._raise_if_cancelled(workflow_id)
+                
+                # STEP 2-4: Every scene runs its own HeyGen -> Creatomate chain, with the
+                # background image generated alongside the HeyGen render
+                scene_count = len(script_result.script.scripts)
+                tracer.set_attribute("scene_count", scene_count)
+                self._progress[workflow_id] = 0
+                self._progress_total[workflow_id] = scene_count * 3
+                self.update_status(workflow_id, "processing", "Generating scenes...", 10)
+                print(f"\n[STEP 2-4] Running {scene_count} scene pipelines...")
+                
+                scenes = await self._gather_or_cancel(*[
+                    self._run_scene(workflow_id, controller, script_result, scene_index, checkpoints)
+                    for scene_index in range(scene_count)
+                ])
+                print(f"[STEP 2-4] ✅ All scenes rendered")
+                
+                heygen_videos = HeygenReturn(videos=[scene["heygen_video"] for scene in scenes])
+                generated_images = NanobananaReturn(images=[scene["image_url"] for scene in scenes])
+                creatomate_videos = CreatoamateReturn(videos=[scene["creatomate_video"] for scene in scenes])
+                creatomate_status = CreatomateStatus(statuses=[scene["creatomate_status"] for scene in scenes])
+                
+                # STEP 5: Merge videos
+                final_video = self._load_checkpoint(checkpoints, "final_video")
+                if final_video is None:
+                    self._raise_if_cancelled(workflow_id)
+                    print(f"\n[STEP 5] Merging final video...")
+                    self.update_status(workflow_id, "processing", "Merging final video...", 95)
+                    logger.info(f"Workflow {workflow_id}: Merging final video")
+                    with tracer.span("stage.merge", scene_count=scene_count):
+                        final_video = {"final_video_url": await controller.video_merging(creatomate_status)}
+                    self._save_checkpoint(workflow_id, "final_video", final_video)
+                final_video_url = final_video["final_video_url"]
+                print(f"[STEP 5] ✅ Video merged successfully")
+                
+                # Complete
+                print(f"\n{'='*60}")
+                print(f"✅ WORKFLOW COMPLETED: {workflow_id}")
+                print(f"Final video URL: {final_video_url}")
+                print(f"{'='*60}\n")
+                logger.info(f"Workflow {workflow_id}: Completed successfully - {final_video_url}")
+                self.update_status(workflow_id, "completed", "Video berhasil dibuat", 100, {
+                    "final_video_url": final_video_url,
+                    "script": script_result.script.model_dump(),
+                    "heygen_videos": heygen_videos.videos,
+                    "generated_images": generated_images.images,
+                    "creatomate_videos": creatomate_videos.videos
+                })
+                
+                # Update database
+                self._mark_video_status(workflow_id, "completed", final_video_url)
+                tracer.set_attribute("outcome", "completed")
             
-            # Update database
-            if self.db and self.user_id:
-                video = self.db.query(Video).filter(Video.workflow_id == workflow_id).first()
-                if video:
-                    video.status = "completed"
-                    video.video_url = final_video_url
-                    video.completed_at = datetime.utcnow()
-                    self.db.commit()
+            except WorkflowCancelled:
+                tracer.set_attribute("outcome", "cancelled")
+                await self.finish_cancelled(workflow_id)
+            except Exception as e:
+                print(f"\n{'='*60}")
+                print(f"❌ WORKFLOW FAILED: {workflow_id}")
+                print(f"Error: {str(e)}")
+                print(f"{'='*60}\n")
+                logger.error(f"Workflow {workflow_id}: Error - {str(e)}")
+                import traceback
+                traceback.print_exc()
+                self.update_status(workflow_id, "error", f"Error: {str(e)}", 0)
+                tracer.set_attribute("outcome", "error")
+                tracer.set_attribute("error", str(e))
+                self._mark_video_status(workflow_id, "error")
+            finally:
+                self._progress.pop(workflow_id, None)
+                self._progress_total.pop(workflow_id, None)
+    
+    async def _generate_script(self, workflow_id: str, controller: WorkflowProductController, checkpoints: Dict[str, Any], script_key: Optional[str]) -> ScriptReturn:
+        script = self._load_checkpoint(checkpoints, "script")
+        if script is None:
+            print(f"\n[STEP 1] Generating script...")
+            self.update_status(workflow_id, "processing", "Generating script...", 5)
             
-            # Cleanup temporary files
-            self._cleanup_temp_files()
+            async def generate():
+                return (await controller.generate_video_script()).script
             
-        except Exception as e:
-            print(f"\n{'='*60}")
-            print(f"❌ WORKFLOW FAILED: {workflow_id}")
-            print(f"Error: {str(e)}")
-            print(f"{'='*60}\n")
-            logger.error(f"Workflow {workflow_id}: Error - {str(e)}")
-            import traceback
-            traceback.print_exc()
-            self.update_status(workflow_id, "error", f"Error: {str(e)}", 0)
-            # Cleanup temporary files even on error
-            self._cleanup_temp_files()
-    
-    async def _wait_for_heygen_completion(self, workflow_id: str, controller: WorkflowProductController, heygen_videos):
-        """Wait for Heygen videos to complete"""
-        max_attempts = 300
-        attempt = 0
-        
-        self.update_status(workflow_id, "processing", "Waiting for Heygen videos to complete...", 20)
+            with tracer.span("stage.script", shared=bool(script_key)):
+                storyboard = await script_cache.share(script_key, generate) if script_key else await generate()
+            script = {"script": storyboard.model_dump()}
+            self._save_checkpoint(workflow_id, "script", script)
+        print(f"[STEP 1] ✅ Script ready")
+        return ScriptReturn(
+            script=VideoStoryBoard.model_validate(script["script"]),
+            product_url=controller.product_url or "",
+            avatar_url=controller.avatar_url
+        )
+    
+    async def _gather_or_cancel(self, *coros):
+        """Like asyncio.gather, but a failure cancels the remaining coroutines"""
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    
+    def _scene_step_done(self, workflow_id: str, message: str):
+        """Advance progress by one scene step (HeyGen, image or Creatomate)"""
+        self._progress[workflow_id] = self._progress.get(workflow_id, 0) + 1
+        done = self._progress[workflow_id]
+        total = self._progress_total.get(workflow_id, done)
+        progress = int(10 + done * 80 / total)
+        self.update_status(workflow_id, "processing", f"{message} ({done}/{total})", progress)
+    
+    def _scene_step_retried(self, workflow_id: str, message: str):
+        """Report a scene retry without advancing progress"""
+        done = self._progress.get(workflow_id, 0)
+        total = self._progress_total.get(workflow_id) or 1
+        self.update_status(workflow_id, "processing", message, int(10 + done * 80 / total))
+    
+    async def _render_with_retry(self, workflow_id: str, scene_index: int, provider: str, label: str, checkpoints: Dict[str, Any], submit, wait):
+        """Submit one scene render and wait for it, resubmitting it when the provider reports it failed
         
-        while attempt < max_attempts:
-            heygen_status = await controller.get_heygen_video_status(heygen_videos)
+        Only this render is redone; the checkpoints of other scenes and stages are kept.
+        Returns the submit response and the final status.
+        """
+        return_stage = f"{provider}_return:{scene_index}"
+        status_stage = f"{provider}_status:{scene_index}"
+        status = self._load_checkpoint(checkpoints, status_stage)
+        render = self._load_checkpoint(checkpoints, return_stage)
+        if status is None and render is not None and not self._render_id(provider, render):
+            # A rejected submit saved by an older version; submit the scene again
+            workflow_storage.delete_checkpoint(workflow_id, return_stage)
+            render = None
+        retries = 0
+        with tracer.span(f"stage.{provider}", scene_index=scene_index, provider=provider, resumed=status is not None or render is not None) as stage:
+            while status is None:
+                try:
+                    if render is None:
+                        self._raise_if_cancelled(workflow_id)
+                        with tracer.span("render.submit", scene_index=scene_index, provider=provider, retry=retries):
+                            render = await self._submit_render(provider, submit)
+                        render["submitted_at"] = time.time()
+                        self._save_checkpoint(workflow_id, return_stage, render)
+                    # Provider-side queueing and rendering time
+                    with tracer.span("render.wait", scene_index=scene_index, provider=provider, retry=retries):
+                        status = await wait(workflow_id, scene_index, render)
+                except (RenderFailedError, RenderSubmitError) as e:
+                    if retries >= setting.SCENE_MAX_RETRIES:
+                        raise Exception(f"Scene {scene_index + 1}: {label} render failed after {retries} retries - {e}")
+                    retries += 1
+                    stage.set_attribute("retries", retries)
+                    print(f"[Scene {scene_index + 1}] ⚠️ {label} render failed, resubmitting ({retries}/{setting.SCENE_MAX_RETRIES})")
+                    logger.warning(f"Workflow {workflow_id}: Scene {scene_index + 1} {e}, resubmitting ({retries}/{setting.SCENE_MAX_RETRIES})")
+                    workflow_storage.delete_checkpoint(workflow_id, return_stage)
+                    self._scene_step_retried(workflow_id, f"Scene {scene_index + 1}: {label} render failed, retrying ({retries}/{setting.SCENE_MAX_RETRIES})")
+                    if render is None:
+                        # Rejected submit, e.g. rate limited; give the provider a moment
+                        await asyncio.sleep(min(2 ** retries, 30))
+                    render = None
+                    continue
+                self._save_checkpoint(workflow_id, status_stage, status)
+            stage.set_attribute("retries", retries)
+        return render, status
+    
+    def _render_id(self, provider: str, render: Any) -> Optional[str]:
+        """Provider render id of a submit response, None if the submit was not accepted"""
+        if not isinstance(render, dict):
+            return None
+        return RENDER_IDS[provider](render)
+    
+    async def _submit_render(self, provider: str, submit) -> Dict[str, Any]:
+        """Submit a render, raising RenderSubmitError unless the provider accepted it"""
+        try:
+            render = await submit()
+        except httpx.HTTPStatusError as e:
+            raise RenderSubmitError(f"{provider} submit rejected with HTTP {e.response.status_code}") from e
+        if not self._render_id(provider, render):
+            raise RenderSubmitError(f"{provider} submit returned no render id: {str(render)[:200]}")
+        return render
+    
+    async def _run_scene(self, workflow_id: str, controller: WorkflowProductController, script_result: ScriptReturn, scene_index: int, checkpoints: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one scene: HeyGen video and background image in parallel, then its Creatomate render"""
+        with tracer.span("scene", scene_index=scene_index):
+            scene = scene_index + 1
             
-            logger.info(f"Workflow {workflow_id}: Attempt {attempt+1} - Heygen Status:")
-            logger.info(f"Video 1: {heygen_status.video_status_1['data']['status']}")
-            logger.info(f"Video 2: {heygen_status.video_status_2['data']['status']}")
-            logger.info(f"Video 3: {heygen_status.video_status_3['data']['status']}")
-            logger.info(f"Video 4: {heygen_status.video_status_4['data']['status']}")
+            async def submit_heygen():
+                print(f"[Scene {scene}] Generating HeyGen video...")
+                return await controller.generate_heygen_scene(script_result, scene_index)
             
-            all_completed = all([
-                status['data']['status'] == 'completed' 
-                for status in [
-                    heygen_status.video_status_1, 
-                    heygen_status.video_status_2, 
-                    heygen_status.video_status_3, 
-                    heygen_status.video_status_4
-                ]
-            ])
+            async def heygen_stage():
+                heygen_video, heygen_status = await self._render_with_retry(
+                    workflow_id, scene_index, "heygen", "HeyGen", checkpoints,
+                    submit_heygen, self._wait_for_heygen_completion
+                )
+                print(f"[Scene {scene}] ✅ HeyGen video completed")
+                self._scene_step_done(workflow_id, f"Scene {scene}: HeyGen video ready")
+                return heygen_video, heygen_status
             
-            if all_completed:
-                logger.info(f"Workflow {workflow_id}: All Heygen videos completed")
-                return heygen_status
-                
-            attempt += 1
-            progress = int(20 + (attempt * 20 / max_attempts))
-            self.update_status(workflow_id, "processing", f"Waiting for Heygen videos... ({attempt}/{max_attempts})", progress)
-            await asyncio.sleep(15)
-        
-        logger.error(f"Workflow {workflow_id}: Timeout waiting for Heygen videos")
-        self.update_status(workflow_id, "error", "Timeout waiting for Heygen videos", 0)
-        return None
-    
-    async def _wait_for_creatomate_completion(self, workflow_id: str, controller: WorkflowProductController, creatomate_videos):
-        """Wait for Creatomate videos to complete"""
-        max_attempts = 300
-        attempt = 0
-        
-        self.update_status(workflow_id, "processing", "Waiting for Creatomate videos to complete...", 70)
-        
-        while attempt < max_attempts:
-            creatomate_status = await controller.get_creatomate_render_status(creatomate_videos)
+            async def image_stage():
+                image = self._load_checkpoint(checkpoints, f"nanobanana_return:{scene_index}")
+                if image is None:
+                    print(f"[Scene {scene}] Generating background image...")
+                    with tracer.span("stage.image", scene_index=scene_index, provider="gemini_image"):
+                        image = {"image_url": await controller.generate_scene_image(script_result, scene_index, controller.product_url, controller.avatar_url)}
+                    self._save_checkpoint(workflow_id, f"nanobanana_return:{scene_index}", image)
+                print(f"[Scene {scene}] ✅ Background image generated")
+                self._scene_step_done(workflow_id, f"Scene {scene}: Background image ready")
+                return image["image_url"]
             
-            logger.info(f"Workflow {workflow_id}: Attempt {attempt+1} - Creatomate Status:")
-            logger.info(f"Render 1: {creatomate_status.creatomate_render_status_1['status']}")
-            logger.info(f"Render 2: {creatomate_status.creatomate_render_status_2['status']}")
-            logger.info(f"Render 3: {creatomate_status.creatomate_render_status_3['status']}")
-            logger.info(f"Render 4: {creatomate_status.creatomate_render_status_4['status']}")
+            (heygen_video, heygen_status), image_url = await self._gather_or_cancel(heygen_stage(), image_stage())
             
-            all_succeeded = all([
-                status['status'] == 'succeeded' 
-                for status in [
-                    creatomate_status.creatomate_render_status_1, 
-                    creatomate_status.creatomate_render_status_2,
-                    creatomate_status.creatomate_render_status_3, 
-                    creatomate_status.creatomate_render_status_4
-                ]
-            ])
+            async def submit_creatomate():
+                print(f"[Scene {scene}] Rendering with Creatomate...")
+                return await controller.creatomate_render_scene(script_result, scene_index, heygen_status['data']['video_url'], image_url)
             
-            if all_succeeded:
-                logger.info(f"Workflow {workflow_id}: All Creatomate videos completed")
-                return creatomate_status
-                
-            attempt += 1
-            progress = int(70 + (attempt * 20 / max_attempts))
-            self.update_status(workflow_id, "processing", f"Waiting for Creatomate videos... ({attempt}/{max_attempts})", progress)
-            await asyncio.sleep(15)
+            creatomate_video, creatomate_status = await self._render_with_retry(
+                workflow_id, scene_index, "creatomate", "Creatomate", checkpoints,
+                submit_creatomate, self._wait_for_creatomate_completion
+            )
+            print(f"[Scene {scene}] ✅ Creatomate render completed")
+            self._scene_step_done(workflow_id, f"Scene {scene}: Creatomate render ready")
+            
+            return {
+                "heygen_video": heygen_video,
+                "image_url": image_url,
+                "creatomate_video": creatomate_video,
+                "creatomate_status": creatomate_status
+            }
+    
+    def _mark_video_status(self, workflow_id: str, status: str, video_url: Optional[str] = None):
+        """Mirror the workflow outcome on the Video row"""
+        if not (self.db and self.user_id):
+            return
+        try:
+            video = self.db.query(Video).filter(Video.workflow_id == workflow_id).first()
+            if video:
+                video.status = status
+                if video_url:
+                    video.video_url = video_url
+                if status == "completed":
+                    video.completed_at = datetime.utcnow()
+                self.db.commit()
+        except Exception as e:
+            logger.error(f"Workflow {workflow_id}: Failed to update video row - {e}")
+            self.db.rollback()
+    
+    def _raise_if_cancelled(self, workflow_id: str):
+        if job_queue.is_cancelled(workflow_id):
+            raise WorkflowCancelled(f"Workflow {workflow_id} was cancelled")
+    
+    def cancel_workflow(self, workflow_id: str):
+        """Cancel a queued or running workflow
         
-        logger.error(f"Workflow {workflow_id}: Timeout waiting for Creatomate videos")
-        self.update_status(workflow_id, "error", "Timeout waiting for Creatomate videos", 0)
-        return None
-    
-    def _cleanup_temp_files(self):
-        """Clean up temporary files"""
-        import os
-        import glob
+        A queued job is dropped from the queue right away; a running one is stopped
+        by its worker, which also aborts the renders it already submitted.
+        """
+        dequeued = job_queue.cancel(workflow_id)
+        logger.info(f"Workflow {workflow_id}: Cancelled {'while queued' if dequeued else 'while running'}")
+        self.update_status(workflow_id, "cancelled", "Workflow dibatalkan", 0)
+        self._mark_video_status(workflow_id, "cancelled")
+    
+    async def finish_cancelled(self, workflow_id: str):
+        """Abort provider renders still in progress and record the cancellation"""
+        print(f"\n🛑 WORKFLOW CANCELLED: {workflow_id}")
+        logger.info(f"Workflow {workflow_id}: Cancelled, aborting pending renders")
+        checkpoints = workflow_storage.get_checkpoints(workflow_id)
+        pending_heygen = [
+            self._render_id("heygen", data) for stage, data in checkpoints.items()
+            if stage.startswith("heygen_return:") and f"heygen_status:{stage.split(':')[1]}" not in checkpoints
+        ]
+        pending_heygen = [video_id for video_id in pending_heygen if video_id]
+        results = await asyncio.gather(*[
+            services.heygen_service().delete_heygen_video(video_id) for video_id in pending_heygen
+        ], return_exceptions=True)
+        aborted = 0
+        for video_id, result in zip(pending_heygen, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Workflow {workflow_id}: Failed to abort HeyGen video {video_id} - {result}")
+            else:
+                aborted += 1
+        if pending_heygen:
+            logger.info(f"Workflow {workflow_id}: Aborted {aborted}/{len(pending_heygen)} pending HeyGen videos")
+        # Creatomate has no API to stop a render; submitted renders run to completion
         
+        self.update_status(workflow_id, "cancelled", "Workflow dibatalkan", 0)
+        self._mark_video_status(workflow_id, "cancelled")
+    
+    async def _wait_for_render(self, workflow_id: str, provider: str, render_id: str, submitted_at: Optional[float]) -> Dict[str, Any]:
+        """Wait on the status poller, checking every few seconds whether the workflow was cancelled"""
+        wait = asyncio.ensure_future(status_poller.wait(provider, render_id, MAX_WAIT_SECONDS, submitted_at))
         try:
-            # Clean up temp image files
-            temp_files = glob.glob("temp_*")
-            for file in temp_files:
-                try:
-                    os.remove(file)
-                    logger.info(f"Cleaned up temp file: {file}")
-                except Exception as e:
-                    logger.warning(f"Failed to cleanup {file}: {e}")
-            
-            # Clean up gabungan video files
-            gabungan_files = glob.glob("gabungan_*.mp4")
-            for file in gabungan_files:
-                try:
-                    os.remove(file)
-                    logger.info(f"Cleaned up gabungan file: {file}")
-                except Exception as e:
-                    logger.warning(f"Failed to cleanup {file}: {e}")
-                    
-        except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
\ No newline at end of file
+            while True:
+                done, _ = await asyncio.wait({wait}, timeout=setting.WORKFLOW_CANCEL_CHECK_INTERVAL)
+                if done:
+                    return wait.result()
+                self._raise_if_cancelled(workflow_id)
+        finally:
+            wait.cancel()
+    
+    async def _wait_for_heygen_completion(self, workflow_id: str, scene_index: int, heygen_video: Dict[str, Any]) -> Dict[str, Any]:
+        """Wait for one scene's Heygen video to complete"""
+        video_id = heygen_video['data']['video_id']
+        logger.info(f"Workflow {workflow_id}: Scene {scene_index + 1} waiting for Heygen video {video_id}")
+        try:
+            return await self._wait_for_render(workflow_id, "heygen", video_id, heygen_video.get("submitted_at"))
+        except asyncio.TimeoutError:
+            logger.error(f"Workflow {workflow_id}: Timeout waiting for Heygen video of scene {scene_index + 1}")
+            raise Exception(f"Timeout waiting for Heygen video of scene {scene_index + 1}")
+    
+    async def _wait_for_creatomate_completion(self, workflow_id: str, scene_index: int, creatomate_video: Dict[str, Any]) -> Dict[str, Any]:
+        """Wait for one scene's Creatomate render to complete"""
+        render_id = creatomate_video['id']
+        logger.info(f"Workflow {workflow_id}: Scene {scene_index + 1} waiting for Creatomate render {render_id}")
+        try:
+            return await self._wait_for_render(workflow_id, "creatomate", render_id, creatomate_video.get("submitted_at"))
+        except asyncio.TimeoutError:
+            logger.error(f"Workflow {workflow_id}: Timeout waiting for Creatomate render of scene {scene_index + 1}")
+            raise Exception(f"Timeout waiting for Creatomate render of scene {scene_index + 1}")
@@ -0,0 +1,79 @@
+"""Local stand-in for the HeyGen and Creatomate APIs.
+
+Accepts render requests, answers status polls and replays the completion
+callbacks to the `callback_url` / `webhook_url` sent with each request, so the
+webhook flow can be exercised end to end without paying for real renders.
+
+    uvicorn app.utils.provider_stub:app --port 9000
+
+then point the API and workers at it:
+
+    HEYGEN_API_BASE_URL=http://localhost:9000
+    CREATOMATE_API_BASE_URL=http://localhost:9000
+    WEBHOOK_BASE_URL=http://localhost:8000
+    WEBHOOK_SECRET=local-stub-token
+"""
+import asyncio
+import os
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+
+RENDER_SECONDS = float(os.getenv("STUB_RENDER_SECONDS", "5"))
+SAMPLE_VIDEO_URL = os.getenv("STUB_VIDEO_URL", "https://ai-automation.tos-ap-southeast-3.bytepluses.com/samples/sample.mp4")
+
+app = FastAPI(title="Provider stub")
+renders = {}
+
+async def _replay_callback(callback_url: str, payload: dict):
+    await asyncio.sleep(RENDER_SECONDS)
+    if not callback_url:
+        return
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            await client.post(callback_url, json=payload)
+    except Exception as e:
+        print(f"⚠️ Stub callback to {callback_url} failed: {e}")
+
+async def _finish(render_id: str, delay: float):
+    await asyncio.sleep(delay)
+    renders[render_id]["done"] = True
+
+@app.post("/v2/video/generate")
+async def heygen_generate(request: Request):
+    body = await request.json()
+    video_id = uuid.uuid4().hex
+    renders[video_id] = {"done": False}
+    asyncio.create_task(_finish(video_id, RENDER_SECONDS))
+    asyncio.create_task(_replay_callback(body.get("callback_url"), {
+        "event_type": "avatar_video.success",
+        "event_data": {"video_id": video_id, "url": SAMPLE_VIDEO_URL, "callback_id": body.get("callback_id")}
+    }))
+    return {"error": None, "data": {"video_id": video_id}}
+
+@app.get("/v1/video_status.get")
+async def heygen_status(video_id: str):
+    done = renders.get(video_id, {}).get("done", False)
+    return {"code": 100, "data": {"id": video_id, "status": "completed" if done else "processing", "video_url": SAMPLE_VIDEO_URL if done else None}}
+
+@app.delete("/v1/video.delete")
+async def heygen_delete(video_id: str):
+    renders.pop(video_id, None)
+    return {"code": 100, "data": None, "message": "Success"}
+
+@app.post("/v2/renders")
+async def creatomate_render(request: Request):
+    body = await request.json()
+    render_id = str(uuid.uuid4())
+    renders[render_id] = {"done": False}
+    asyncio.create_task(_finish(render_id, RENDER_SECONDS))
+    asyncio.create_task(_replay_callback(body.get("webhook_url"), {
+        "id": render_id, "status": "succeeded", "url": SAMPLE_VIDEO_URL, "template_id": body.get("template_id")
+    }))
+    return {"id": render_id, "status": "planned", "template_id": body.get("template_id")}
+
+@app.get("/v2/renders/{render_id}")
+async def creatomate_status(render_id: str):
+    done = renders.get(render_id, {}).get("done", False)
+    return {"id": render_id, "status": "succeeded" if done else "rendering", "url": SAMPLE_VIDEO_URL if done else None}
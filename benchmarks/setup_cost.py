@@ -0,0 +1,57 @@
+"""Per-request setup cost with and without the shared ServiceContainer.
+
+"per-request services" rebuilds every service (Gemini clients, LLM chains,
+API clients) for each request, as the controllers did before the container;
+"shared container" builds the WorkflowProductController the way requests do
+now. No external API is called.
+
+    GEMINI_API_KEY=dummy python -m benchmarks.setup_cost [iterations]
+"""
+import io
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+
+from app.controller.WorkflowProductController import WorkflowProductController
+from app.schemas.InputSchemas import InputPayload, InputImage
+from app.service.ServiceContainer import services
+from app.service.ScriptService import ScriptService
+from app.service.HeygenService import HeygenService
+from app.service.NanobananaService import NanobananaService
+from app.service.CreatomateGenerator import CreatomateGenerator
+from app.core.MergingVideo import MergingVideo
+
+PAYLOAD = InputPayload(nama_produk="Produk", target_audiens="Umum", usp="Unik", cta="Beli sekarang")
+IMAGES = InputImage(product_image="https://example.com/product.jpg", avatar_image="https://example.com/avatar.jpg")
+
+def per_request_services():
+    ScriptService()
+    HeygenService()
+    NanobananaService()
+    CreatomateGenerator()
+    MergingVideo()
+
+def shared_container():
+    WorkflowProductController(PAYLOAD, IMAGES)
+
+def measure(func, iterations: int):
+    with redirect_stdout(io.StringIO()):
+        func()  # warm up imports and the shared instances
+    timings = []
+    with redirect_stdout(io.StringIO()):  # the controller logs every image URL
+        for _ in range(iterations):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), max(timings)
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    services.script_service  # the shared container is built once at startup in practice
+    for name, func in (("per-request services", per_request_services), ("shared container", shared_container)):
+        median, worst = measure(func, iterations)
+        print(f"{name:<22} median {median:8.3f} ms   max {worst:8.3f} ms   ({iterations} runs)")
+
+if __name__ == "__main__":
+    main()
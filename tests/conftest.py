@@ -0,0 +1,29 @@
+import os
+
+# Settings are read at import time; keep tests off real services
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import fakeredis
+import pytest
+
+from app.core.WorkflowStorage import workflow_storage
+from app.core.AssetIndex import asset_index
+from app.core.JobQueue import job_queue
+from app.core.RateLimiter import rate_limiter
+from app.core.RenderEvents import render_events
+from app.core.ScriptCache import script_cache
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point every Redis-backed singleton at one in-memory server; yields the sync client"""
+    server = fakeredis.FakeServer()
+    redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    async_redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    for instance in (workflow_storage, asset_index, job_queue, render_events):
+        monkeypatch.setattr(instance, "redis_client", redis_client)
+    for instance in (rate_limiter, script_cache):
+        monkeypatch.setattr(instance, "redis_client", async_redis_client)
+    for instance in (workflow_storage, render_events):
+        monkeypatch.setattr(instance, "async_redis_client", async_redis_client)
+    return redis_client
@@ -0,0 +1,148 @@
+import asyncio
+import io
+import time
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.AssetIndex import asset_index
+from app.core.Setting import setting
+from app.core.TosStorage import tos_storage
+from app.service.FileService import FileService
+
+SHA_A = "a" * 64
+SHA_B = "b" * 64
+
+class FakeTos:
+    """Records the TOS calls FileService makes instead of uploading"""
+    
+    def __init__(self):
+        self.uploads = []
+        self.deleted = []
+        self.parts = {}
+    
+    async def upload_bytes_async(self, data, object_key, content_type=None):
+        self.uploads.append(object_key)
+        return f"https://tos/{object_key}"
+    
+    def start_multipart_upload(self, object_key, content_type=None):
+        self.uploads.append(object_key)
+        return f"upload-{len(self.uploads)}"
+    
+    def upload_part(self, object_key, upload_id, part_number, data):
+        self.parts.setdefault(object_key, []).append(data)
+        return part_number
+    
+    def complete_multipart_upload(self, object_key, upload_id, parts):
+        return f"https://tos/{object_key}"
+    
+    def delete_object(self, object_key):
+        self.deleted.append(object_key)
+
+@pytest.fixture
+def fake_tos(monkeypatch):
+    tos = FakeTos()
+    for name in ("upload_bytes_async", "start_multipart_upload", "upload_part", "complete_multipart_upload", "delete_object"):
+        monkeypatch.setattr(tos_storage, name, getattr(tos, name))
+    return tos
+
+def upload(data: bytes, user_id: int, filename: str = "photo.png") -> str:
+    return asyncio.run(FileService.upload_file(UploadFile(io.BytesIO(data), filename=filename), user_id=user_id))
+
+def test_repeated_upload_reuses_stored_object(fake_redis, fake_tos):
+    first = upload(b"same image", user_id=1)
+    second = upload(b"same image", user_id=2, filename="other-name.png")
+    
+    assert first == second
+    assert len(fake_tos.uploads) == 1
+    assert asset_index.is_owner(first, 1) and asset_index.is_owner(first, 2)
+
+def test_repeated_multipart_upload_deletes_duplicate_object(fake_redis, fake_tos, monkeypatch):
+    monkeypatch.setattr(setting, "TOS_PART_SIZE", 4)
+    first = upload(b"large image bytes", user_id=1)
+    second = upload(b"large image bytes", user_id=1)
+    
+    assert first == second
+    assert len(fake_tos.uploads) == 2
+    assert fake_tos.deleted == [fake_tos.uploads[1]]
+
+def test_resolve_only_returns_assets_owned_by_user(fake_redis):
+    url = asset_index.register(SHA_A, "https://tos/a.png", "nanobanana/a.png", user_id=1)
+    
+    assert asset_index.resolve(url, 1) == url
+    assert asset_index.resolve(SHA_A, 1) == url
+    assert asset_index.resolve(url, 2) is None
+    assert asset_index.resolve(SHA_A, 2) is None
+    assert asset_index.resolve("https://elsewhere/a.png", 1) is None
+    
+    asset_index.lookup(SHA_A, user_id=2)
+    assert asset_index.resolve(SHA_A, 2) == url
+
+def test_workflow_refs_are_counted_per_workflow(fake_redis):
+    url_a = asset_index.register(SHA_A, "https://tos/a.png", "scratch/a.png", user_id=1)
+    url_b = asset_index.register(SHA_B, "https://tos/b.png", "scratch/b.png", user_id=1)
+    asset_index.add_workflow_refs("w1", [url_a, url_b, None, "https://unindexed/c.png"])
+    asset_index.add_workflow_refs("w2", [url_a])
+    
+    assert fake_redis.smembers(f"{asset_index.REFS_PREFIX}{SHA_A}") == {"workflow:w1", "workflow:w2"}
+    assert fake_redis.smembers(f"{asset_index.REFS_PREFIX}{SHA_B}") == {"workflow:w1"}
+    
+    asset_index.release_workflow("w1")
+    assert fake_redis.smembers(f"{asset_index.REFS_PREFIX}{SHA_A}") == {"workflow:w2"}
+    assert fake_redis.scard(f"{asset_index.REFS_PREFIX}{SHA_B}") == 0
+    assert not fake_redis.exists(f"{asset_index.WORKFLOW_PREFIX}w1")
+
+def make_idle(*hashes):
+    for sha256 in hashes:
+        asset_index.redis_client.zadd(asset_index.LAST_USED_KEY, {sha256: time.time() - 10})
+
+def test_eviction_never_deletes_referenced_assets(fake_redis):
+    url_a = asset_index.register(SHA_A, "https://tos/a.png", "scratch/a.png", user_id=1)
+    asset_index.register(SHA_B, "https://tos/b.png", "scratch/b.png", user_id=1)
+    asset_index.add_workflow_refs("w1", [url_a])
+    make_idle(SHA_A, SHA_B)
+    deleted = []
+    
+    assert asset_index.evict_unused(deleted.append, max_idle_seconds=1, prefixes=["scratch/"]) == [SHA_B]
+    assert deleted == ["scratch/b.png"]
+    assert asset_index.resolve(url_a, 1) == url_a
+    assert asset_index.hash_for_url("https://tos/b.png") is None
+
+def test_eviction_only_touches_configured_prefixes(fake_redis):
+    asset_index.register(SHA_A, "https://tos/a.png", "user_1/a.png", user_id=1)
+    asset_index.register(SHA_B, "https://tos/b.png", "scratch/b.png", user_id=1)
+    make_idle(SHA_A, SHA_B)
+    deleted = []
+    
+    # Nothing is evictable by default: upload URLs are held by clients and history
+    assert asset_index.evict_unused(deleted.append, max_idle_seconds=1) == []
+    
+    assert asset_index.evict_unused(deleted.append, max_idle_seconds=1, prefixes=["scratch/"]) == [SHA_B]
+    assert deleted == ["scratch/b.png"]
+    assert asset_index.resolve(SHA_A, 1) == "https://tos/a.png"
+
+def test_failed_delete_keeps_asset_indexed(fake_redis):
+    asset_index.register(SHA_A, "https://tos/a.png", "scratch/a.png", user_id=1)
+    make_idle(SHA_A)
+    
+    def delete_object(object_key):
+        raise RuntimeError("TOS unavailable")
+    
+    assert asset_index.evict_unused(delete_object, max_idle_seconds=1, prefixes=["scratch/"]) == []
+    assert asset_index.resolve(SHA_A, 1) == "https://tos/a.png"
+
+def test_image_references_accept_urls_and_owned_handles(fake_redis):
+    from types import SimpleNamespace
+    from fastapi import HTTPException
+    from app.controller.VideoController import VideoController
+    
+    url = asset_index.register(SHA_A, "https://tos/a.png", "nanobanana/a.png", user_id=1)
+    owner = VideoController(user=SimpleNamespace(id=1))
+    other = VideoController(user=SimpleNamespace(id=2))
+    
+    # Plain URLs keep working as before asset handles existed
+    assert other._resolve_image_url("https://cdn.example.com/own-avatar.png") == "https://cdn.example.com/own-avatar.png"
+    assert owner._resolve_image_url(SHA_A) == url
+    with pytest.raises(HTTPException) as error:
+        other._resolve_image_url(SHA_A)
+    assert error.value.status_code == 403
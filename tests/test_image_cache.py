@@ -0,0 +1,134 @@
+import asyncio
+from io import BytesIO
+
+import httpx
+import pytest
+from PIL import Image
+
+from app.core.HttpClient import http_clients
+from app.core.ImageCache import image_cache
+from app.core.Setting import setting
+
+# 10x10 RGB decodes to 300 bytes
+IMAGE_BYTES = 300
+
+def png(color) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (10, 10), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@pytest.fixture
+def assets(monkeypatch):
+    """Image host serving `images` by path with `etags`; every request is recorded"""
+    monkeypatch.setattr(image_cache, "entries", type(image_cache.entries)())
+    monkeypatch.setattr(image_cache, "total_bytes", 0)
+    monkeypatch.setattr(image_cache, "inflight", {})
+    monkeypatch.setattr(image_cache, "metrics", {key: 0 for key in image_cache.metrics})
+    monkeypatch.setattr(setting, "IMAGE_CACHE_DIR", "")
+    monkeypatch.setattr(setting, "IMAGE_CACHE_MAX_BYTES", 10 * IMAGE_BYTES)
+    monkeypatch.setattr(setting, "IMAGE_CACHE_REVALIDATE_SECONDS", 300)
+    host = {"images": {}, "etags": {}, "requests": []}
+    
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)
+        path = request.url.path
+        host["requests"].append((path, request.headers.get("if-none-match")))
+        etag = host["etags"].get(path)
+        if etag and request.headers.get("if-none-match") == etag:
+            return httpx.Response(304)
+        headers = {"content-type": "image/png", **({"etag": etag} if etag else {})}
+        return httpx.Response(200, content=host["images"][path], headers=headers)
+    
+    monkeypatch.setitem(http_clients.clients, "assets", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return host
+
+def url(path: str) -> str:
+    return f"https://cdn.example.com{path}"
+
+def test_concurrent_gets_are_coalesced_not_hits(assets):
+    assets["images"]["/a.png"] = png("red")
+    
+    async def scenario():
+        images = await asyncio.gather(*[image_cache.get(url("/a.png")) for _ in range(3)])
+        images.append(await image_cache.get(url("/a.png")))
+        return images
+    
+    images = asyncio.run(scenario())
+    assert all(image is images[0] for image in images)
+    assert len(assets["requests"]) == 1
+    stats = image_cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 2, 1)
+
+def test_lru_evicts_least_recently_used_by_bytes(assets, monkeypatch):
+    monkeypatch.setattr(setting, "IMAGE_CACHE_MAX_BYTES", 2 * IMAGE_BYTES)
+    for name, color in [("a", "red"), ("b", "green"), ("c", "blue")]:
+        assets["images"][f"/{name}.png"] = png(color)
+    
+    async def scenario():
+        await image_cache.get(url("/a.png"))
+        await image_cache.get(url("/b.png"))
+        await image_cache.get(url("/a.png"))  # b is now least recently used
+        await image_cache.get(url("/c.png"))
+    
+    asyncio.run(scenario())
+    assert list(image_cache.entries) == [url("/a.png"), url("/c.png")]
+    stats = image_cache.stats()
+    assert (stats["bytes"], stats["evictions"]) == (2 * IMAGE_BYTES, 1)
+
+def test_image_larger_than_budget_is_still_cached_alone(assets, monkeypatch):
+    monkeypatch.setattr(setting, "IMAGE_CACHE_MAX_BYTES", IMAGE_BYTES // 2)
+    assets["images"]["/a.png"] = png("red")
+    assets["images"]["/b.png"] = png("green")
+    
+    async def scenario():
+        await image_cache.get(url("/a.png"))
+        await image_cache.get(url("/b.png"))
+    
+    asyncio.run(scenario())
+    assert list(image_cache.entries) == [url("/b.png")]
+
+def test_stale_entry_is_revalidated_with_etag(assets, monkeypatch):
+    monkeypatch.setattr(setting, "IMAGE_CACHE_REVALIDATE_SECONDS", 0)
+    assets["images"]["/a.png"] = png("red")
+    assets["etags"]["/a.png"] = '"v1"'
+    
+    async def scenario():
+        return await image_cache.get(url("/a.png")), await image_cache.get(url("/a.png"))
+    
+    first, second = asyncio.run(scenario())
+    assert second is first
+    assert assets["requests"] == [("/a.png", None), ("/a.png", '"v1"')]
+    stats = image_cache.stats()
+    assert (stats["misses"], stats["revalidated"]) == (1, 1)
+
+def test_changed_etag_replaces_cached_image(assets, monkeypatch):
+    monkeypatch.setattr(setting, "IMAGE_CACHE_REVALIDATE_SECONDS", 0)
+    assets["images"]["/a.png"] = png("red")
+    assets["etags"]["/a.png"] = '"v1"'
+    
+    async def scenario():
+        first = await image_cache.get(url("/a.png"))
+        assets["images"]["/a.png"] = png("blue")
+        assets["etags"]["/a.png"] = '"v2"'
+        return first, await image_cache.get(url("/a.png"))
+    
+    first, second = asyncio.run(scenario())
+    assert second is not first
+    assert second.getpixel((0, 0)) == (0, 0, 255)
+    assert image_cache.entries[url("/a.png")].etag == '"v2"'
+    assert image_cache.stats()["bytes"] == IMAGE_BYTES
+
+def test_disk_tier_revalidates_after_restart(assets, monkeypatch, tmp_path):
+    monkeypatch.setattr(setting, "IMAGE_CACHE_DIR", str(tmp_path))
+    assets["images"]["/a.png"] = png("red")
+    assets["etags"]["/a.png"] = '"v1"'
+    
+    async def scenario():
+        await image_cache.get(url("/a.png"))
+        image_cache.entries.clear()  # a new process starts with an empty memory tier
+        return await image_cache.get(url("/a.png"))
+    
+    image = asyncio.run(scenario())
+    assert image.getpixel((0, 0)) == (255, 0, 0)
+    assert assets["requests"][-1] == ("/a.png", '"v1"')
+    assert image_cache.stats()["disk_hits"] == 1
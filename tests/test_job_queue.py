@@ -0,0 +1,108 @@
+import pytest
+
+from app.core.JobQueue import job_queue
+from app.core.Setting import setting
+from app.schemas.InputSchemas import InputPayload
+from app.schemas.JobSchemas import WorkflowJob
+
+REQUEST = InputPayload(nama_produk="Produk", target_audiens="Umum", usp="Unik", cta="Beli")
+
+def make_job(workflow_id: str, user_id: int, priority: str = "interactive") -> WorkflowJob:
+    return WorkflowJob(workflow_id=workflow_id, user_id=user_id, request=REQUEST, avatar_url="https://x/a.png", priority=priority)
+
+@pytest.fixture
+def scheduler(fake_redis, monkeypatch):
+    monkeypatch.setattr(setting, "SCHEDULER_MAX_RUNNING_PER_USER", 0)
+    monkeypatch.setattr(setting, "SCHEDULER_INTERACTIVE_WEIGHT", 4.0)
+    monkeypatch.setattr(setting, "SCHEDULER_BULK_WEIGHT", 1.0)
+    return fake_redis
+
+def drain(worker_id: str = "w1", ack: bool = True):
+    order = []
+    while True:
+        job = job_queue.dequeue(worker_id, timeout=0)
+        if job is None:
+            return order
+        order.append(job)
+        if ack:
+            job_queue.ack(worker_id, job.workflow_id)
+
+def test_users_interleave_under_load(scheduler):
+    job_queue.enqueue_many([make_job(f"u1-{i}", 1) for i in range(6)])
+    job_queue.enqueue_many([make_job(f"u2-{i}", 2) for i in range(3)])
+    
+    order = drain()
+    
+    assert [job.user_id for job in order] == [1, 2, 1, 2, 1, 2, 1, 1, 1]
+    # Each user's own jobs keep their submission order
+    assert [job.workflow_id for job in order if job.user_id == 1] == [f"u1-{i}" for i in range(6)]
+
+def test_user_arriving_later_does_not_wait_for_backlog(scheduler):
+    job_queue.enqueue_many([make_job(f"u1-{i}", 1) for i in range(10)])
+    first = [job_queue.dequeue("w1", timeout=0) for _ in range(4)]
+    job_queue.enqueue(make_job("u2-0", 2))
+    
+    assert job_queue.queue_position("u2-0") <= 2
+    served = [job_queue.dequeue("w1", timeout=0).workflow_id for _ in range(2)]
+    assert "u2-0" in served
+    assert all(job.user_id == 1 for job in first)
+
+def test_bulk_backlog_does_not_starve_interactive(scheduler):
+    job_queue.enqueue_many([make_job(f"bulk-{i}", 1, "bulk") for i in range(20)])
+    for i in range(8):
+        job_queue.enqueue(make_job(f"live-{i}", 2))
+    
+    order = [job.workflow_id for job in drain()][:10]
+    
+    # Interactive weighs 4x bulk: all 8 interactive jobs go out within the first 10
+    assert sum(workflow_id.startswith("live-") for workflow_id in order) == 8
+    # ...while the bulk flow still makes progress
+    assert any(workflow_id.startswith("bulk-") for workflow_id in order)
+
+def test_running_cap_per_user_is_respected(scheduler, monkeypatch):
+    monkeypatch.setattr(setting, "SCHEDULER_MAX_RUNNING_PER_USER", 2)
+    job_queue.enqueue_many([make_job(f"u1-{i}", 1) for i in range(4)])
+    job_queue.enqueue(make_job("u2-0", 2))
+    
+    claimed = drain(ack=False)
+    assert sorted(job.workflow_id for job in claimed) == ["u1-0", "u1-1", "u2-0"]
+    assert scheduler.hget(job_queue.RUNNING_USERS_KEY, "1") == "2"
+    
+    # Finishing a job frees a slot for the same user
+    job_queue.ack("w1", "u1-0")
+    assert job_queue.dequeue("w1", timeout=0).workflow_id == "u1-2"
+    assert job_queue.dequeue("w1", timeout=0) is None
+
+def test_requeue_after_worker_dies_does_not_duplicate(scheduler):
+    job_queue.enqueue(make_job("job-1", 1))
+    job_queue.enqueue(make_job("job-2", 1))
+    job_queue.heartbeat("dead", ttl=30)
+    claimed = job_queue.dequeue("dead", timeout=0)
+    job_queue.remove_heartbeat("dead")
+    
+    # Two workers starting up at once both try to recover the dead worker's job
+    assert job_queue.recover_orphaned_jobs() == 1
+    assert job_queue.recover_orphaned_jobs() == 0
+    assert job_queue.requeue("dead", claimed.workflow_id) is False
+    
+    assert job_queue.pending_count() == 2
+    assert not scheduler.hget(job_queue.RUNNING_USERS_KEY, "1")
+    order = drain("alive")
+    assert [job.workflow_id for job in order] == ["job-1", "job-2"]
+    assert order[0].attempts == 2
+
+def test_recovery_skips_workers_with_live_heartbeat(scheduler):
+    job_queue.enqueue(make_job("job-1", 1))
+    job_queue.heartbeat("busy", ttl=30)
+    job_queue.dequeue("busy", timeout=0)
+    
+    assert job_queue.recover_orphaned_jobs() == 0
+    assert job_queue.pending_count() == 0
+
+def test_cancel_removes_pending_job(scheduler):
+    job_queue.enqueue(make_job("job-1", 1))
+    job_queue.enqueue(make_job("job-2", 1))
+    
+    assert job_queue.cancel("job-1") is True
+    assert job_queue.is_cancelled("job-1")
+    assert [job.workflow_id for job in drain()] == ["job-2"]
@@ -0,0 +1,92 @@
+import asyncio
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+import pytest
+from moviepy import ColorClip
+
+from app.core.Executor import executor
+from app.core.MergingVideo import MergingVideo, merge_videos
+
+HEARTBEAT_INTERVAL = 0.02
+MAX_LOOP_LAG = 0.25
+
+def _copy_local(self, path):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp:
+        shutil.copyfile(path, temp.name)
+        return temp.name
+
+def merge_local_videos(paths):
+    """merge_videos on local files, without the download and the TOS upload"""
+    with mock.patch.object(MergingVideo, "download_temp", _copy_local), \
+         mock.patch("app.core.TosStorage.TosStorage.upload_to_tos_storage", lambda self, path, prefix: f"merged:{prefix}"):
+        return merge_videos(paths)
+
+@pytest.fixture
+def clips(tmp_path):
+    paths = []
+    for i, color in enumerate([(200, 0, 0), (0, 0, 200), (0, 200, 0)]):
+        path = str(tmp_path / f"clip_{i}.mp4")
+        ColorClip(size=(640, 360), color=color, duration=2).write_videofile(path, fps=24, codec="libx264", logger=None)
+        paths.append(path)
+    return paths
+
+@pytest.fixture
+def reencode(monkeypatch):
+    # Re-encoding is the heaviest merge path; spawned pool workers read it from the environment
+    monkeypatch.setenv("MERGE_MODE", "reencode")
+    executor.shutdown()
+    yield
+    executor.shutdown()
+
+def test_merge_does_not_block_event_loop(clips, reencode):
+    async def run():
+        lags = []
+        
+        async def heartbeat():
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+                lags.append(time.perf_counter() - started - HEARTBEAT_INTERVAL)
+        
+        ticker = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        try:
+            result = await executor.run_cpu(merge_local_videos, clips)
+        finally:
+            ticker.cancel()
+        return result, time.perf_counter() - started, lags
+    
+    result, elapsed, lags = asyncio.run(run())
+    
+    assert result == "merged:generated_videos"
+    # The heartbeat kept ticking for the whole merge, never stalled for long
+    assert len(lags) >= elapsed / (HEARTBEAT_INTERVAL + MAX_LOOP_LAG)
+    assert max(lags) < MAX_LOOP_LAG
+
+class BrokenDownload:
+    """Streaming response whose connection drops after the first chunk"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        return False
+    
+    def raise_for_status(self):
+        pass
+    
+    def iter_content(self, chunk_size):
+        yield b"partial"
+        raise ConnectionError("connection reset")
+
+def test_interrupted_download_removes_partial_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    
+    with mock.patch("app.core.MergingVideo.requests.get", lambda *args, **kwargs: BrokenDownload()):
+        with pytest.raises(ConnectionError):
+            MergingVideo().download_temp("https://cdn/scene.mp4")
+    
+    assert list(tmp_path.iterdir()) == []
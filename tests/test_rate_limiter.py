@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.RateLimiter import rate_limiter, current_user_id
+from app.core.Setting import setting
+
+SLOTS_KEY = f"{rate_limiter.KEY_PREFIX}heygen:slots"
+
+@pytest.fixture
+def limits(fake_redis, monkeypatch):
+    def configure(rate_per_minute: float = 0, max_concurrency: int = 0, burst_seconds: float = 5.0):
+        monkeypatch.setattr(setting, "HEYGEN_RATE_PER_MINUTE", rate_per_minute)
+        monkeypatch.setattr(setting, "HEYGEN_MAX_CONCURRENCY", max_concurrency)
+        monkeypatch.setattr(setting, "RATE_LIMIT_BURST_SECONDS", burst_seconds)
+    return configure
+
+def run(scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            for queue in rate_limiter.queues.values():
+                if queue.dispatcher:
+                    queue.dispatcher.cancel()
+    return asyncio.run(main())
+
+def test_token_bucket_allows_burst_then_paces(limits):
+    limits(rate_per_minute=60, burst_seconds=2)
+    
+    async def scenario():
+        return [await rate_limiter._try_acquire("heygen") for _ in range(3)]
+    
+    (first, _), (second, _), (third, delay) = run(scenario)
+    assert first and second
+    assert third is None
+    assert 0.9 <= delay <= 1.0
+
+def test_concurrency_limit_is_shared_and_released(limits):
+    limits(max_concurrency=2)
+    running = []
+    peak = []
+    
+    async def call():
+        async with rate_limiter.limit("heygen"):
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.05)
+            running.pop()
+    
+    async def scenario():
+        await asyncio.gather(*[call() for _ in range(6)])
+        return await rate_limiter.redis_client.zcard(SLOTS_KEY)
+    
+    assert run(scenario) == 0
+    assert max(peak) == 2
+
+def test_expired_lease_of_crashed_holder_is_reclaimed(limits, fake_redis):
+    limits(max_concurrency=1)
+    fake_redis.zadd(SLOTS_KEY, {"crashed-holder": time.time() - 1})
+    
+    async def scenario():
+        return await rate_limiter._try_acquire("heygen")
+    
+    lease_id, _ = run(scenario)
+    assert lease_id
+    assert fake_redis.zrange(SLOTS_KEY, 0, -1) == [lease_id]
+
+def test_lease_is_renewed_while_call_runs(limits, fake_redis, monkeypatch):
+    limits(max_concurrency=1)
+    monkeypatch.setattr(rate_limiter, "LEASE_TTL", 1)
+    
+    async def scenario():
+        async with rate_limiter.limit("heygen"):
+            await asyncio.sleep(1.5)
+            # Well past the original lease, the slot is still held
+            [(_, expires_at)] = fake_redis.zrange(SLOTS_KEY, 0, -1, withscores=True)
+            assert expires_at > time.time()
+            lease_id, _ = await rate_limiter._try_acquire("heygen")
+            assert lease_id is None
+    
+    run(scenario)
+    assert fake_redis.zcard(SLOTS_KEY) == 0
+
+def test_queued_calls_rotate_between_users(limits):
+    limits(max_concurrency=1)
+    order = []
+    
+    async def call(user_id: int):
+        current_user_id.set(user_id)
+        async with rate_limiter.limit("heygen"):
+            order.append(user_id)
+            await asyncio.sleep(0.01)
+    
+    async def scenario():
+        gate = asyncio.Event()
+        
+        async def blocker():
+            async with rate_limiter.limit("heygen"):
+                await gate.wait()
+        
+        holder = asyncio.create_task(blocker())
+        await asyncio.sleep(0.05)
+        calls = [asyncio.create_task(call(1)) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        calls += [asyncio.create_task(call(2)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        gate.set()
+        await asyncio.gather(holder, *calls)
+    
+    run(scenario)
+    assert order == [1, 2, 1, 2, 1, 1]
+
+def test_calls_go_through_when_redis_is_down(limits, monkeypatch):
+    limits(rate_per_minute=60, max_concurrency=1)
+    
+    class BrokenRedis:
+        def register_script(self, source):
+            async def script(**kwargs):
+                raise ConnectionError("Redis down")
+            return script
+        
+        async def zrem(self, *args):
+            raise ConnectionError("Redis down")
+    
+    monkeypatch.setattr(rate_limiter, "redis_client", BrokenRedis())
+    calls = []
+    
+    async def scenario():
+        async def call():
+            async with rate_limiter.limit("heygen"):
+                calls.append(1)
+        await asyncio.wait_for(asyncio.gather(*[call() for _ in range(3)]), 2)
+    
+    run(scenario)
+    assert len(calls) == 3
+
+def test_limiter_works_across_event_loops(limits):
+    limits(max_concurrency=1)
+    
+    async def call():
+        async with rate_limiter.limit("heygen"):
+            return asyncio.get_running_loop()
+    
+    first = asyncio.run(asyncio.wait_for(call(), 2))
+    second = asyncio.run(asyncio.wait_for(call(), 2))
+    assert first is not second
@@ -0,0 +1,140 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.core.RetryPolicy import RetryPolicy, is_transient
+from app.core.Setting import setting
+from app.schemas.ScriptSchemas import VideoStoryBoard
+from app.service.ScriptService import ScriptService
+
+def http_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.example.com")
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=httpx.Response(status, request=request))
+
+def test_backoff_stays_within_exponential_bound_and_max(monkeypatch):
+    policy = RetryPolicy(base_delay=1, max_delay=10)
+    bounds = [1, 2, 4, 8, 10, 10]
+    
+    for attempt, bound in enumerate(bounds, start=1):
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+    
+    monkeypatch.setattr(random, "uniform", lambda low, high: high)
+    assert [policy.backoff(attempt) for attempt in range(1, 7)] == bounds
+
+@pytest.mark.parametrize("error", [
+    TimeoutError("read timed out"),
+    ConnectionResetError("reset by peer"),
+    httpx.ConnectTimeout("connect timed out"),
+    http_error(429),
+    http_error(503),
+    google_exceptions.ResourceExhausted("quota"),
+    google_exceptions.ServiceUnavailable("overloaded"),
+    google_exceptions.DeadlineExceeded("deadline"),
+])
+def test_transient_errors(error):
+    assert is_transient(error)
+
+@pytest.mark.parametrize("error", [
+    ValueError("bad input"),
+    http_error(400),
+    http_error(404),
+    google_exceptions.InvalidArgument("bad prompt"),
+    google_exceptions.PermissionDenied("bad key"),
+])
+def test_permanent_errors(error):
+    assert not is_transient(error)
+
+def run_policy(policy: RetryPolicy, errors):
+    calls = []
+    
+    async def call():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+    
+    async def main():
+        return await policy.run(call, name="test call")
+    
+    return asyncio.run(main()), len(calls)
+
+def test_transient_errors_are_retried():
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    assert run_policy(policy, [http_error(503), http_error(429)]) == ("ok", 3)
+
+def test_permanent_error_is_raised_without_retry():
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    with pytest.raises(httpx.HTTPStatusError):
+        run_policy(policy, [http_error(400)])
+
+def test_gives_up_after_max_attempts():
+    policy = RetryPolicy(max_attempts=2, base_delay=0)
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        run_policy(policy, [google_exceptions.ServiceUnavailable("overloaded")] * 2)
+
+def test_attempt_timeout_is_retried():
+    policy = RetryPolicy(max_attempts=2, attempt_timeout=0.05, base_delay=0)
+    calls = []
+    
+    async def slow_then_fast():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+        return "ok"
+    
+    assert asyncio.run(policy.run(slow_then_fast)) == "ok"
+    assert len(calls) == 2
+
+@pytest.fixture
+def hedged(monkeypatch):
+    """ScriptService whose main and hedge calls take `delays` seconds; records which were cancelled"""
+    monkeypatch.setattr(setting, "SCRIPT_HEDGE_AFTER_SECONDS", 0.05)
+    service = ScriptService()
+    service.hedge_chains = {"product": "hedge"}
+    calls = {"delays": {}, "finished": [], "cancelled": []}
+    
+    async def invoke(chains, mode, inputs):
+        name = "hedge" if chains is service.hedge_chains else "main"
+        try:
+            await asyncio.sleep(calls["delays"][name])
+        except asyncio.CancelledError:
+            calls["cancelled"].append(name)
+            raise
+        calls["finished"].append(name)
+        return VideoStoryBoard(title=name, scripts=[])
+    
+    monkeypatch.setattr(service, "_invoke", invoke)
+    
+    def attempt(main: float, hedge: float):
+        calls["delays"] = {"main": main, "hedge": hedge}
+        
+        async def run():
+            result = await service._attempt("product", {"scene_count": "4"})
+            await asyncio.sleep(0.01)  # let cancellations land
+            return result
+        
+        return asyncio.run(run()).title
+    
+    return attempt, calls
+
+def test_fast_main_call_starts_no_hedge(hedged):
+    attempt, calls = hedged
+    assert attempt(main=0.01, hedge=0.01) == "main"
+    assert calls["finished"] == ["main"]
+    assert calls["cancelled"] == []
+
+def test_hedge_wins_and_slower_main_call_is_cancelled(hedged):
+    attempt, calls = hedged
+    assert attempt(main=1.0, hedge=0.01) == "hedge"
+    assert calls["finished"] == ["hedge"]
+    assert calls["cancelled"] == ["main"]
+
+def test_main_call_wins_and_slower_hedge_is_cancelled(hedged):
+    attempt, calls = hedged
+    assert attempt(main=0.1, hedge=1.0) == "main"
+    assert calls["finished"] == ["main"]
+    assert calls["cancelled"] == ["hedge"]
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.controller.VideoController import VideoController
+from app.controller.WorkflowProductController import WorkflowProductController
+from app.schemas.BatchSchemas import BatchItem
+from app.schemas.InputSchemas import InputPayload, ScriptReturn
+from app.schemas.ScriptSchemas import VideoStoryBoard, Script, MIN_SCENE_COUNT, MAX_SCENE_COUNT
+from app.service.ScriptService import ScriptService, ScriptGenerationError
+
+def storyboard(scene_count: int) -> VideoStoryBoard:
+    return VideoStoryBoard(title="title", scripts=[
+        Script(scene=i + 1, title_overlay="", audio_script="audio", background_image_prompt="prompt")
+        for i in range(scene_count)
+    ])
+
+def payload(scene_count: int) -> InputPayload:
+    return InputPayload(nama_produk="produk", target_audiens="audiens", usp="usp", cta="cta", scene_count=scene_count)
+
+def test_scene_count_limits():
+    assert (MIN_SCENE_COUNT, MAX_SCENE_COUNT) == (3, 8)
+
+@pytest.mark.parametrize("scene_count", [3, 8])
+def test_requests_accept_scene_count_within_limits(scene_count):
+    assert payload(scene_count).scene_count == scene_count
+    assert BatchItem(scene_count=scene_count).scene_count == scene_count
+
+@pytest.mark.parametrize("scene_count", [2, 9])
+def test_requests_reject_scene_count_outside_limits(scene_count):
+    with pytest.raises(ValidationError):
+        payload(scene_count)
+    with pytest.raises(ValidationError):
+        BatchItem(scene_count=scene_count)
+
+@pytest.mark.parametrize("scene_count", [3, 8])
+def test_edited_script_within_limits_is_accepted(scene_count):
+    script = storyboard(scene_count).model_dump_json()
+    assert len(VideoController()._load_script(script).scripts) == scene_count
+
+@pytest.mark.parametrize("scene_count", [2, 9])
+def test_edited_script_outside_limits_is_rejected(scene_count):
+    with pytest.raises(HTTPException) as error:
+        VideoController()._load_script(storyboard(scene_count).model_dump_json())
+    assert error.value.status_code == 400
+
+def test_generated_storyboard_must_match_requested_scene_count():
+    assert len(ScriptService.validate_storyboard(storyboard(8), 8).scripts) == 8
+    with pytest.raises(ScriptGenerationError):
+        ScriptService.validate_storyboard(storyboard(3), 4)
+
+class LayoutRecorder:
+    async def creatomate_render_video_title(self, **kwargs):
+        return "title"
+    
+    async def creatomate_render_video_avatar_left(self, **kwargs):
+        return "left"
+    
+    async def creatomate_render_video_avatar_right(self, **kwargs):
+        return "right"
+
+@pytest.mark.parametrize("scene_count, layouts", [
+    (3, ["title", "right", "right"]),
+    (4, ["title", "right", "left", "right"]),
+    (5, ["title", "right", "left", "right", "right"]),
+    (8, ["title", "right", "left", "right", "left", "right", "left", "right"]),
+])
+def test_closing_scene_keeps_avatar_on_the_right(scene_count, layouts):
+    controller = WorkflowProductController.__new__(WorkflowProductController)
+    controller.creatomate_generator = LayoutRecorder()
+    script = ScriptReturn(script=storyboard(scene_count), product_url="product", avatar_url="avatar")
+    
+    async def render_all():
+        return [await controller.creatomate_render_scene(script, i, "video", "image") for i in range(scene_count)]
+    
+    assert asyncio.run(render_all()) == layouts
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.core.Setting import setting
+from app.service.ScriptService import ScriptService, ScriptGenerationError
+
+def scene(number: int) -> dict:
+    return {"scene": number, "title_overlay": "", "audio_script": f"audio {number}", "background_image_prompt": f"prompt {number}"}
+
+def model_stream(scene_count: int) -> list:
+    """Partial storyboards as JsonOutputParser emits them while the model writes"""
+    chunks = [{"title": "Judul"}, {"title": "Judul", "script": "..."}]
+    for count in range(1, scene_count + 1):
+        chunks.append({"title": "Judul", "script": "...", "scripts": [scene(i) for i in range(1, count + 1)]})
+    return chunks
+
+class FakeStreamChain:
+    """Stands in for prompt | llm | parser; each astream() call replays the next attempt"""
+    
+    def __init__(self, attempts):
+        self.attempts = list(attempts)
+        self.calls = 0
+    
+    async def astream(self, inputs):
+        attempt = self.attempts[self.calls]
+        self.calls += 1
+        for chunk in attempt:
+            await asyncio.sleep(0)
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(setting, "GEMINI_TEXT_RATE_PER_MINUTE", 0)
+    monkeypatch.setattr(setting, "GEMINI_TEXT_MAX_CONCURRENCY", 0)
+    monkeypatch.setattr(setting, "SCRIPT_CACHE_ENABLED", False)
+    service = ScriptService()
+    service.retry_policy.max_attempts = 3
+    service.retry_policy.base_delay = 0
+    return service
+
+def stream(service: ScriptService, *attempts, scene_count: int = 4):
+    chain = FakeStreamChain(attempts)
+    service.stream_chains = {"product": chain}
+    
+    async def collect():
+        return [event async for event in service.stream_video_script("produk", "audiens", "usp", "cta", scene_count=scene_count)]
+    
+    return asyncio.run(collect()), chain.calls
+
+def test_stream_emits_title_then_scenes_then_storyboard(service):
+    events, calls = stream(service, model_stream(4))
+    
+    assert [event["event"] for event in events] == ["title", "scene", "scene", "scene", "scene", "storyboard"]
+    assert events[0]["data"] == {"title": "Judul"}
+    assert [event["data"]["scene"] for event in events[1:5]] == [1, 2, 3, 4]
+    assert len(events[-1]["data"]["scripts"]) == 4
+    assert calls == 1
+
+def test_invalid_storyboard_restarts_the_stream(service):
+    events, calls = stream(service, model_stream(3), model_stream(4))
+    
+    names = [event["event"] for event in events]
+    restart = names.index("restart")
+    assert names[:restart] == ["title", "scene", "scene"]
+    assert events[restart]["data"] == {"attempt": 2}
+    assert names[restart + 1:] == ["title", "scene", "scene", "scene", "scene", "storyboard"]
+    assert calls == 2
+
+def test_failure_before_first_event_is_retried_silently(service):
+    events, calls = stream(service, [ConnectionError("reset by peer")], model_stream(4))
+    
+    assert [event["event"] for event in events] == ["title", "scene", "scene", "scene", "scene", "storyboard"]
+    assert calls == 2
+
+def test_stream_fails_after_max_attempts(service):
+    with pytest.raises(ScriptGenerationError):
+        stream(service, model_stream(2), model_stream(2), model_stream(2))
@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.Setting import setting
+from app.service.StatusPoller import status_poller, RenderFailedError
+
+DONE = {"data": {"status": "completed", "video_url": "https://cdn/video.mp4"}}
+PROCESSING = {"data": {"status": "processing"}}
+FAILED = {"data": {"status": "failed", "error": {"message": "bad avatar"}}}
+
+@pytest.fixture
+def fetcher(fake_redis, monkeypatch):
+    """Stubbed provider status API; `replies` are returned in order, the last one repeats"""
+    monkeypatch.setattr(setting, "WEBHOOK_BASE_URL", "")
+    monkeypatch.setattr(setting, "STATUS_POLL_MIN_INTERVAL", 0.05)
+    monkeypatch.setattr(setting, "STATUS_POLL_MAX_INTERVAL", 0.2)
+    monkeypatch.setitem(status_poller.expected_seconds, "heygen", 0.0)
+    stub = {"replies": [DONE], "calls": []}
+    
+    async def fetch(provider, render_id):
+        stub["calls"].append((render_id, time.time()))
+        reply = stub["replies"][min(len(stub["calls"]), len(stub["replies"])) - 1]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+    
+    monkeypatch.setattr(status_poller, "_fetch", fetch)
+    return stub
+
+def run(scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await status_poller.aclose()
+    return asyncio.run(main())
+
+def test_first_check_waits_for_expected_render_time(fetcher, monkeypatch):
+    monkeypatch.setitem(status_poller.expected_seconds, "heygen", 0.3)
+    
+    async def scenario():
+        started = time.time()
+        status = await status_poller.wait("heygen", "video-1", 5, submitted_at=started)
+        return status, fetcher["calls"][0][1] - started
+    
+    status, first_check = run(scenario)
+    assert status == DONE
+    assert 0.3 <= first_check < 0.45
+    assert len(fetcher["calls"]) == 1
+
+def test_render_submitted_long_ago_is_checked_right_away(fetcher, monkeypatch):
+    monkeypatch.setitem(status_poller.expected_seconds, "heygen", 60.0)
+    
+    async def scenario():
+        started = time.time()
+        await status_poller.wait("heygen", "video-1", 5, submitted_at=started - 120)
+        return fetcher["calls"][0][1] - started
+    
+    assert run(scenario) < 0.1
+
+def test_completed_render_updates_expected_time(fetcher, monkeypatch):
+    monkeypatch.setitem(status_poller.expected_seconds, "heygen", 0.5)
+    
+    async def scenario():
+        await status_poller.wait("heygen", "video-1", 5, submitted_at=time.time() - 10.5)
+    
+    run(scenario)
+    assert status_poller.expected_seconds["heygen"] == pytest.approx(0.8 * 0.5 + 0.2 * 10.5, abs=0.05)
+
+def test_checks_back_off_exponentially_up_to_max_interval(fetcher):
+    fetcher["replies"] = [PROCESSING] * 5 + [DONE]
+    
+    async def scenario():
+        return await status_poller.wait("heygen", "video-1", 5)
+    
+    assert run(scenario) == DONE
+    times = [at for _, at in fetcher["calls"]]
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    assert len(gaps) == 5
+    for gap, expected in zip(gaps, [0.05, 0.1, 0.2, 0.2, 0.2]):
+        assert expected <= gap < expected + 0.08
+
+def test_waiters_on_the_same_render_share_one_check(fetcher):
+    async def scenario():
+        return await asyncio.gather(
+            *[status_poller.wait("heygen", "video-1", 5) for _ in range(3)],
+            status_poller.wait("heygen", "video-2", 5),
+        )
+    
+    assert run(scenario) == [DONE] * 4
+    assert sorted(render_id for render_id, _ in fetcher["calls"]) == ["video-1", "video-2"]
+
+def test_failed_render_raises_in_every_waiter(fetcher):
+    fetcher["replies"] = [FAILED]
+    
+    async def scenario():
+        return await asyncio.gather(*[status_poller.wait("heygen", "video-1", 5) for _ in range(2)], return_exceptions=True)
+    
+    errors = run(scenario)
+    assert all(isinstance(error, RenderFailedError) for error in errors)
+    assert "bad avatar" in str(errors[0])
+    assert len(fetcher["calls"]) == 1
+
+def test_malformed_status_is_checked_again(fetcher):
+    fetcher["replies"] = ["<html>Bad Gateway</html>", {"data": None}, KeyError("data"), DONE]
+    
+    async def scenario():
+        return await status_poller.wait("heygen", "video-1", 5)
+    
+    assert run(scenario) == DONE
+    assert len(fetcher["calls"]) == 4
+
+def test_wait_times_out_while_render_is_pending(fetcher):
+    fetcher["replies"] = [PROCESSING]
+    
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await status_poller.wait("heygen", "video-1", 0.3)
+        return dict(status_poller._watches)
+    
+    assert run(scenario) == {}
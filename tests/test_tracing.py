@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.core import Tracing
+from app.core.Tracing import tracer, InMemoryExporter, JsonLinesExporter, Span
+
+@pytest.fixture
+def spans(monkeypatch):
+    memory = InMemoryExporter()
+    monkeypatch.setattr(tracer, "exporters", [memory])
+    monkeypatch.setattr(tracer, "memory", memory)
+    return memory
+
+def by_name(memory: InMemoryExporter):
+    return {span.name: span for span in memory.spans()}
+
+def test_tasks_started_in_a_span_are_its_children(spans):
+    async def child(name: str):
+        with tracer.span(name):
+            await asyncio.sleep(0.01)
+    
+    async def main():
+        with tracer.span("workflow", trace_id="wf-1"):
+            await asyncio.gather(asyncio.create_task(child("scene.0")), child("scene.1"))
+    
+    asyncio.run(main())
+    recorded = by_name(spans)
+    root = recorded["workflow"]
+    assert root.parent_id is None and root.trace_id == "wf-1"
+    for name in ("scene.0", "scene.1"):
+        assert recorded[name].parent_id == root.span_id
+        assert recorded[name].trace_id == "wf-1"
+
+def test_concurrent_sibling_tasks_do_not_nest(spans):
+    async def scene(name: str, started: asyncio.Event, other_started: asyncio.Event):
+        with tracer.span(name):
+            started.set()
+            await other_started.wait()
+            with tracer.span(f"{name}.render"):
+                await asyncio.sleep(0)
+    
+    async def main():
+        a, b = asyncio.Event(), asyncio.Event()
+        with tracer.span("workflow"):
+            await asyncio.gather(scene("a", a, b), scene("b", b, a))
+    
+    asyncio.run(main())
+    recorded = by_name(spans)
+    assert recorded["a"].parent_id == recorded["b"].parent_id == recorded["workflow"].span_id
+    assert recorded["a.render"].parent_id == recorded["a"].span_id
+    assert recorded["b.render"].parent_id == recorded["b"].span_id
+
+def test_detached_tasks_start_their_own_trace(spans):
+    async def background():
+        with tracer.span("poller.loop"):
+            await asyncio.sleep(0)
+    
+    async def main():
+        with tracer.span("request") as request:
+            with tracer.detached():
+                assert tracer.current_span() is None
+                task = asyncio.create_task(background())
+            assert tracer.current_span() is request
+            with tracer.span("after"):
+                pass
+            await task
+    
+    asyncio.run(main())
+    recorded = by_name(spans)
+    assert recorded["poller.loop"].parent_id is None
+    assert recorded["poller.loop"].trace_id != recorded["request"].trace_id
+    assert recorded["after"].parent_id == recorded["request"].span_id
+
+def test_failed_and_cancelled_spans_record_status(spans):
+    async def main():
+        with pytest.raises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+        
+        async def slow():
+            with tracer.span("cancelled"):
+                await asyncio.sleep(1)
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    
+    asyncio.run(main())
+    recorded = by_name(spans)
+    assert (recorded["failing"].status, recorded["failing"].error) == ("error", "ValueError: boom")
+    assert recorded["cancelled"].status == "cancelled"
+
+def finished_span(name: str) -> Span:
+    span = Span(name, "trace", None, {"scene_index": 1})
+    span.end()
+    return span
+
+def test_jsonl_exporter_writes_every_span(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonLinesExporter(str(path))
+    for i in range(1200):
+        exporter.export(finished_span(f"span.{i}"))
+    exporter.close()
+    
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == [f"span.{i}" for i in range(1200)]
+    assert lines[0]["attributes"] == {"scene_index": 1}
+
+def test_jsonl_export_does_not_wait_for_the_disk(tmp_path, monkeypatch):
+    disk = threading.Event()
+    real_open = open
+    
+    class SlowFile:
+        def __init__(self, *args, **kwargs):
+            self.file = real_open(*args, **kwargs)
+        
+        def writelines(self, lines):
+            disk.wait(5)
+            self.file.writelines(lines)
+        
+        def flush(self):
+            self.file.flush()
+        
+        def close(self):
+            self.file.close()
+    
+    monkeypatch.setattr(Tracing, "open", SlowFile, raising=False)
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonLinesExporter(str(path))
+    
+    started = time.perf_counter()
+    for i in range(100):
+        exporter.export(finished_span(f"span.{i}"))
+    assert time.perf_counter() - started < 0.5
+    
+    disk.set()
+    exporter.flush()
+    assert len(path.read_text().splitlines()) == 100
+    exporter.close()
+
+def test_jsonl_exporter_drops_spans_when_writer_is_behind(tmp_path, monkeypatch):
+    monkeypatch.setattr(JsonLinesExporter, "MAX_PENDING", 5)
+    exporter = JsonLinesExporter(str(tmp_path / "traces.jsonl"))
+    exporter._thread = threading.current_thread()  # no writer drains the queue
+    
+    for i in range(8):
+        exporter.export(finished_span(f"span.{i}"))
+    
+    assert exporter.dropped == 3
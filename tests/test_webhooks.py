@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.webhook_routes import router
+from app.core.HttpClient import http_clients
+from app.core.RenderEvents import render_events
+from app.core.Setting import setting
+from app.service.StatusPoller import status_poller, RenderFailedError
+from app.service.WorkflowService import WorkflowService
+from app.service.CreatomateGenerator import CreatomateGenerator
+from app.utils import provider_stub
+
+SECRET = "webhook-secret"
+
+@pytest.fixture
+def webhooks(fake_redis, monkeypatch):
+    monkeypatch.setattr(setting, "WEBHOOK_BASE_URL", "https://api.example.com")
+    monkeypatch.setattr(setting, "WEBHOOK_SECRET", SECRET)
+    # No status check comes due during a test, so only a webhook can wake a waiter
+    monkeypatch.setitem(status_poller.expected_seconds, "heygen", 3600.0)
+    monkeypatch.setitem(status_poller.expected_seconds, "creatomate", 3600.0)
+    app = FastAPI()
+    app.include_router(router)
+    transport = httpx.ASGITransport(app=app)
+    
+    # The provider stub posts its callbacks to this app instead of the network
+    async_client = httpx.AsyncClient
+    monkeypatch.setattr(provider_stub.httpx, "AsyncClient", lambda **kwargs: async_client(transport=transport))
+    return async_client(transport=transport, base_url="http://test")
+
+def run(scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await status_poller.aclose()
+    return asyncio.run(main())
+
+async def start_wait(provider: str, render_id: str) -> asyncio.Task:
+    wait = asyncio.create_task(WorkflowService()._wait_for_render("wf-1", provider, render_id, None))
+    await asyncio.sleep(0.2)  # let the poller subscribe to render events
+    assert not wait.done()
+    return wait
+
+def test_valid_webhook_wakes_waiting_render(webhooks):
+    async def scenario():
+        wait = await start_wait("creatomate", "render-1")
+        response = await webhooks.post(f"/api/webhooks/creatomate?token={SECRET}", json={"id": "render-1", "status": "succeeded", "url": "https://cdn/out.mp4"})
+        assert response.status_code == 200
+        return await asyncio.wait_for(wait, 2)
+    
+    status = run(scenario)
+    assert status["url"] == "https://cdn/out.mp4"
+
+def test_heygen_failure_webhook_fails_waiting_render(webhooks):
+    async def scenario():
+        wait = await start_wait("heygen", "video-1")
+        body = {"event_type": "avatar_video.fail", "event_data": {"video_id": "video-1", "msg": "bad voice"}}
+        assert (await webhooks.post(f"/api/webhooks/heygen?token={SECRET}", json=body)).status_code == 200
+        with pytest.raises(RenderFailedError, match="bad voice"):
+            await asyncio.wait_for(wait, 2)
+    
+    run(scenario)
+
+def test_webhook_with_bad_token_is_rejected(webhooks):
+    async def scenario():
+        wait = await start_wait("creatomate", "render-1")
+        response = await webhooks.post("/api/webhooks/creatomate?token=guess", json={"id": "render-1", "status": "succeeded"})
+        await asyncio.sleep(0.2)
+        assert not wait.done()
+        wait.cancel()
+        return response
+    
+    assert run(scenario).status_code == 401
+    assert render_events.get("creatomate", "render-1") is None
+
+def test_webhooks_rejected_and_not_registered_without_secret(webhooks, monkeypatch):
+    monkeypatch.setattr(setting, "WEBHOOK_SECRET", "")
+    
+    async def scenario():
+        wait = await start_wait("creatomate", "render-1")
+        responses = [
+            await webhooks.post(url, json={"id": "render-1", "status": "succeeded"})
+            for url in ("/api/webhooks/creatomate", "/api/webhooks/creatomate?token=")
+        ]
+        await asyncio.sleep(0.2)
+        assert not wait.done()
+        wait.cancel()
+        return responses
+    
+    assert [response.status_code for response in run(scenario)] == [401, 401]
+    assert render_events.callback_url("creatomate") is None
+    assert render_events.get("creatomate", "render-1") is None
+
+def test_stub_provider_callback_wakes_submitted_render(webhooks, monkeypatch):
+    monkeypatch.setattr(provider_stub, "RENDER_SECONDS", 0.3)
+    stub = type(webhooks)(transport=httpx.ASGITransport(app=provider_stub.app), base_url="http://stub")
+    monkeypatch.setattr(http_clients, "get", lambda name: stub)
+    
+    async def scenario():
+        render = await CreatomateGenerator().creatomate_render_video_title("Judul", "https://x/v.mp4", "https://x/i.png")
+        status = await asyncio.wait_for(WorkflowService()._wait_for_render("wf-1", "creatomate", render["id"], None), 5)
+        return render, status
+    
+    render, status = run(scenario)
+    assert status["status"] == "succeeded"
+    assert status["id"] == render["id"]
+    assert status["template_id"] == "0291c0f6-e2d3-4c6d-9ca2-56e5c4a0bcc8"
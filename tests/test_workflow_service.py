@@ -0,0 +1,157 @@
+import asyncio
+import logging
+
+import httpx
+import pytest
+
+from app.core.HttpClient import http_clients
+from app.core.Setting import setting
+from app.core.WorkflowStorage import workflow_storage
+from app.schemas.InputSchemas import ScriptReturn
+from app.schemas.ScriptSchemas import VideoStoryBoard, Script
+from app.service.StatusPoller import status_poller
+from app.service.WorkflowService import WorkflowService
+
+SCENE_COUNT = 3
+
+def script_result() -> ScriptReturn:
+    scenes = [Script(scene=i, title_overlay="", audio_script="audio", background_image_prompt="prompt") for i in range(SCENE_COUNT)]
+    return ScriptReturn(script=VideoStoryBoard(title="title", scripts=scenes), product_url="product", avatar_url="avatar")
+
+class FakeController:
+    product_url = "product"
+    avatar_url = "avatar"
+    
+    def __init__(self):
+        self.heygen_videos = []
+        self.creatomate_renders = []
+    
+    async def generate_heygen_scene(self, script_result, scene_index):
+        self.heygen_videos.append(scene_index)
+        return {"data": {"video_id": f"video-{scene_index}"}}
+    
+    async def generate_scene_image(self, *args):
+        return "https://cdn/image.png"
+    
+    async def creatomate_render_scene(self, script_result, scene_index, video_url, image_url):
+        self.creatomate_renders.append(scene_index)
+        # Every submit gets a new render id, as at Creatomate
+        return {"id": f"render-{scene_index}-{self.creatomate_renders.count(scene_index)}"}
+    
+    async def video_merging(self, storyboard):
+        return "https://cdn/final.mp4"
+
+@pytest.fixture
+def heygen_api(fake_redis, monkeypatch):
+    """HeyGen delete endpoint; videos listed in `reject` answer with HTTP 500"""
+    monkeypatch.setattr(setting, "WORKFLOW_CANCEL_CHECK_INTERVAL", 0.05)
+    monkeypatch.setattr(setting, "HEYGEN_RATE_PER_MINUTE", 0)
+    monkeypatch.setattr(setting, "HEYGEN_MAX_CONCURRENCY", 0)
+    # Renders never finish during a test, so the workflow only ends when cancelled
+    monkeypatch.setitem(status_poller.expected_seconds, "heygen", 3600.0)
+    api = {"deleted": [], "reject": set()}
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        video_id = request.url.params["video_id"]
+        if video_id in api["reject"]:
+            return httpx.Response(500, json={"error": "internal"})
+        api["deleted"].append(video_id)
+        return httpx.Response(200, json={"code": 100})
+    
+    monkeypatch.setitem(http_clients.clients, "heygen", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return api
+
+def run_and_cancel(controller: FakeController):
+    async def main():
+        service = WorkflowService()
+        workflow_id = "wf-cancel"
+        try:
+            run = asyncio.create_task(service.run_workflow(workflow_id, controller, script_result()))
+            while len([k for k in workflow_storage.get_checkpoints(workflow_id) if k.startswith("heygen_return:")]) < SCENE_COUNT:
+                await asyncio.sleep(0.01)
+            service.cancel_workflow(workflow_id)
+            await asyncio.wait_for(run, 2)
+            return workflow_storage.get(workflow_id)
+        finally:
+            await status_poller.aclose()
+    return asyncio.run(main())
+
+def test_cancel_aborts_pending_heygen_renders(heygen_api):
+    controller = FakeController()
+    
+    workflow = run_and_cancel(controller)
+    
+    assert workflow["status"] == "cancelled"
+    assert sorted(heygen_api["deleted"]) == [f"video-{i}" for i in range(SCENE_COUNT)]
+    assert controller.creatomate_renders == []
+
+def test_cancel_reports_rejected_heygen_delete(heygen_api, caplog):
+    heygen_api["reject"].add("video-1")
+    
+    with caplog.at_level(logging.INFO):
+        workflow = run_and_cancel(FakeController())
+    
+    assert workflow["status"] == "cancelled"
+    assert sorted(heygen_api["deleted"]) == ["video-0", "video-2"]
+    assert "Failed to abort HeyGen video video-1" in caplog.text
+    assert f"Aborted 2/{SCENE_COUNT} pending HeyGen videos" in caplog.text
+
+@pytest.fixture
+def renders(fake_redis, monkeypatch):
+    """Provider status API; Creatomate renders listed in `failing` report failed"""
+    monkeypatch.setattr(setting, "STATUS_POLL_MIN_INTERVAL", 0.01)
+    monkeypatch.setattr(setting, "SCENE_MAX_RETRIES", 2)
+    monkeypatch.setitem(status_poller.expected_seconds, "heygen", 0.0)
+    monkeypatch.setitem(status_poller.expected_seconds, "creatomate", 0.0)
+    api = {"failing": set()}
+    
+    async def fetch(provider, render_id):
+        if provider == "heygen":
+            return {"data": {"status": "completed", "video_url": f"https://cdn/{render_id}.mp4"}}
+        if render_id in api["failing"]:
+            return {"id": render_id, "status": "failed", "error_message": "render error"}
+        return {"id": render_id, "status": "succeeded", "url": f"https://cdn/{render_id}.mp4"}
+    
+    monkeypatch.setattr(status_poller, "_fetch", fetch)
+    return api
+
+def run_workflow(controller: FakeController, resume: bool = False):
+    async def main():
+        try:
+            await WorkflowService().run_workflow("wf-retry", controller, script_result(), resume=resume)
+            return workflow_storage.get("wf-retry")
+        finally:
+            await status_poller.aclose()
+    return asyncio.run(main())
+
+def test_failed_render_retries_only_its_scene(renders):
+    renders["failing"] |= {"render-1-1", "render-1-2"}
+    controller = FakeController()
+    
+    workflow = run_workflow(controller)
+    
+    assert workflow["status"] == "completed"
+    assert sorted(controller.creatomate_renders) == [0, 1, 1, 1, 2]
+    assert sorted(controller.heygen_videos) == list(range(SCENE_COUNT))
+    checkpoints = workflow_storage.get_checkpoints("wf-retry")
+    assert checkpoints["creatomate_status:1"]["id"] == "render-1-3"
+
+def test_scene_fails_after_max_retries_and_resume_reuses_other_scenes(renders):
+    renders["failing"] |= {f"render-1-{attempt}" for attempt in range(1, 4)}
+    controller = FakeController()
+    
+    workflow = run_workflow(controller)
+    
+    assert workflow["status"] == "error"
+    assert "failed after 2 retries" in workflow["message"]
+    assert controller.creatomate_renders.count(1) == 3
+    
+    # Resuming submits scene 2 once more; HeyGen videos and finished renders are reused
+    resumed = FakeController()
+    resumed.creatomate_renders = [1, 1, 1]
+    
+    workflow = run_workflow(resumed, resume=True)
+    
+    assert workflow["status"] == "completed"
+    assert resumed.heygen_videos == []
+    assert resumed.creatomate_renders == [1, 1, 1, 1]
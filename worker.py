@@ -0,0 +1,15 @@
+import asyncio
+import argparse
+import logging
+
+from app.service.WorkerService import WorkerService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI Video Automation workflow worker")
+    parser.add_argument("--concurrency", type=int, default=None, help="Workflows run in parallel by this worker")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    worker = WorkerService(concurrency=args.concurrency)
+    asyncio.run(worker.run())